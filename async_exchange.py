@@ -0,0 +1,204 @@
+# async_exchange.py
+# @author: Memba Co.
+
+import os
+import asyncio
+import logging
+import threading
+
+import aiohttp
+import ccxt.async_support as ccxt_async
+from dotenv import load_dotenv
+
+import config
+import metrics
+from throttling import AsyncRateLimiter, endpoint_weight, weight_budget, is_rate_limit_error
+
+load_dotenv()
+
+
+def _get_unified_symbol(symbol: str) -> str:
+    # tools (LangChain, ccxt senkron istemcisi) modül yüklenirken değil, ilk kullanımda içe aktarılır.
+    from tools import _get_unified_symbol as unify
+    return unify(symbol)
+
+
+class AsyncExchangeClient:
+    """
+    `ccxt.async_support` üzerine kurulu, tek bir aiohttp oturumunu paylaşan asenkron borsa istemcisi.
+    Tüm istekler ortak bir hız sınırlayıcıdan geçer; böylece çok sayıda istek, her biri için
+    ayrı bir thread açmadan aynı olay döngüsünde eş zamanlı yürütülebilir. Simülatör modunda istekler,
+    botun kullandığı süreç içi simülatöre (tools.exchange) bir işçi thread'i üzerinden yönlendirilir.
+    """
+
+    def __init__(self, market_type: str = config.DEFAULT_MARKET_TYPE):
+        self.market_type = market_type.lower()
+        self.exchange = None
+        self.session = None
+        self.simulated = False
+        self.limiter = AsyncRateLimiter(config.ASYNC_EXCHANGE_REQUESTS_PER_SECOND, config.ASYNC_EXCHANGE_MAX_CONCURRENT_REQUESTS)
+
+    async def start(self):
+        """Paylaşılan aiohttp oturumunu ve ccxt borsa nesnesini oluşturup piyasaları yükler."""
+        import tools
+        if tools.str_to_bool(os.getenv("USE_EXCHANGE_SIMULATOR", "False")):
+            # Simülatörün durumu (emirler, pozisyonlar) senkron kodla paylaşılsın diye aynı nesne kullanılır.
+            if tools.exchange is None:
+                await asyncio.to_thread(tools.initialize_exchange, self.market_type)
+            self.exchange, self.simulated = tools.exchange, True
+            return self
+
+        api_key, secret_key = os.getenv("BINANCE_API_KEY"), os.getenv("BINANCE_SECRET_KEY")
+        if not api_key or not secret_key:
+            raise ValueError("API anahtarları .env dosyasında bulunamadı veya boş.")
+
+        self.session = aiohttp.ClientSession()
+        self.exchange = ccxt_async.binance({
+            "apiKey": api_key, "secret": secret_key, "options": {"defaultType": self.market_type},
+            "enableRateLimit": True, "adjustForTimeDifference": True, "session": self.session,
+        })
+        if tools.str_to_bool(os.getenv("USE_TESTNET", "False")) and self.market_type == 'future':
+            self.exchange.set_sandbox_mode(True)
+        try:
+            await self.exchange.load_markets()
+            logging.info(f"--- Asenkron borsa istemcisi '{self.market_type.upper()}' pazarı için hazır.")
+        except Exception as e:
+            await self.close()
+            raise ConnectionError(f"Asenkron istemci piyasaları yükleyemedi: {e}")
+        return self
+
+    async def close(self):
+        if self.simulated:
+            self.exchange, self.simulated = None, False
+        if self.exchange:
+            await self.exchange.close()
+            self.exchange = None
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+        return False
+
+    async def _call(self, method: str, *args, **kwargs):
+        if not self.exchange:
+            raise ConnectionError("Asenkron borsa istemcisi başlatılmamış.")
+        if self.simulated:
+            # tools.exchange zaten ölçülüyor (metrics.instrument_exchange); simülatörün ağırlık limiti yoktur.
+            async with self.limiter:
+                return await asyncio.to_thread(getattr(self.exchange, method), *args, **kwargs)
+        if config.EXCHANGE_WEIGHT_BUDGET_ENABLED:
+            await weight_budget.acquire_async(endpoint_weight(method, args, kwargs))
+        async with self.limiter:
+            try:
+                with metrics.EXCHANGE_SPAN.time(method=method):
+                    return await getattr(self.exchange, method)(*args, **kwargs)
+            except Exception as e:
+                if config.EXCHANGE_WEIGHT_BUDGET_ENABLED and is_rate_limit_error(e):
+                    weight_budget.record_ban(self.exchange.last_response_headers)
+                raise
+            finally:
+                if config.EXCHANGE_WEIGHT_BUDGET_ENABLED:
+                    weight_budget.update_from_headers(self.exchange.last_response_headers)
+
+    async def fetch_price(self, symbol: str) -> float | None:
+        ticker = await self._call("fetch_ticker", _get_unified_symbol(symbol))
+        return float(ticker["last"]) if ticker and ticker.get("last") is not None else None
+
+    async def fetch_ohlcv(self, symbol: str, timeframe: str, limit: int = 200, since: int | None = None) -> list:
+        return await self._call("fetch_ohlcv", _get_unified_symbol(symbol), timeframe=timeframe, since=since, limit=limit)
+
+    async def fetch_funding_rate(self, symbol: str) -> dict:
+        if self.market_type != 'future':
+            return {"status": "error", "message": "Fonlama oranı sadece vadeli işlemlerde mevcuttur."}
+        unified_symbol = _get_unified_symbol(symbol)
+        try:
+            rate_data = await self._call("fetch_funding_rate", unified_symbol)
+            return {"status": "success", "funding_rate": rate_data.get('fundingRate', 0.0)}
+        except Exception as e:
+            return {"status": "error", "message": f"HATA: {unified_symbol} için fonlama oranı alınamadı: {e}"}
+
+    async def fetch_order_book_depth(self, symbol: str) -> dict:
+        unified_symbol = _get_unified_symbol(symbol)
+        try:
+            order_book = await self._call("fetch_order_book", unified_symbol, limit=20)
+            total_bid_volume_usdt = sum(price * size for price, size in order_book['bids'])
+            total_ask_volume_usdt = sum(price * size for price, size in order_book['asks'])
+            bid_ask_ratio = total_bid_volume_usdt / total_ask_volume_usdt if total_ask_volume_usdt > 0 else float('inf')
+            return {"status": "success", "total_bid_usdt": round(total_bid_volume_usdt, 2), "total_ask_usdt": round(total_ask_volume_usdt, 2), "bid_ask_ratio": round(bid_ask_ratio, 2)}
+        except Exception as e:
+            return {"status": "error", "message": f"HATA: {unified_symbol} için emir defteri alınamadı: {e}"}
+
+    async def fetch_open_positions(self) -> list:
+        if self.market_type != 'future':
+            return []
+        all_positions = await self._call("fetch_positions_risk")
+        return [p for p in all_positions if p.get('contracts') and float(p['contracts']) != 0]
+
+    async def fetch_wallet_balance(self, quote_currency: str = "USDT") -> dict:
+        if self.market_type != 'future':
+            return {"status": "error", "message": "Bu fonksiyon sadece vadeli işlem modunda çalışır."}
+        balance_data = await self._call("fetch_balance")
+        total_balance = balance_data.get(quote_currency, {}).get('total', 0.0) or 0.0
+        return {"status": "success", "balance": float(total_balance)}
+
+    async def fetch_many(self, method: str, symbols: list[str], *args, **kwargs) -> dict:
+        """Aynı metodu birden fazla sembol için eş zamanlı çağırır; hataları sembol bazında döndürür."""
+        results = await asyncio.gather(*(getattr(self, method)(symbol, *args, **kwargs) for symbol in symbols), return_exceptions=True)
+        return dict(zip(symbols, results))
+
+
+class AsyncExchangeRunner:
+    """
+    Senkron kod (arka plan kontrolcüsü, tarayıcı, dashboard) için, asenkron istemciyi kendi
+    olay döngüsünü çalıştıran tek bir arka plan thread'inde barındırır.
+    """
+
+    def __init__(self):
+        self.loop = None
+        self.client = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self.client:
+                return
+            self.loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self.loop.run_forever, name="async-exchange", daemon=True)
+            self._thread.start()
+            client = AsyncExchangeClient()
+            try:
+                asyncio.run_coroutine_threadsafe(client.start(), self.loop).result()
+            except BaseException:
+                # Başlatılamayan istemcinin döngü thread'i durdurulur; sonraki çağrı sıfırdan dener.
+                self._stop_loop()
+                raise
+            self.client = client
+
+    def _stop_loop(self):
+        """Kilit altında çağrılır. Olay döngüsünü ve onu çalıştıran thread'i durdurup döngüyü kapatır."""
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+        self.loop, self._thread = None, None
+
+    def run(self, coro_factory, timeout: float | None = None):
+        """`coro_factory(client)` ile üretilen coroutine'i arka plan döngüsünde çalıştırıp sonucunu bekler."""
+        self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(coro_factory(self.client), self.loop).result(timeout)
+
+    def shutdown(self):
+        with self._lock:
+            if not self.client:
+                return
+            asyncio.run_coroutine_threadsafe(self.client.close(), self.loop).result()
+            self._stop_loop()
+            self.client = None
+
+
+async_runner = AsyncExchangeRunner()
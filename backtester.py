@@ -0,0 +1,297 @@
+# backtester.py
+# @author: Memba Co.
+"""
+Pozisyon çıkış kurallarını (ATR tabanlı SL, RR tabanlı TP, trailing stop ve kısmi kâr alma) geçmiş mumlar
+üzerinde yeniden oynatan NumPy tabanlı geriye dönük test motoru.
+
+Kurallar `core.open_new_position` ve `core._manage_position` ile aynıdır ve her mum kapanışı, pozisyon
+kontrolcüsünün bir turuna karşılık gelir; tests/test_backtester.py bu kuralların mum mum çalışan bir kopyasıyla
+aynı işlemleri ürettiğini doğrular. Pozisyon başına durum (trailing SL) kümülatif maksimum ile vektörel olarak
+hesaplanır; Python döngüsü mum başına değil işlem başına döner. Çıktı, `trade_history` tablosuyla aynı
+sütunlara sahip işlem listesidir.
+
+Sınırlama: Sadece mum kapanışları kullanılır, mumun en yüksek/en düşük değerleri yok sayılır. Canlıda ise borsadaki
+STOP_MARKET / TAKE_PROFIT_MARKET emirleri mum içinde tetiklenir; bu yüzden gerçek çıkışlar daha erken ve farklı
+fiyatlardan gerçekleşebilir (örn: kapanışta geri dönen bir iğne canlıda SL'i tetikler, testte tetiklemez).
+
+Örnek:
+    python backtester.py --csv data/BTCUSDT_1m.csv --symbol BTC/USDT --timeframe 15m --every 96 --side alternate --output trades.csv
+    python backtester.py --symbol BTC/USDT --timeframe 15m --sync-days 365 --output trades.json  # mum deposundan
+"""
+
+import csv
+import json
+import math
+import argparse
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import config
+from market_data import timeframe_to_ms, candle_store
+
+TRADE_HISTORY_COLUMNS = ("id", "symbol", "side", "amount", "entry_price", "close_price", "pnl", "status", "opened_at", "closed_at", "cumulative_pnl")
+# Çıkış araması küçük bir pencereyle başlar ve her adımda pencere iki katına çıkar (kısa işlemler için ucuz,
+# uzun işlemler için az sayıda NumPy çağrısı).
+_SCAN_CHUNK_START = 64
+_SCAN_CHUNK_MAX = 65536
+
+
+@dataclass
+class BacktestSettings:
+    """Geriye dönük testte kullanılan strateji ayarları; varsayılanlar config.py'den okunur."""
+    atr_multiplier_sl: float = config.ATR_MULTIPLIER_SL
+    risk_reward_ratio_tp: float = config.RISK_REWARD_RATIO_TP
+    use_trailing_stop_loss: bool = config.USE_TRAILING_STOP_LOSS
+    trailing_stop_activation_percent: float = config.TRAILING_STOP_ACTIVATION_PERCENT
+    use_partial_tp: bool = config.USE_PARTIAL_TP
+    partial_tp_target_rr: float = config.PARTIAL_TP_TARGET_RR
+    partial_tp_close_percent: float = config.PARTIAL_TP_CLOSE_PERCENT
+    risk_per_trade_percent: float = config.RISK_PER_TRADE_PERCENT
+    start_balance: float = 10_000.0
+    atr_length: int = 14
+
+
+def load_ohlcv_csv(path: str) -> np.ndarray:
+    """`timestamp,open,high,low,close,volume` sütunlu CSV dosyasını (N, 6) boyutlu bir diziye yükler."""
+    data = pd.read_csv(path, header=None, usecols=range(6))
+    data = data[pd.to_numeric(data[0], errors="coerce").notna()].astype(np.float64)
+    return data.to_numpy()
+
+
+def load_from_store(symbol: str, timeframe: str, sync_days: float = 0) -> np.ndarray:
+    """
+    Mumları diskteki mum deposundan okur. `sync_days` verilirse önce borsaya bağlanılıp depo bu kadar
+    gün geriye doldurulur ve güncel ana kadar eşitlenir.
+    """
+    if sync_days:
+        import tools
+        tools.initialize_exchange(config.DEFAULT_MARKET_TYPE)
+        since_ms = tools.exchange.milliseconds() - int(sync_days * 86_400_000)
+        candle_store.backfill(tools.exchange, symbol, timeframe, since_ms)
+        candle_store.get_ohlcv(tools.exchange, symbol, timeframe, limit=2)
+    return np.array(candle_store.read(symbol, timeframe))
+
+
+def resample_ohlcv(bars: np.ndarray, timeframe: str) -> np.ndarray:
+    """Daha küçük zaman aralıklı mumları (örn: 1m) `timeframe` aralığına birleştirir."""
+    tf_ms = timeframe_to_ms(timeframe)
+    if len(bars) == 0:
+        return bars
+    groups = bars[:, 0].astype(np.int64) // tf_ms
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    ends = np.r_[starts[1:], len(bars)]
+    return np.column_stack([
+        groups[starts] * tf_ms,
+        bars[starts, 1],
+        np.maximum.reduceat(bars[:, 2], starts),
+        np.minimum.reduceat(bars[:, 3], starts),
+        bars[ends - 1, 4],
+        np.add.reduceat(bars[:, 5], starts),
+    ]).astype(np.float64)
+
+
+def compute_atr(bars: np.ndarray, length: int = 14) -> np.ndarray:
+    """pandas-ta `atr()` (Wilder/rma) ile aynı ATR serisini döndürür; ısınma dönemi NaN'dır."""
+    high, low, close = bars[:, 2], bars[:, 3], bars[:, 4]
+    prev_close = np.r_[np.nan, close[:-1]]
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(prev_close - low)))
+    true_range[0] = np.nan
+    return pd.Series(true_range).ewm(alpha=1.0 / length, adjust=True, min_periods=length).mean().to_numpy()
+
+
+def periodic_signals(length: int, every: int, side: str = "alternate", offset: int = 0) -> np.ndarray:
+    """Her `every` mumda bir giriş sinyali üretir (1: AL, -1: SAT, 0: sinyal yok)."""
+    signals = np.zeros(length, dtype=np.int8)
+    indices = np.arange(offset, length, max(1, every))
+    if side == "buy":
+        signals[indices] = 1
+    elif side == "sell":
+        signals[indices] = -1
+    else:
+        signals[indices] = np.where(np.arange(len(indices)) % 2 == 0, 1, -1)
+    return signals
+
+
+def load_signals_csv(path: str, timestamps: np.ndarray) -> np.ndarray:
+    """`timestamp,side` (side: AL/SAT veya buy/sell) satırlarını mum dizisine hizalanmış sinyallere çevirir."""
+    signals = np.zeros(len(timestamps), dtype=np.int8)
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            if len(row) < 2 or not row[0].strip().isdigit():
+                continue
+            index = int(np.searchsorted(timestamps, int(row[0]), side="right")) - 1
+            if index >= 0:
+                signals[index] = 1 if row[1].strip().upper() in ("AL", "BUY", "LONG", "1") else -1
+    return signals
+
+
+def _calculate_pnl(side: str, entry_price: float, close_price: float, amount: float) -> float:
+    # tools.calculate_pnl ile aynı formül (borsa bağımlılıklarını yüklememek için burada tekrarlanır).
+    return (close_price - entry_price) * amount if side == "buy" else (entry_price - close_price) * amount
+
+
+def _scan_exit(signed: np.ndarray, start: int, stop_level: float, take_profit: float, partial_level: float | None,
+               activation: float | None, trail_factor: float) -> tuple[int, str]:
+    """
+    `start` indeksinden itibaren ilk çıkış olayını bulur: ('PARTIAL' | 'SL' | 'TP', indeks) veya ('', -1).
+    Fiyatlar yöne göre işaretlidir (long: +p, short: -p); böylece tek bir "yukarı iyi" mantığı iki yönü de kapsar.
+    Tur başındaki SL, önceki turlarda trailing ile yükseltilmiş değerdir (_manage_position'daki gibi
+    aynı turda güncellenen SL, ancak bir sonraki turda kontrol edilir).
+    """
+    carry = -math.inf
+    chunk_start, chunk_size = start, _SCAN_CHUNK_START
+    while chunk_start < len(signed):
+        prices = signed[chunk_start:chunk_start + chunk_size]
+        if activation is not None:
+            candidates = np.where(prices > activation, prices * trail_factor, -math.inf)
+            running = np.maximum.accumulate(np.maximum(candidates, carry))
+            effective_sl = np.maximum(stop_level, np.r_[carry, running[:-1]])
+            carry = running[-1]
+        else:
+            effective_sl = np.full(len(prices), stop_level)
+
+        exit_mask = (prices <= effective_sl) | (prices >= take_profit)
+        exit_at = int(np.argmax(exit_mask)) if exit_mask.any() else None
+        if partial_level is not None:
+            partial_mask = prices >= partial_level
+            partial_at = int(np.argmax(partial_mask)) if partial_mask.any() else None
+            # Kısmi TP kontrolü turda ilk sırada çalışır ve tetiklenirse o tur başka kural işlenmez.
+            if partial_at is not None and (exit_at is None or partial_at <= exit_at):
+                return chunk_start + partial_at, "PARTIAL"
+        if exit_at is not None:
+            return chunk_start + exit_at, "SL" if prices[exit_at] <= effective_sl[exit_at] else "TP"
+        chunk_start += len(prices)
+        chunk_size = min(chunk_size * 2, _SCAN_CHUNK_MAX)
+    return -1, ""
+
+
+def _format_time(timestamp_ms: float) -> str:
+    return datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def run_backtest(symbol: str, bars: np.ndarray, signals: np.ndarray, settings: BacktestSettings | None = None) -> list[dict]:
+    """
+    `signals` dizisindeki girişleri (1: AL, -1: SAT) sembol başına tek açık pozisyon kuralıyla işler.
+    Giriş, sinyal mumunun kapanışından yapılır; pozisyon açıkken gelen sinyaller yok sayılır.
+    Veri bittiğinde açık kalan pozisyon son kapanıştan 'BACKTEST_END' durumuyla kapatılır.
+    """
+    settings = settings or BacktestSettings()
+    timestamps, close = bars[:, 0], bars[:, 4]
+    atr = compute_atr(bars, settings.atr_length)
+    entry_indices = np.flatnonzero((signals != 0) & ~np.isnan(atr) & (atr > 0))
+    trail = settings.trailing_stop_activation_percent / 100
+    signed_close = {1: close, -1: -close}
+
+    trades, balance, cumulative_pnl = [], settings.start_balance, 0.0
+    next_allowed = 0
+    for entry_index in entry_indices:
+        if entry_index < next_allowed or entry_index >= len(close) - 1:
+            continue
+        direction = int(signals[entry_index])
+        side = "buy" if direction > 0 else "sell"
+        entry_price = float(close[entry_index])
+        sl_distance = float(atr[entry_index]) * settings.atr_multiplier_sl
+        stop_loss = entry_price - direction * sl_distance
+        take_profit = entry_price + direction * sl_distance * settings.risk_reward_ratio_tp
+        amount = balance * (settings.risk_per_trade_percent / 100) / sl_distance
+        initial_amount, realized_pnl = amount, 0.0
+
+        signed = signed_close[direction]
+        activation = entry_price * (1 + direction * trail) * direction if settings.use_trailing_stop_loss else None
+        trail_factor = 1 - direction * trail
+        partial_level = None
+        if settings.use_partial_tp:
+            partial_level = (entry_price + direction * abs(entry_price - stop_loss) * settings.partial_tp_target_rr) * direction
+
+        exit_index, status = _scan_exit(signed, entry_index + 1, stop_loss * direction, take_profit * direction, partial_level, activation, trail_factor)
+        if status == "PARTIAL":
+            partial_price = float(close[exit_index])
+            close_amount = amount * (settings.partial_tp_close_percent / 100)
+            realized_pnl = abs(partial_price - entry_price) * close_amount
+            amount -= close_amount
+            # Kısmi TP sonrası SL giriş fiyatına çekilir; trailing bu seviyeden itibaren yeniden yükselir.
+            exit_index, status = _scan_exit(signed, exit_index + 1, entry_price * direction, take_profit * direction, None, activation, trail_factor)
+        if exit_index < 0:
+            exit_index, status = len(close) - 1, "BACKTEST_END"
+
+        close_price = float(close[exit_index])
+        pnl = realized_pnl + _calculate_pnl(side, entry_price, close_price, amount)
+        balance += pnl
+        cumulative_pnl += pnl
+        trades.append({
+            "id": len(trades) + 1, "symbol": symbol, "side": side, "amount": initial_amount,
+            "entry_price": entry_price, "close_price": close_price, "pnl": pnl, "status": status,
+            "opened_at": _format_time(timestamps[entry_index]), "closed_at": _format_time(timestamps[exit_index]),
+            "cumulative_pnl": cumulative_pnl,
+        })
+        next_allowed = exit_index + 1
+    return trades
+
+
+def summarize(trades: list[dict], start_balance: float) -> dict:
+    """İşlem listesinden dashboard istatistikleriyle aynı özet değerleri ve maksimum düşüşü hesaplar."""
+    pnl = np.array([t["pnl"] for t in trades], dtype=np.float64)
+    equity = start_balance + np.cumsum(pnl) if len(pnl) else np.array([start_balance])
+    peaks = np.maximum.accumulate(np.r_[start_balance, equity])
+    drawdowns = (peaks[1:] - equity) / peaks[1:] if len(pnl) else np.zeros(1)
+    statuses = {status: sum(1 for t in trades if t["status"] == status) for status in sorted({t["status"] for t in trades})}
+    return {
+        "total_trades": len(trades),
+        "winning_trades": int((pnl > 0).sum()),
+        "win_rate": round(float((pnl > 0).mean() * 100), 2) if len(pnl) else 0.0,
+        "total_pnl": round(float(pnl.sum()), 2),
+        "final_balance": round(float(equity[-1]), 2),
+        "max_drawdown_percent": round(float(drawdowns.max() * 100), 2),
+        "exit_statuses": statuses,
+    }
+
+
+def write_trades(trades: list[dict], path: str):
+    """İşlemleri `trade_history` sütun sırasıyla CSV veya JSON (uzantıya göre) olarak yazar."""
+    if path.lower().endswith(".json"):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(trades, f, indent=2)
+        return
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=TRADE_HISTORY_COLUMNS)
+        writer.writeheader()
+        writer.writerows(trades)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SL/TP, trailing ve kısmi TP kurallarını geçmiş mumlar üzerinde test eder.")
+    parser.add_argument("--csv", help="timestamp,open,high,low,close,volume sütunlu mum dosyası; verilmezse mum deposu kullanılır")
+    parser.add_argument("--symbol", default="BTC/USDT")
+    parser.add_argument("--timeframe", help="CSV mumları bu aralığa birleştirilir (örn: 15m); mum deposu için zorunludur")
+    parser.add_argument("--sync-days", type=float, default=0, help="Mum deposunu önce borsadan bu kadar gün geriye doldurur")
+    parser.add_argument("--signals", help="timestamp,side satırlarından oluşan giriş sinyali dosyası")
+    parser.add_argument("--every", type=int, default=96, help="Sinyal dosyası yoksa her N mumda bir giriş yapılır")
+    parser.add_argument("--side", choices=("buy", "sell", "alternate"), default="alternate")
+    parser.add_argument("--start-balance", type=float, default=10_000.0)
+    parser.add_argument("--output", help="İşlem listesinin yazılacağı .csv veya .json dosyası")
+    args = parser.parse_args(argv)
+    if not args.csv and not args.timeframe:
+        parser.error("Mum deposundan okumak için --timeframe gerekli")
+
+    if args.csv:
+        bars = load_ohlcv_csv(args.csv)
+        if args.timeframe:
+            bars = resample_ohlcv(bars, args.timeframe)
+    else:
+        bars = load_from_store(args.symbol, args.timeframe, args.sync_days)
+    if len(bars) == 0:
+        parser.error("Test edilecek mum verisi bulunamadı")
+    signals = load_signals_csv(args.signals, bars[:, 0]) if args.signals else periodic_signals(len(bars), args.every, args.side)
+
+    settings = BacktestSettings(start_balance=args.start_balance)
+    trades = run_backtest(args.symbol, bars, signals, settings)
+    if args.output:
+        write_trades(trades, args.output)
+    print(json.dumps({"symbol": args.symbol, "bars": len(bars), "settings": asdict(settings), "summary": summarize(trades, settings.start_balance)}, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+# benchmark.py
+# @author: Memba Co.
+"""
+Analiz, proaktif tarama, pozisyon kontrolü ve dashboard yayını yollarını uçtan uca ölçen performans testi.
+
+Tüm senaryolar süreç içi borsa simülatörüne (exchange_simulator.py) ve gecikmesi ayarlanabilen sahte bir
+LLM'e karşı, geçici bir veritabanı üzerinde çalışır; gerçek borsaya, LLM'e veya Telegram'a istek gitmez.
+Her senaryo için p50/p95 gecikme, dakikadaki sembol (işlem) sayısı, işlem başına borsa/LLM çağrısı ve
+tepe bellek kullanımı raporlanır, sonuçlar sürümler arası karşılaştırma için JSON olarak yazılır.
+
+Örnek:
+    python benchmark.py --iterations 30 --llm-latency-ms 800 --exchange-latency-ms 40 --output bench.json
+    python benchmark.py --baseline bench_2.2.0.json
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import tempfile
+import threading
+import statistics
+import subprocess
+import tracemalloc
+from types import SimpleNamespace
+from collections import Counter
+from datetime import datetime, timezone
+
+SCENARIOS = ("analysis", "scan", "position_check", "dashboard_emit")
+_BATCH_SYMBOL_PATTERN = re.compile(r"^### SEMBOL: (\S+)$", re.MULTILINE)
+
+
+class FakeLLM:
+    """
+    `ChatGoogleGenerativeAI` yerine geçen sahte model. Her çağrıda `latency_ms` kadar bekler ve istemin
+    biçimine uygun (tekil nesne veya toplu dizi), istemden türetilmiş deterministik bir JSON karar döndürür.
+    """
+    latency_ms = 0.0
+    calls = 0
+    _lock = threading.Lock()
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    @staticmethod
+    def _decision(key: str) -> dict:
+        recommendation = ("AL", "SAT", "BEKLE")[random.Random(key).randrange(3)]
+        return {"recommendation": recommendation, "reason": "Performans testi için sahte LLM kararı."}
+
+    def invoke(self, prompt: str):
+        with FakeLLM._lock:
+            FakeLLM.calls += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        symbols = _BATCH_SYMBOL_PATTERN.findall(prompt)
+        if symbols:
+            payload = [dict(self._decision(symbol), symbol=symbol) for symbol in symbols]
+        else:
+            payload = self._decision(prompt)
+        return SimpleNamespace(content=f"```json\n{json.dumps(payload, ensure_ascii=False)}\n```")
+
+
+def _percentile(values: list[float], percent: int) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                               capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class BenchmarkRunner:
+    """Ortamı hazırlar, senaryoları çalıştırır ve ölçümleri toplar."""
+
+    def __init__(self, args):
+        self.args = args
+        self.workdir = tempfile.mkdtemp(prefix="memba-bench-")
+        self._setup_environment()
+        self.payload_bytes = []
+
+    def _setup_environment(self):
+        args = self.args
+        # Simülatör, gerçek istemcinin seçildiği yol (tools.initialize_exchange) üzerinden devreye alınır.
+        # Saat gerçek zamandan başlatılır; önbelleklerin kullandığı duvar saati ile simülasyon saati uyumlu kalır.
+        os.environ.update({
+            "USE_EXCHANGE_SIMULATOR": "true",
+            "SIMULATOR_SEED": str(args.seed),
+            "SIMULATOR_LATENCY_MS": str(args.exchange_latency_ms),
+            "SIMULATOR_LATENCY_JITTER_MS": str(args.exchange_jitter_ms),
+            "SIMULATOR_ERROR_RATE": str(args.exchange_error_rate),
+            "SIMULATOR_START_TIME": "",
+            "SIMULATOR_SPEED": "1",
+        })
+        os.environ.pop("CRYPTOPANIC_API_KEY", None)
+
+        import config
+        import database
+        import market_data
+        import tools
+        import core
+        from throttling import RateLimiter
+
+        logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+
+        config.TELEGRAM_ENABLED = False
+        config.USE_NEWS_ANALYSIS = False
+        config.DEFAULT_MARKET_TYPE = "future"
+        # Hazırlık adımında açılan pozisyonların borsada hemen oluşması için giriş emirleri piyasa emri olarak gönderilir.
+        config.DEFAULT_ORDER_TYPE = "MARKET"
+        if args.no_cache:
+            config.LLM_DECISION_CACHE_ENABLED = False
+            config.OHLCV_CACHE_ENABLED = False
+            config.TICKER_SNAPSHOT_ENABLED = False
+            config.FUNDING_CACHE_ENABLED = False
+            config.OHLCV_STORE_ENABLED = False
+
+        database.DB_FILE = os.path.join(self.workdir, "benchmark.db")
+        market_data.candle_store.root = os.path.join(self.workdir, "candles")
+        database.init_db()
+
+        tools.initialize_exchange("future")
+        FakeLLM.latency_ms = args.llm_latency_ms
+        core._create_llm = FakeLLM
+        if not args.respect_rate_limits:
+            core.scan_rate_limiter = RateLimiter(0)
+
+        self.config, self.database, self.tools, self.core = config, database, tools, core
+        self.exchange = tools.exchange
+        self.symbols = self.exchange.symbols[:args.symbols] if args.symbols else list(self.exchange.symbols)
+
+    # --- Ölçüm ---
+    def measure(self, name: str, run, prepare=None, unit: str = "symbol") -> dict:
+        """`run()` işlenen birim (sembol) sayısını döndürür; `prepare()` ölçüm dışında kalan hazırlık adımıdır."""
+        args = self.args
+        for _ in range(args.warmup):
+            if prepare: prepare()
+            run()
+
+        latencies, units, llm_calls = [], 0, 0
+        exchange_calls = Counter()
+        for _ in range(args.iterations):
+            if prepare: prepare()
+            self.exchange.reset_call_counts()
+            llm_before = FakeLLM.calls
+            started = time.perf_counter()
+            units += run()
+            latencies.append(time.perf_counter() - started)
+            llm_calls += FakeLLM.calls - llm_before
+            exchange_calls.update(self.exchange.call_counts)
+
+        # Bellek izleme çalışmayı yavaşlattığından tepe bellek, gecikme ölçümüne katılmayan ayrı bir turda alınır.
+        peak_kib = None
+        if not args.no_memory:
+            if prepare: prepare()
+            tracemalloc.start()
+            try:
+                run()
+                peak_kib = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+            finally:
+                tracemalloc.stop()
+
+        total_seconds = sum(latencies)
+        result = {
+            "iterations": args.iterations,
+            "unit": unit,
+            "units_processed": units,
+            "latency_ms": {
+                "p50": round(_percentile(latencies, 50) * 1000, 2),
+                "p95": round(_percentile(latencies, 95) * 1000, 2),
+                "mean": round(statistics.fmean(latencies) * 1000, 2),
+                "max": round(max(latencies) * 1000, 2),
+            },
+            "throughput_per_min": round(units / total_seconds * 60, 2) if total_seconds > 0 else None,
+            "exchange_calls_per_op": round(sum(exchange_calls.values()) / args.iterations, 2),
+            "exchange_calls_by_method": {method: round(count / args.iterations, 2) for method, count in sorted(exchange_calls.items())},
+            "llm_calls_per_op": round(llm_calls / args.iterations, 2),
+            "peak_memory_kib": peak_kib,
+        }
+        logging.warning(f"BENCHMARK: '{name}' tamamlandı: p50={result['latency_ms']['p50']}ms, p95={result['latency_ms']['p95']}ms")
+        return result
+
+    def _clear_positions(self):
+        for position in self.database.get_all_positions():
+            self.core.close_position_by_symbol(position["symbol"], "BENCHMARK")
+
+    # --- Senaryolar ---
+    def bench_analysis(self) -> dict:
+        symbols = iter(self.symbols * (self.args.iterations + self.args.warmup + 1))
+        entry_tf = self.config.PROACTIVE_SCAN_ENTRY_TIMEFRAME
+
+        def run():
+            result = self.core.perform_analysis(next(symbols), entry_tf)
+            if result.get("status") != "success":
+                logging.warning(f"BENCHMARK: Analiz başarısız: {result.get('message')}")
+            return 1
+        return self.measure("analysis", run)
+
+    def bench_scan(self) -> dict:
+        self._clear_positions()
+        processed = Counter()
+        original_process = self.core._process_candidate
+
+        def counting_process(symbol, *rest):
+            processed["candidates"] += 1
+            return original_process(symbol, *rest)
+
+        def run():
+            processed.clear()
+            # Fırsatlar sadece sayılır; tarama sırasında pozisyon açılmaz.
+            self.core.run_proactive_scanner(lambda opportunity: None, lambda message: None)
+            return processed["candidates"]
+
+        self.core._process_candidate = counting_process
+        try:
+            return self.measure("scan", run)
+        finally:
+            self.core._process_candidate = original_process
+
+    def _top_up_positions(self, target: int):
+        """Kapanan pozisyonların yerine yenilerini açarak yönetilen pozisyon sayısını sabit tutar."""
+        open_symbols = {p["symbol"] for p in self.database.get_all_positions()}
+        for index, symbol in enumerate(s for s in self.symbols if s not in open_symbols):
+            if len(open_symbols) >= target:
+                break
+            price = self.tools._fetch_price_natively(symbol)
+            result = self.core.open_new_position("AL" if index % 2 == 0 else "SAT", symbol, price, self.config.PROACTIVE_SCAN_ENTRY_TIMEFRAME)
+            if result.get("status") == "success":
+                open_symbols.add(symbol)
+            else:
+                logging.warning(f"BENCHMARK: {symbol} için pozisyon açılamadı: {result.get('message')}")
+
+    def bench_position_check(self) -> dict:
+        target = min(self.args.positions, len(self.symbols))
+        self.config.MAX_CONCURRENT_TRADES = max(self.config.MAX_CONCURRENT_TRADES, target)
+        managed = Counter()
+
+        def prepare():
+            self._top_up_positions(target)
+            # Fiyatların hareket etmesi için simülasyon saati her turda ileri alınır (SL/TP/trailing tetiklenebilir).
+            self.exchange.advance(self.args.advance_seconds)
+            managed["positions"] = self.database.count_positions()
+
+        def run():
+            self.core.check_and_manage_positions()
+            return managed["positions"]
+        return self.measure("position_check", run, prepare)
+
+    def bench_dashboard_emit(self) -> dict | None:
+        try:
+            from dashboard import app as dashboard_app
+        except ImportError as e:
+            logging.warning(f"BENCHMARK: Dashboard bağımlılıkları yüklenemedi, senaryo atlanıyor: {e}")
+            return None
+        dashboard_app.DATABASE_PATH = self.database.DB_FILE
+
+        def capture_emit(event, data=None, **kwargs):
+            self.payload_bytes.append(len(json.dumps(data, default=str)))
+        dashboard_app.socketio.emit = capture_emit
+
+        for index in range(self.args.history_trades):
+            self._log_fake_trade(index)
+        self._top_up_positions(min(self.args.positions, len(self.symbols)))
+        dashboard_app.emit_dashboard_data()
+        counter = iter(range(self.args.history_trades, sys.maxsize))
+
+        def prepare():
+            # Her turda yeni bir kapanmış işlem eklenir; böylece yayın boş olmayan bir delta içerir.
+            self._log_fake_trade(next(counter))
+            self.exchange.advance(self.args.advance_seconds)
+
+        def run():
+            dashboard_app.emit_dashboard_data()
+            return 1
+
+        self.payload_bytes.clear()
+        result = self.measure("dashboard_emit", run, prepare, unit="emit")
+        if self.payload_bytes:
+            result["payload_bytes_mean"] = round(statistics.fmean(self.payload_bytes), 1)
+        return result
+
+    def _log_fake_trade(self, index: int):
+        symbol = self.symbols[index % len(self.symbols)]
+        entry = 100.0 + index % 7
+        position = {"symbol": symbol, "side": "buy" if index % 2 == 0 else "sell", "initial_amount": 1.0, "amount": 1.0,
+                    "entry_price": entry, "created_at": None, "realized_pnl": 0.0}
+        self.database.log_trade_to_history(position, entry * (1.01 if index % 3 else 0.99), "BENCHMARK")
+
+    def run(self) -> dict:
+        scenarios = {}
+        for name in self.args.scenarios:
+            result = getattr(self, f"bench_{name}")()
+            if result is not None:
+                scenarios[name] = result
+        self._clear_positions()
+        self.database.close_all_connections()
+        return {
+            "app_version": self.config.APP_VERSION,
+            "git_commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parameters": {key: value for key, value in vars(self.args).items() if key not in ("output", "baseline", "verbose")},
+            "scenarios": scenarios,
+        }
+
+
+def _print_report(results: dict, baseline: dict | None):
+    print(f"\nMemba Bot performans testi - v{results['app_version']} ({results['git_commit'] or 'git yok'})")
+    header = f"{'Senaryo':<16}{'p50 ms':>10}{'p95 ms':>10}{'birim/dk':>12}{'borsa/işlem':>13}{'llm/işlem':>11}{'bellek KiB':>12}"
+    print(header)
+    print("-" * len(header))
+    for name, result in results["scenarios"].items():
+        print(f"{name:<16}{result['latency_ms']['p50']:>10}{result['latency_ms']['p95']:>10}{str(result['throughput_per_min']):>12}"
+              f"{result['exchange_calls_per_op']:>13}{result['llm_calls_per_op']:>11}{str(result['peak_memory_kib']):>12}")
+        previous = (baseline or {}).get("scenarios", {}).get(name)
+        if previous:
+            changes = []
+            for key in ("p50", "p95"):
+                old, new = previous["latency_ms"][key], result["latency_ms"][key]
+                if old:
+                    changes.append(f"{key} {(new - old) / old * 100:+.1f}%")
+            print(f"{'':<16}karşılaştırma ({baseline.get('app_version')}/{baseline.get('git_commit')}): {', '.join(changes)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memba Bot uçtan uca performans testi (simüle borsa + sahte LLM).")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--iterations", type=int, default=20, help="Senaryo başına ölçülen tur sayısı")
+    parser.add_argument("--warmup", type=int, default=2, help="Ölçüme katılmayan ısınma turu sayısı")
+    parser.add_argument("--symbols", type=int, default=0, help="Kullanılacak simülatör sembolü sayısı (0: tümü)")
+    parser.add_argument("--positions", type=int, default=5, help="Pozisyon kontrolü ve dashboard için açık tutulacak pozisyon sayısı")
+    parser.add_argument("--history-trades", type=int, default=500, help="Dashboard senaryosu öncesi yazılacak geçmiş işlem sayısı")
+    parser.add_argument("--advance-seconds", type=float, default=60.0, help="Turlar arasında simülasyon saatinin ilerletileceği süre")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--exchange-latency-ms", type=float, default=0.0)
+    parser.add_argument("--exchange-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--exchange-error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-cache", action="store_true", help="LLM karar ve piyasa verisi önbelleklerini kapatır")
+    parser.add_argument("--no-memory", action="store_true", help="Tepe bellek ölçüm turunu atlar")
+    parser.add_argument("--respect-rate-limits", action="store_true", help="Tarama hız sınırını (config) devre dışı bırakmaz")
+    parser.add_argument("--output", default="benchmark_results.json", help="Sonuçların yazılacağı JSON dosyası")
+    parser.add_argument("--baseline", help="Karşılaştırma için önceki bir sonuç dosyası")
+    parser.add_argument("--verbose", action="store_true", help="Uygulama loglarını INFO seviyesinde gösterir")
+    args = parser.parse_args(argv)
+    if args.iterations < 1:
+        parser.error("--iterations en az 1 olmalı")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results = BenchmarkRunner(args).run()
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    _print_report(results, baseline)
+    print(f"\nSonuçlar '{args.output}' dosyasına yazıldı.")
+
+
+if __name__ == "__main__":
+    main()
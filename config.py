@@ -12,10 +12,26 @@ GEMINI_MODEL = 'gemini-1.5-flash' # veya kullandığınız diğer model
 AGENT_CLOSE_AUTO_CONFIRM = False
 # Ajanın bir görevi tamamlarken yapabileceği maksimum adım sayısı.
 AGENT_MAX_ITERATIONS = 8
+# Pozisyon yeniden analiz modu: "prefetch" tüm verileri önceden eş zamanlı toplayıp tek bir LLM çağrısı yapar,
+# "agent" ReAct ajanını kullanır. "prefetch" başarısız olursa ajana geri dönülür.
+REANALYSIS_MODE = "prefetch"
 
 # === STRATEJİ AYARLARI ===
 USE_MTA_ANALYSIS = True
 MTA_TREND_TIMEFRAME = "4h"
+# Analiz sırasında paralel yürütülen veri toplama adımlarının (fiyat, indikatörler, fonlama, emir defteri, haber)
+# her biri için beklenecek maksimum süre (saniye). Süresi dolan isteğe bağlı adımlar 'N/A' olarak geçilir.
+ANALYSIS_STEP_TIMEOUT_SECONDS = 20
+
+# === LLM KARAR ÖNBELLEĞİ ===
+# Göstergeleri ve duyarlılık verileri neredeyse değişmemiş bir sembol için önceki LLM kararı yeniden kullanılır.
+# Kayıtlar TTL dolduğunda veya giriş zaman aralığında yeni bir mum kapandığında geçersiz olur.
+LLM_DECISION_CACHE_ENABLED = True
+LLM_DECISION_CACHE_TTL_SECONDS = 900
+# RSI, Stochastic ve ADX için kuantizasyon adımı (gösterge birimi cinsinden).
+LLM_DECISION_CACHE_OSCILLATOR_STEP = 2.0
+# Bollinger ve MACD gibi fiyat ölçekli göstergeler için kuantizasyon adımı (anlık fiyatın yüzdesi).
+LLM_DECISION_CACHE_PRICE_STEP_PERCENT = 0.2
 
 # HABER ANALİZİ AYARI
 USE_NEWS_ANALYSIS = False
@@ -28,6 +44,9 @@ LIVE_TRADING = True
 # === EMİR TÜRÜ VE STRATEJİSİ AYARLARI ===
 DEFAULT_ORDER_TYPE = 'LIMIT'
 USE_AI_LIMIT_PRICE = True
+# True ise vadeli işlemlerde giriş, SL ve TP emirleri toplu emir (batchOrders) uç noktasıyla tek istekte gönderilir.
+# Bir bacak reddedilirse diğerleri geri alınır (emirler iptal edilir, dolan giriş kapatılır).
+USE_BATCH_ORDERS = True
 
 # === TEMEL AYARLAR ===
 DEFAULT_MARKET_TYPE = 'future'
@@ -46,14 +65,107 @@ ATR_MULTIPLIER_SL = 2.0
 RISK_REWARD_RATIO_TP = 2.0 
 USE_TRAILING_STOP_LOSS = True
 TRAILING_STOP_ACTIVATION_PERCENT = 1.5
+# Trailing SL her yeni zirvede botun kendi kontrolünde ilerler; borsadaki SL emri (iptal + yeni emir) ise
+# sadece aradaki fark fiyatın bu yüzdesine ulaştığında ve aynı sembolde bu kadar saniye geçtiyse yenilenir.
+TRAILING_STOP_MIN_STEP_PERCENT = 0.2
+TRAILING_STOP_MIN_UPDATE_SECONDS = 30
 USE_PARTIAL_TP = True 
 PARTIAL_TP_TARGET_RR = 1.0 
 PARTIAL_TP_CLOSE_PERCENT = 50.0 
 
 # === POZİSYON YÖNETİMİ AYARLARI ===
 MAX_CONCURRENT_TRADES = 5
-DATABASE_FILE = "trades.db"
+DATABASE_FILE = "data/trades.db" # Proje kök dizinine göre; WAL (-wal/-shm) dosyaları da aynı dizinde oluşur
+# Bot, Telegram thread'i ve dashboard aynı veritabanını WAL modunda paylaşır. Kilitli veritabanında
+# bir yazma işleminin hata vermeden önce bekleyeceği süre (saniye) ve bağlantı başına önbelleğe alınan hazır ifade sayısı.
+DATABASE_BUSY_TIMEOUT_SECONDS = 10
+DATABASE_STATEMENT_CACHE_SIZE = 128
 POSITION_CHECK_INTERVAL_SECONDS = 120
+# True ise pozisyon tetikleyicileri (SL/TP, trailing, kısmi TP) işaret fiyatı WebSocket akışındaki her
+# güncellemede çalışır; periyodik kontrol ise daha seyrek bir mutabakat (reconciliation) adımına dönüşür.
+POSITION_STREAM_ENABLED = True
+# Akış adresi USE_TESTNET'e göre seçilir ve MARK_PRICE_STREAM_URL ortam değişkeni ile ezilebilir; simülatörde akış kapalıdır.
+POSITION_STREAM_URL = "wss://fstream.binance.com/stream"
+POSITION_STREAM_TESTNET_URL = "wss://stream.binancefuture.com/stream"
+POSITION_STREAM_RECONCILE_INTERVAL_SECONDS = 600
+# Akış aboneliklerinin veritabanındaki pozisyonlarla senkronize edilme sıklığı (saniye).
+POSITION_STREAM_RESYNC_SECONDS = 5
+
+# === PİYASA VERİSİ ÖNBELLEK AYARLARI ===
+# OHLCV mumları (sembol, zaman aralığı) başına bir kez indirilir, sonrasında sadece yeni mumlar çekilir.
+OHLCV_CACHE_ENABLED = True
+# Bellekte tutulacak maksimum seri sayısı. Limit aşıldığında en az kullanılan seri silinir (LRU).
+OHLCV_CACHE_MAX_SERIES = 64
+# Seri başına saklanacak maksimum mum sayısı.
+OHLCV_CACHE_MAX_BARS = 500
+# Bu süre (saniye) içinde tekrarlanan isteklere borsaya gitmeden önbellekten cevap verilir.
+OHLCV_CACHE_REFRESH_SECONDS = 10
+# True ise kapanmış mumlar diskte (sembol ve zaman aralığı başına bir dosya) saklanır; yeniden başlatmalarda
+# ve önbellekten düşen serilerde sadece son kayıttan sonraki eksik aralık borsadan indirilir.
+OHLCV_STORE_ENABLED = True
+OHLCV_STORE_DIR = "data/candles" # Proje kök dizinine göre
+# Eşitleme sırasında tek bir istekte çekilecek mum sayısı.
+OHLCV_STORE_PAGE_SIZE = 1000
+# True ise göstergeler her çağrıda pandas-ta ile baştan hesaplanmak yerine, (sembol, zaman aralığı)
+# başına durum tutan artımlı motor (indicators.py) ile her yeni mumda O(1) maliyetle güncellenir.
+USE_INCREMENTAL_INDICATORS = True
+# Fiyat sorguları, her döngüde tek bir toplu istekle çekilen fiyat görüntüsünden karşılanır.
+# Görüntü bu süreden (saniye) eskiyse yenilenir; görüntüde bulunmayan semboller tek tek sorgulanır.
+TICKER_SNAPSHOT_ENABLED = True
+TICKER_SNAPSHOT_MAX_STALENESS_SECONDS = 5
+# Fonlama oranları tüm semboller için tek istekle çekilir ve bir sonraki fonlama zamanına kadar önbellekte tutulur.
+# Önbellekte bulunmayan bir sembol sorulduğunda toplu yenileme en fazla bu sıklıkla (saniye) tekrarlanır.
+FUNDING_CACHE_ENABLED = True
+FUNDING_CACHE_MIN_REFRESH_SECONDS = 60
+
+# === ASENKRON BORSA İSTEMCİSİ AYARLARI (async_exchange.py) ===
+# Paylaşılan aiohttp oturumu üzerinden aynı anda uçuşta olabilecek maksimum istek sayısı.
+ASYNC_EXCHANGE_MAX_CONCURRENT_REQUESTS = 10
+# Asenkron istemcinin saniyede başlatabileceği maksimum istek sayısı.
+ASYNC_EXCHANGE_REQUESTS_PER_SECOND = 10
+
+# === BORSA İSTEK AĞIRLIĞI BÜTÇESİ (throttling.py) ===
+# True ise gerçek borsaya giden her istek, Binance'in dakikalık ağırlık limitine göre tutulan ortak bir bütçeden düşülür.
+# Bütçe bot ve dashboard süreçleri arasında bir dosya üzerinden paylaşılır ve yanıt başlıklarıyla düzeltilir.
+EXCHANGE_WEIGHT_BUDGET_ENABLED = True
+EXCHANGE_WEIGHT_STATE_FILE = "data/exchange_weight.bin" # Proje kök dizinine göre
+EXCHANGE_WEIGHT_LIMIT_PER_MINUTE = 2400 # Binance USDⓈ-M Futures IP limiti (spot için 6000)
+# Her önceliğin kullanabileceği limit oranı. Bütçe daralınca önce tarama ve dashboard yenileme ('low'),
+# en son pozisyon kontrolü ve kapatma ('high') istekleri bekletilir.
+EXCHANGE_WEIGHT_PRIORITY_SHARES = {"high": 0.95, "normal": 0.8, "low": 0.6}
+# 429/418 yanıtında Retry-After başlığı yoksa tüm isteklerin durdurulacağı süre (saniye).
+EXCHANGE_WEIGHT_BAN_DEFAULT_SECONDS = 60
+
+# === BORSA SİMÜLATÖRÜ AYARLARI (exchange_simulator.py) ===
+# USE_EXCHANGE_SIMULATOR=true ortam değişkeniyle, gerçek Binance yerine süreç içi deterministik simülatör kullanılır.
+# Aşağıdaki değerler aynı isimli ortam değişkenleriyle (örn: SIMULATOR_LATENCY_MS) ezilebilir.
+SIMULATOR_SYMBOLS = ["BTC/USDT", "ETH/USDT", "SOL/USDT", "BNB/USDT", "XRP/USDT", "DOGE/USDT", "ADA/USDT", "AVAX/USDT",
+                     "LINK/USDT", "DOT/USDT", "LTC/USDT", "TRX/USDT", "ATOM/USDT", "NEAR/USDT", "APT/USDT", "ARB/USDT"]
+SIMULATOR_SEED = 42
+SIMULATOR_LATENCY_MS = 0 # Her çağrıya eklenen ortalama gecikme
+SIMULATOR_LATENCY_JITTER_MS = 0 # Gecikmeye eklenen +/- rastgele sapma
+SIMULATOR_ERROR_RATE = 0.0 # Çağrıların ne kadarının (0-1) ağ hatasıyla sonuçlanacağı
+SIMULATOR_START_TIME = "2024-01-01T00:00:00" # Simülasyon saatinin başlangıcı (UTC)
+SIMULATOR_SPEED = 1.0 # Simülasyon saatinin gerçek zamana göre hızı (0: saat sadece advance() ile ilerler)
+SIMULATOR_DATA_DIR = None # <SEMBOL>_1m.csv dosyalarının bulunduğu dizin; dosyası olmayan semboller için sentetik veri üretilir
+SIMULATOR_START_BALANCE = 10000.0
+
+# === BAŞLANGIÇ ZAMANLAMASI ===
+# True ise main.py ve dashboard, başlangıç adımlarının sürelerini ve `python -X importtime` benzeri
+# bir import dökümünü (en yavaş modüller) loglar.
+STARTUP_TIMING_ENABLED = True
+STARTUP_TIMING_TOP_IMPORTS = 15
+
+# === METRİK AYARLARI (metrics.py) ===
+# True ise borsa çağrıları, analiz adımları, LLM çağrıları, veritabanı fonksiyonları ve pozisyon kontrol döngüsü için
+# süre/hata sayaçları tutulur ve dashboard'un /metrics adresinden Prometheus formatında sunulur.
+# METRICS_TOKEN ortam değişkeni tanımlıysa /metrics, "Authorization: Bearer <token>" başlığı ister.
+METRICS_ENABLED = True
+METRICS_DIR = "data/metrics" # Proje kök dizinine göre; main.py süreci metriklerini dashboard'a buradan iletir
+# main.py sürecinin metrik anlık görüntüsünü diske yazma sıklığı (saniye).
+METRICS_SNAPSHOT_INTERVAL_SECONDS = 15
+# /metrics bu süreden (saniye) uzun süredir kazınmıyorsa anlık görüntü yazılmaz.
+METRICS_SNAPSHOT_IDLE_SECONDS = 300
 
 # === TELEGRAM BİLDİRİM AYARLARI ===
 TELEGRAM_ENABLED = True
@@ -61,6 +173,11 @@ TELEGRAM_ENABLED = True
 # === WEB ARAYÜZÜ AYARLARI ===
 # False ise, web arayüzünde proaktif tarama sonucu bulunan fırsatlar için bir onay penceresi çıkar.
 WEB_AUTO_CONFIRM_OPPORTUNITY = False
+# İlk yüklemede ve her "daha fazla" isteğinde gönderilen işlem geçmişi satır sayısı.
+# Tek bir güncellemede bundan fazla yeni işlem varsa istemciler tam görüntüyü yeniden ister.
+WEB_HISTORY_PAGE_SIZE = 50
+# İlk yüklemede gönderilen kümülatif PNL grafiği nokta sayısı (en yeni noktalar).
+WEB_TIMELINE_MAX_POINTS = 1000
 
 # === PROAKTİF TARAMA AYARLARI ===
 PROACTIVE_SCAN_ENABLED = True
@@ -73,4 +190,10 @@ PROACTIVE_SCAN_BLACKLIST = ["SHIB", "PEPE", "MEME"]
 PROACTIVE_SCAN_WHITELIST = ["BTC", "ETH", "SOL"]
 PROACTIVE_SCAN_MTA_ENABLED = True
 PROACTIVE_SCAN_ENTRY_TIMEFRAME = "15m"
-PROACTIVE_SCAN_TREND_TIMEFRAME = "4h"
\ No newline at end of file
+PROACTIVE_SCAN_TREND_TIMEFRAME = "4h"
+# Aynı anda analiz edilecek sembol sayısı (işçi havuzu boyutu). 1, sıralı taramaya eşdeğerdir.
+PROACTIVE_SCAN_WORKERS = 4
+# Tüm işçiler için toplamda dakikada başlatılabilecek maksimum analiz sayısı.
+PROACTIVE_SCAN_MAX_ANALYSES_PER_MINUTE = 20
+# Tarama sırasında tek bir LLM çağrısında birlikte analiz edilecek sembol sayısı. 1, her sembol için ayrı çağrı demektir.
+PROACTIVE_SCAN_LLM_BATCH_SIZE = 10
\ No newline at end of file
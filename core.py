@@ -6,20 +6,102 @@ import json
 import time
 import sys
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.agents import AgentExecutor, create_react_agent
-from langchain import hub
 from dotenv import load_dotenv
 
 import config
 import database
 import tools
+import metrics
 from notifications import send_telegram_message, format_open_position_message, format_close_position_message, format_partial_tp_message
+from throttling import RateLimiter, request_priority, current_priority
+from decision_cache import decision_cache
 
 load_dotenv()
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Aynı pozisyonun akış thread'i ve periyodik kontrolcü tarafından eş zamanlı yönetilmesini önler.
+_position_locks: dict[str, threading.Lock] = {}
+_position_locks_guard = threading.Lock()
+# Borsaya en son gönderilen SL fiyatı ve gönderim zamanı (sembol başına). Trailing SL her yeni zirvede
+# bellekte/veritabanında ilerler; borsadaki emir (iptal + yeni emir) ise `_refresh_exchange_stop` ile seyrek yenilenir.
+_exchange_stops: dict[str, tuple[float, float]] = {}
+
+# Tüm tarama işçileri tarafından paylaşılan analiz hız sınırı (eski sabit `time.sleep(3)` yerine).
+scan_rate_limiter = RateLimiter(config.PROACTIVE_SCAN_MAX_ANALYSES_PER_MINUTE, burst=config.PROACTIVE_SCAN_WORKERS)
+
+# Sıcak yolların süre ve hata metrikleri (metrics.py, dashboard'da /metrics).
+_analysis_span = metrics.Span("analysis", "Sembol analizleri (veri toplama ve karar)")
+_analysis_step_span = metrics.Span("analysis_step", "Analiz veri toplama adımları", ("step",))
+_analysis_step_timeouts = metrics.counter("memba_analysis_step_timeouts_total", "Zaman aşımına uğrayan analiz adımları", ("step",))
+_llm_span = metrics.Span("llm_request", "LLM çağrıları", ("kind",))
+_position_check_span = metrics.Span("position_check", "Periyodik pozisyon kontrol döngüleri")
+_checker_lag = metrics.gauge("memba_position_checker_lag_seconds", "Pozisyon kontrol döngüsünün planlanan başlangıcına göre gecikmesi")
+
+def _collect_position_metrics():
+    yield ("memba_open_positions", "gauge", "Yönetilen açık pozisyon sayısı", {}, database.count_positions())
+
+metrics.registry.register_collector(_collect_position_metrics)
+
+# LangChain Hub'daki "hwchase17/react" isteminin birebir kopyası; her yeniden analizde ağ üzerinden çekilmez.
+REACT_PROMPT_TEMPLATE = """Answer the following questions as best you can. You have access to the following tools:
+
+{tools}
+
+Use the following format:
+
+Question: the input question you must answer
+Thought: you should always think about what to do
+Action: the action to take, should be one of [{tool_names}]
+Action Input: the input to the action
+Observation: the result of the action
+... (this Thought/Action/Action Input/Observation can repeat N times)
+Thought: I now know the final answer
+Final Answer: the final answer to the original input question
+
+Begin!
+
+Question: {input}
+Thought:{agent_scratchpad}"""
+
+# LLM istemcisi ve yeniden analiz ajanı süreç başına bir kez oluşturulup tüm thread'ler tarafından paylaşılır.
+_llm = None
+_agent_executor = None
+_llm_lock = threading.RLock()
+
+def _create_llm():
+    """Gemini sohbet modelini oluşturur. LangChain ağır bir bağımlılık olduğundan ilk LLM çağrısında yüklenir."""
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(model=config.GEMINI_MODEL, temperature=0.1)
+
+def _get_llm():
+    """Paylaşılan LLM istemcisini döndürür; ilk çağrıda oluşturur."""
+    global _llm
+    if _llm is None:
+        with _llm_lock:
+            if _llm is None:
+                _llm = _create_llm()
+    return _llm
+
+def _get_agent_executor():
+    """Yeniden analiz için ReAct ajanını (yerel istem şablonuyla) bir kez oluşturur ve paylaşır."""
+    global _agent_executor
+    if _agent_executor is None:
+        with _llm_lock:
+            if _agent_executor is None:
+                from langchain.agents import AgentExecutor, create_react_agent
+                from langchain_core.prompts import PromptTemplate
+
+                agent_tools = [tools.get_market_price, tools.get_technical_indicators, tools.get_funding_rate, tools.get_order_book_depth, tools.get_latest_news]
+                agent = create_react_agent(llm=_get_llm(), tools=agent_tools, prompt=PromptTemplate.from_template(REACT_PROMPT_TEMPLATE))
+                _agent_executor = AgentExecutor(
+                    agent=agent, tools=agent_tools, verbose=tools.str_to_bool(os.getenv("AGENT_VERBOSE", "True")),
+                    handle_parsing_errors="Lütfen JSON formatında geçerli bir yanıt ver.", max_iterations=config.AGENT_MAX_ITERATIONS
+                )
+    return _agent_executor
+
 def parse_agent_response(response: str) -> dict | None:
     if not response or not isinstance(response, str): return None
     try:
@@ -30,19 +112,22 @@ def parse_agent_response(response: str) -> dict | None:
         logging.error(f"JSON ayrıştırma hatası: {response}. Hata: {e}")
         return None
 
-def create_mta_analysis_prompt(symbol: str, price: float, entry_timeframe: str, entry_indicators: dict, trend_timeframe: str, trend_indicators: dict, market_sentiment: dict, news_data: str) -> str:
+def _format_indicator_text(indicators: dict) -> str:
     def format_indicator(value):
         if value is None:
             return "N/A"
         return f"{value:.4f}"
+    return "\n".join([f"- {key}: {format_indicator(value)}" for key, value in indicators.items()])
 
-    entry_indicator_text = "\n".join([f"- {key}: {format_indicator(value)}" for key, value in entry_indicators.items()])
-    trend_indicator_text = "\n".join([f"- {key}: {format_indicator(value)}" for key, value in trend_indicators.items()])
-    
+def _format_sentiment_text(market_sentiment: dict) -> str:
     funding_rate_text = f"{market_sentiment.get('funding_rate', 'N/A'):.4f}" if isinstance(market_sentiment.get('funding_rate'), (int, float)) else str(market_sentiment.get('funding_rate', 'N/A'))
     bid_ask_ratio_text = f"{market_sentiment.get('bid_ask_ratio', 'N/A'):.2f}" if isinstance(market_sentiment.get('bid_ask_ratio'), (int, float)) else str(market_sentiment.get('bid_ask_ratio', 'N/A'))
-    
-    sentiment_text = f"- Fonlama Oranı: {funding_rate_text}\n- Alış/Satış Oranı: {bid_ask_ratio_text}"
+    return f"- Fonlama Oranı: {funding_rate_text}\n- Alış/Satış Oranı: {bid_ask_ratio_text}"
+
+def create_mta_analysis_prompt(symbol: str, price: float, entry_timeframe: str, entry_indicators: dict, trend_timeframe: str, trend_indicators: dict, market_sentiment: dict, news_data: str) -> str:
+    entry_indicator_text = _format_indicator_text(entry_indicators)
+    trend_indicator_text = _format_indicator_text(trend_indicators)
+    sentiment_text = _format_sentiment_text(market_sentiment)
     news_section = f"### Temel Analiz (Son Haberler)\n{news_data}" if config.USE_NEWS_ANALYSIS else ""
     return f"""
 Sen, teknik, temel ve duyarlılık analizini birleştiren bir piyasa analistisin. Görevin, sunulan verileri analiz ederek net bir ticaret kararı ('AL', 'SAT' veya 'BEKLE') vermektir.
@@ -69,6 +154,43 @@ Sen, teknik, temel ve duyarlılık analizini birleştiren bir piyasa analistisin
 }}
 ```"""
 
+def create_batch_analysis_prompt(entry_timeframe: str, trend_timeframe: str, items: list[dict]) -> str:
+    """Birden fazla sembolün verisini tek bir istemde toplar ve JSON dizi formatında karar ister."""
+    symbol_blocks = []
+    for item in items:
+        news_section = f"#### Temel Analiz (Son Haberler)\n{item['news_data']}\n" if config.USE_NEWS_ANALYSIS else ""
+        symbol_blocks.append(f"""### SEMBOL: {item['symbol']}
+{news_section}#### Piyasa Duyarlılığı
+{_format_sentiment_text(item['market_sentiment'])}
+#### Ana Trend Verileri ({trend_timeframe})
+{_format_indicator_text(item['trend_indicators'])}
+#### Giriş Sinyali Verileri ({entry_timeframe})
+{_format_indicator_text(item['entry_indicators'])}""")
+    symbols_text = ", ".join(item['symbol'] for item in items)
+    data_text = "\n\n".join(symbol_blocks)
+    return f"""
+Sen, teknik, temel ve duyarlılık analizini birleştiren bir piyasa analistisin. Görevin, aşağıdaki {len(items)} sembolün ({symbols_text}) her birini kendi verileriyle BAĞIMSIZ olarak analiz edip her biri için net bir ticaret kararı ('AL', 'SAT' veya 'BEKLE') vermektir.
+## ANALİZ KURALLARI:
+1.  **Eksik Veri:** Eğer bir gösterge değeri "N/A" (Mevcut Değil) ise, bu göstergeyi yorum yapmadan analizine devam et. Kararını mevcut olan diğer verilere dayandır.
+2.  **Haberler:** Olumsuz bir haber (FUD, hack) varsa, diğer tüm sinyaller olumlu olsa bile 'BEKLE'.
+3.  **Piyasa Duyarlılığı:** Fonlama oranı ve alış/satış oranını yorumla.
+4.  **Ana Trend ({trend_timeframe}):** Ana trend yönünü belirle.
+5.  **Giriş Sinyali ({entry_timeframe}):** Ana trend ile uyumlu bir giriş sinyali ara.
+6.  **Sentez:** Tüm verileri birleştirerek kararını ve gerekçeni açıkla. Bir sembolün verilerini başka bir sembolün kararında kullanma.
+## SAĞLANAN VERİLER:
+{data_text}
+## İSTENEN JSON ÇIKTI FORMATI:
+Her sembol için tam olarak bir eleman içeren bir JSON dizisi döndür. `symbol` alanı yukarıdaki sembol adıyla birebir aynı olmalıdır.
+```json
+[
+  {{
+    "symbol": "SEMBOL (örn: BTC/USDT)",
+    "recommendation": "KARARIN (AL, SAT, veya BEKLE)",
+    "reason": "Tüm analizlere dayalı kısa ve net gerekçen."
+  }}
+]
+```"""
+
 def create_reanalysis_prompt(position: dict) -> str:
     return f"""
 Sen, tecrübeli bir pozisyon yöneticisisin. Verilen pozisyonu (`{position['symbol']} {position['side'].upper()}`) mevcut piyasa koşullarına göre yeniden analiz et. Gerekli tüm araçları kullanarak kapsamlı bir değerlendirme yap.
@@ -78,59 +200,236 @@ Analizinin sonucunu, aşağıdaki anahtarları içeren bir JSON nesnesi olarak d
 - `reason`: Kararının arkasındaki tüm adımları ve veri noktalarını içeren detaylı gerekçen.
 """
 
+def create_prefetched_reanalysis_prompt(position: dict, data: dict) -> str:
+    """Önceden toplanmış piyasa verileriyle, araç kullanımı gerektirmeyen tek seferlik yeniden analiz istemi oluşturur."""
+    entry_tf = position['timeframe']
+    current_price = data['current_price']
+    pnl = tools.calculate_pnl(position['side'], position['entry_price'], current_price, position['amount'])
+    news_section = f"### Temel Analiz (Son Haberler)\n{data['news_data']}" if config.USE_NEWS_ANALYSIS else ""
+    return f"""
+Sen, tecrübeli bir pozisyon yöneticisisin. Verilen pozisyonu (`{position['symbol']} {position['side'].upper()}`) aşağıda sağlanan güncel piyasa verilerine göre yeniden analiz et ve pozisyonun tutulup tutulmayacağına karar ver.
+## ANALİZ KURALLARI:
+1.  **Eksik Veri:** Eğer bir gösterge değeri "N/A" (Mevcut Değil) ise, bu göstergeyi yorum yapmadan analizine devam et. Kararını mevcut olan diğer verilere dayandır.
+2.  **Haberler:** Pozisyon yönünü tehdit eden olumsuz bir haber (FUD, hack) varsa 'KAPAT'.
+3.  **Ana Trend ({config.MTA_TREND_TIMEFRAME}):** Ana trendin pozisyon yönünü hâlâ destekleyip desteklemediğini değerlendir.
+4.  **Pozisyon Zaman Dilimi ({entry_tf}):** Pozisyon yönüne karşı güçlü bir dönüş sinyali olup olmadığını değerlendir.
+5.  **Sentez:** Tüm verileri birleştirerek kararını ve gerekçeni açıkla.
+## POZİSYON BİLGİLERİ:
+- Yön: {position['side'].upper()}
+- Giriş Fiyatı: {position['entry_price']}
+- Güncel Fiyat: {current_price}
+- Stop-Loss: {position['stop_loss']}
+- Take-Profit: {position['take_profit']}
+- Kaldıraç: {position.get('leverage', 'N/A')}x
+- Gerçekleşmemiş PNL: {pnl:.2f} USDT
+## SAĞLANAN VERİLER:
+{news_section}
+### Piyasa Duyarlılığı
+{_format_sentiment_text(data['market_sentiment'])}
+### Ana Trend Verileri ({config.MTA_TREND_TIMEFRAME})
+{_format_indicator_text(data['trend_indicators'])}
+### Pozisyon Zaman Dilimi Verileri ({entry_tf})
+{_format_indicator_text(data['entry_indicators'])}
+## İSTENEN JSON ÇIKTI FORMATI:
+```json
+{{
+  "recommendation": "KARARIN (TUT veya KAPAT)",
+  "reason": "Tüm analizlere dayalı kısa ve net gerekçen."
+}}
+```"""
+
+def _run_parallel_steps(unified_symbol: str, steps: dict, timeout: float) -> dict:
+    """
+    Birbirinden bağımsız veri toplama adımlarını paralel çalıştırır ve her adımın süresini loglar.
+    Zaman aşımına uğrayan veya hata veren adımların sonucu None olur; diğer adımlar etkilenmez.
+    """
+    priority = current_priority()
+
+    def timed(name, fn):
+        step_start = time.monotonic()
+        with request_priority(priority), _analysis_step_span.time(step=name):
+            result = fn()
+        return result, time.monotonic() - step_start
+
+    started = time.monotonic()
+    deadline = started + timeout
+    executor = ThreadPoolExecutor(max_workers=len(steps), thread_name_prefix="analysis")
+    futures = {name: executor.submit(timed, name, fn) for name, (_, fn) in steps.items()}
+    results = {}
+    try:
+        for name, future in futures.items():
+            label = steps[name][0]
+            try:
+                results[name], elapsed = future.result(timeout=max(0.0, deadline - time.monotonic()))
+                logging.info(f"[{unified_symbol}] {label}: {elapsed:.2f}s")
+            except FuturesTimeoutError:
+                results[name] = None
+                _analysis_step_timeouts.inc(step=name)
+                logging.warning(f"[{unified_symbol}] {label}: {timeout:.0f}s içinde tamamlanamadı, adım atlanıyor.")
+            except Exception as e:
+                results[name] = None
+                logging.warning(f"[{unified_symbol}] {label}: adım başarısız oldu: {e}")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    logging.info(f"[{unified_symbol}] Veri toplama tamamlandı: {time.monotonic() - started:.2f}s")
+    return results
+
+def _collect_analysis_data(unified_symbol: str, entry_tf: str) -> dict:
+    """Analiz için gereken fiyat, indikatör, duyarlılık ve haber verilerini eş zamanlı toplar."""
+    entry_params_str = str({"symbol": unified_symbol, "timeframe": entry_tf})
+    trend_params_str = str({"symbol": unified_symbol, "timeframe": config.MTA_TREND_TIMEFRAME})
+    steps = {
+        "current_price": ("Fiyat", lambda: tools._fetch_price_natively(unified_symbol)),
+        "entry_indicators": (f"Giriş indikatörleri ({entry_tf})", lambda: tools.get_technical_indicators.invoke(entry_params_str)),
+        "trend_indicators": (f"Trend indikatörleri ({config.MTA_TREND_TIMEFRAME})", lambda: tools.get_technical_indicators.invoke(trend_params_str)),
+        "funding_rate": ("Fonlama oranı", lambda: tools.get_funding_rate.invoke(unified_symbol).get('funding_rate', 'N/A')),
+        "bid_ask_ratio": ("Emir defteri", lambda: tools.get_order_book_depth.invoke(unified_symbol).get('bid_ask_ratio', 'N/A')),
+    }
+    if config.USE_NEWS_ANALYSIS:
+        steps["news_data"] = ("Haberler", lambda: tools.get_latest_news.invoke(unified_symbol))
+
+    results = _run_parallel_steps(unified_symbol, steps, config.ANALYSIS_STEP_TIMEOUT_SECONDS)
+
+    if not results["current_price"]:
+        return {"status": "error", "message": f"[{unified_symbol}] Fiyat alınamadı"}
+    for key, label in (("entry_indicators", "Giriş"), ("trend_indicators", "Trend")):
+        indicators = results[key] or {"message": "zaman aşımı veya bağlantı hatası"}
+        if indicators.get("status") != "success":
+            return {"status": "error", "message": f"[{unified_symbol}] {label} indikatörleri alınamadı: {indicators.get('message')}"}
+
+    return {
+        "status": "success",
+        "current_price": results["current_price"],
+        "entry_indicators": results["entry_indicators"]["data"],
+        "trend_indicators": results["trend_indicators"]["data"],
+        "market_sentiment": {
+            'funding_rate': results["funding_rate"] if results["funding_rate"] is not None else 'N/A',
+            'bid_ask_ratio': results["bid_ask_ratio"] if results["bid_ask_ratio"] is not None else 'N/A',
+        },
+        "news_data": (results["news_data"] or "Haber verisi alınamadı.") if config.USE_NEWS_ANALYSIS else "Haber analizi kapalı.",
+    }
+
+def _invoke_single_llm(unified_symbol: str, entry_tf: str, data: dict) -> dict:
+    """Toplanan verilerle tek sembollük LLM çağrısını yapar ve ayrıştırılmış kararı döndürür."""
+    final_prompt = create_mta_analysis_prompt(unified_symbol, data["current_price"], entry_tf, data["entry_indicators"], config.MTA_TREND_TIMEFRAME, data["trend_indicators"], data["market_sentiment"], data["news_data"])
+    
+    llm_start = time.monotonic()
+    llm = _get_llm()
+    with _llm_span.time(kind="single"):
+        result = llm.invoke(final_prompt)
+    parsed_data = parse_agent_response(result.content)
+    logging.info(f"[{unified_symbol}] Yapay zeka (LLM) çağrısı: {time.monotonic() - llm_start:.2f}s")
+
+    if not parsed_data: 
+        raise Exception(f"Yapay zekadan geçersiz yanıt: {result.content}")
+    return parsed_data
+
+def _lookup_decision(unified_symbol: str, entry_tf: str, data: dict) -> tuple[str | None, dict | None]:
+    """Karar önbelleği etkinse (anahtar, önbellekteki karar) döndürür."""
+    if not config.LLM_DECISION_CACHE_ENABLED:
+        return None, None
+    cache_key = decision_cache.fingerprint(unified_symbol, entry_tf, data)
+    cached = decision_cache.get(cache_key)
+    if cached:
+        logging.info(f"[{unified_symbol}] LLM kararı önbellekten alındı: {cached.get('recommendation')}")
+    return cache_key, cached
+
+def _decide_with_llm(unified_symbol: str, entry_tf: str, data: dict) -> dict:
+    """Kararı önbellekten veya LLM'den alır ve analiz sonucu formatında döndürür."""
+    cache_key, parsed_data = _lookup_decision(unified_symbol, entry_tf, data)
+    if parsed_data is None:
+        parsed_data = _invoke_single_llm(unified_symbol, entry_tf, data)
+        if cache_key:
+            decision_cache.put(cache_key, entry_tf, parsed_data)
+    
+    parsed_data.update({'current_price': data["current_price"], 'status': 'success', 'symbol': unified_symbol, 'timeframe': entry_tf})
+    return parsed_data
+
 def perform_analysis(symbol: str, entry_tf: str) -> dict:
     unified_symbol = tools._get_unified_symbol(symbol)
     logging.info(f"-> Analiz adımları başlatılıyor: {unified_symbol}")
     try:
-        logging.info(f"[{unified_symbol}] Adım 1/5: Fiyat alınıyor...")
-        current_price = tools._fetch_price_natively(unified_symbol)
-        if not current_price: 
-            return {"status": "error", "message": f"[{unified_symbol}] Fiyat alınamadı"}
-        
-        logging.info(f"[{unified_symbol}] Adım 2/5: Teknik indikatörler alınıyor...")
-        entry_params_str = str({"symbol": unified_symbol, "timeframe": entry_tf})
-        trend_params_str = str({"symbol": unified_symbol, "timeframe": config.MTA_TREND_TIMEFRAME})
-        
-        entry_indicators = tools.get_technical_indicators.invoke(entry_params_str)
-        if entry_indicators.get("status") != "success": 
-            return {"status": "error", "message": f"[{unified_symbol}] Giriş indikatörleri alınamadı: {entry_indicators.get('message')}"}
-
-        trend_indicators = tools.get_technical_indicators.invoke(trend_params_str)
-        if trend_indicators.get("status") != "success": 
-            return {"status": "error", "message": f"[{unified_symbol}] Trend indikatörleri alınamadı: {trend_indicators.get('message')}"}
-
-        logging.info(f"[{unified_symbol}] Adım 3/5: Piyasa duyarlılığı verileri alınıyor...")
-        market_sentiment = {
-            'funding_rate': tools.get_funding_rate.invoke(unified_symbol).get('funding_rate', 'N/A'),
-            'bid_ask_ratio': tools.get_order_book_depth.invoke(unified_symbol).get('bid_ask_ratio', 'N/A')
-        }
-
-        logging.info(f"[{unified_symbol}] Adım 4/5: Haber verileri alınıyor...")
-        news_data = tools.get_latest_news.invoke(unified_symbol) if config.USE_NEWS_ANALYSIS else "Haber analizi kapalı."
-
-        final_prompt = create_mta_analysis_prompt(unified_symbol, current_price, entry_tf, entry_indicators["data"], config.MTA_TREND_TIMEFRAME, trend_indicators["data"], market_sentiment, news_data)
-        
-        logging.info(f"[{unified_symbol}] Adım 5/5: Yapay zeka (LLM) çağrısı yapılıyor...")
-        llm = ChatGoogleGenerativeAI(model=config.GEMINI_MODEL, temperature=0.1)
-        result = llm.invoke(final_prompt)
-        parsed_data = parse_agent_response(result.content)
+        with _analysis_span.time():
+            data = _collect_analysis_data(unified_symbol, entry_tf)
+            if data["status"] != "success":
+                return data
+            with _analysis_step_span.time(step="decision"):
+                parsed_data = _decide_with_llm(unified_symbol, entry_tf, data)
         logging.info(f"<- [{unified_symbol}] Analiz başarıyla tamamlandı.")
-
-        if not parsed_data: 
-            raise Exception(f"Yapay zekadan geçersiz yanıt: {result.content}")
-        
-        parsed_data.update({'current_price': current_price, 'status': 'success', 'symbol': unified_symbol, 'timeframe': entry_tf})
         return parsed_data
         
     except Exception as e:
         logging.critical(f"[{unified_symbol}] Analiz sırasında kritik hata: {e}", exc_info=True)
         return {"status": "error", "message": str(e)}
 
+def _parse_batch_response(response: str, expected_symbols: set) -> dict:
+    """Toplu analiz yanıtını doğrular; yalnızca geçerli ve beklenen sembollere ait kayıtları döndürür."""
+    parsed = parse_agent_response(response)
+    if not isinstance(parsed, list):
+        return {}
+    decisions = {}
+    for entry in parsed:
+        if not isinstance(entry, dict): continue
+        symbol = tools._get_unified_symbol(entry.get("symbol"))
+        recommendation = str(entry.get("recommendation", "")).strip().upper()
+        reason = entry.get("reason")
+        if symbol not in expected_symbols or symbol in decisions: continue
+        if recommendation not in ("AL", "SAT", "BEKLE") or not isinstance(reason, str) or not reason.strip(): continue
+        decisions[symbol] = {"recommendation": recommendation, "reason": reason.strip()}
+    return decisions
+
+def analyze_batch(collected: dict, entry_tf: str) -> dict:
+    """
+    Verisi toplanmış sembolleri tek bir LLM çağrısıyla analiz eder ve {sembol: analiz sonucu} döndürür.
+    Toplu yanıtta eksik veya geçersiz olan semboller için tek sembollük çağrılara geri dönülür.
+    """
+    results = {symbol: data for symbol, data in collected.items() if data.get("status") != "success"}
+    ready, cache_keys = {}, {}
+    for symbol, data in collected.items():
+        if data.get("status") != "success": continue
+        cache_keys[symbol], cached = _lookup_decision(symbol, entry_tf, data)
+        if cached:
+            results[symbol] = dict(cached, current_price=data["current_price"], status="success", symbol=symbol, timeframe=entry_tf)
+        else:
+            ready[symbol] = data
+
+    decisions = {}
+    if len(ready) > 1:
+        prompt = create_batch_analysis_prompt(entry_tf, config.MTA_TREND_TIMEFRAME, [dict(data, symbol=symbol) for symbol, data in ready.items()])
+        try:
+            llm_start = time.monotonic()
+            llm = _get_llm()
+            with _llm_span.time(kind="batch"):
+                result = llm.invoke(prompt)
+            decisions = _parse_batch_response(result.content, set(ready))
+            logging.info(f"Toplu LLM analizi ({len(ready)} sembol): {time.monotonic() - llm_start:.2f}s, {len(decisions)} geçerli karar.")
+        except Exception as e:
+            logging.error(f"Toplu LLM analizi başarısız oldu, tek tek analize geçiliyor: {e}", exc_info=True)
+
+    for symbol, data in ready.items():
+        decision = decisions.get(symbol)
+        if decision is None:
+            if len(ready) > 1:
+                logging.warning(f"[{symbol}] Toplu yanıtta geçerli karar yok, tek sembollük analiz yapılıyor.")
+            try:
+                decision = _invoke_single_llm(symbol, entry_tf, data)
+            except Exception as e:
+                logging.error(f"[{symbol}] Analiz sırasında hata: {e}", exc_info=True)
+                results[symbol] = {"status": "error", "message": str(e)}
+                continue
+        if cache_keys.get(symbol):
+            decision_cache.put(cache_keys[symbol], entry_tf, decision)
+        results[symbol] = dict(decision, current_price=data["current_price"], status="success", symbol=symbol, timeframe=entry_tf)
+    return results
+
+@request_priority("high")
 def open_new_position(rec: str, symbol: str, price: float, timeframe: str) -> dict:
+    # Limit kontrolü ile yer ayırma tek adımda yapılır; aynı anda gelen onaylar (web, Telegram, tarayıcı) limiti aşamaz.
+    if not database.reserve_position_slot(symbol, config.MAX_CONCURRENT_TRADES):
+        if database.get_position(symbol):
+            return {"status": "error", "message": f"{symbol} için zaten yönetilen bir pozisyon var."}
+        return {"status": "error", "message": "Maksimum pozisyon limiti dolu."}
     try:
-        if len(database.get_all_positions()) >= config.MAX_CONCURRENT_TRADES:
-            return {"status": "error", "message": "Maksimum pozisyon limiti dolu."}
-        
         trade_side = "buy" if "AL" in rec.upper() else "sell"
         
         atr_result = tools.get_atr_value.invoke(f"{symbol},{timeframe}")
@@ -173,9 +472,12 @@ def open_new_position(rec: str, symbol: str, price: float, timeframe: str) -> di
     except Exception as e:
         logging.error(f"Pozisyon açma hatası: {e}", exc_info=True)
         return {"status": "error", "message": str(e)}
+    finally:
+        database.release_position_slot(symbol)
 
+@request_priority("high")
 def close_position_by_symbol(symbol: str, reason: str = "MANUAL") -> dict:
-    position = next((p for p in database.get_all_positions() if p['symbol'] == symbol), None)
+    position = database.get_position(symbol)
     if not position: return {"status": "error", "message": f"{symbol} için yönetilen pozisyon bulunamadı."}
 
     logging.info(f"Kapatılacak pozisyon ({symbol}) için mevcut emirler iptal ediliyor...")
@@ -192,6 +494,7 @@ def close_position_by_symbol(symbol: str, reason: str = "MANUAL") -> dict:
     result = tools.execute_trade_order.invoke({"params": close_params})
     
     if "başarı" in result.lower() or "simülasyon" in result.lower():
+        _exchange_stops.pop(symbol, None)
         closed_pos = database.remove_position(symbol)
         if closed_pos:
             current_price = tools._fetch_price_natively(closed_pos['symbol']) or closed_pos['entry_price']
@@ -204,24 +507,47 @@ def close_position_by_symbol(symbol: str, reason: str = "MANUAL") -> dict:
     else:
         return {"status": "error", "message": f"Pozisyon kapatılamadı: {result}"}
 
+def _reanalyze_with_prefetch(position: dict) -> dict:
+    """Pozisyonun ve trendin zaman dilimi verilerini eş zamanlı toplayıp tek bir LLM çağrısıyla TUT/KAPAT kararı alır."""
+    unified_symbol = tools._get_unified_symbol(position['symbol'])
+    data = _collect_analysis_data(unified_symbol, position['timeframe'])
+    if data["status"] != "success":
+        raise Exception(data["message"])
+
+    llm_start = time.monotonic()
+    with _llm_span.time(kind="reanalysis"):
+        result = _get_llm().invoke(create_prefetched_reanalysis_prompt(position, data))
+    parsed_data = parse_agent_response(result.content)
+    logging.info(f"[{unified_symbol}] Yeniden analiz LLM çağrısı: {time.monotonic() - llm_start:.2f}s")
+    if not parsed_data:
+        raise Exception(f"Yapay zekadan geçersiz yanıt: {result.content}")
+    return parsed_data
+
+def _reanalyze_with_agent(position: dict) -> dict:
+    """Verileri araçlarla adım adım toplayan ReAct ajanıyla yeniden analiz yapar."""
+    with _llm_span.time(kind="agent"):
+        result = _get_agent_executor().invoke({"input": create_reanalysis_prompt(position)})
+    return parse_agent_response(result.get("output", "")) or {}
+
 def reanalyze_position(position: dict) -> dict:
-    llm = ChatGoogleGenerativeAI(model=config.GEMINI_MODEL, temperature=0.1)
-    agent_tools = [tools.get_market_price, tools.get_technical_indicators, tools.get_funding_rate, tools.get_order_book_depth, tools.get_latest_news]
-    prompt_template = hub.pull("hwchase17/react")
-    agent = create_react_agent(llm=llm, tools=agent_tools, prompt=prompt_template)
-    agent_executor = AgentExecutor(
-        agent=agent, tools=agent_tools, verbose=tools.str_to_bool(os.getenv("AGENT_VERBOSE", "True")),
-        handle_parsing_errors="Lütfen JSON formatında geçerli bir yanıt ver.", max_iterations=config.AGENT_MAX_ITERATIONS
-    )
-    prompt = create_reanalysis_prompt(position)
     try:
-        result = agent_executor.invoke({"input": prompt})
-        parsed_data = parse_agent_response(result.get("output", ""))
+        parsed_data = None
+        if config.REANALYSIS_MODE == "prefetch":
+            try:
+                parsed_data = _reanalyze_with_prefetch(position)
+                if str(parsed_data.get("recommendation", "")).strip().upper() not in ("TUT", "KAPAT"):
+                    raise Exception(f"Geçersiz tavsiye: {parsed_data.get('recommendation')}")
+            except Exception as e:
+                logging.warning(f"[{position['symbol']}] Tek seferlik yeniden analiz başarısız, ajana geçiliyor: {e}")
+                parsed_data = None
+        if parsed_data is None:
+            parsed_data = _reanalyze_with_agent(position)
+
         recommendation = parsed_data.get("recommendation") or parsed_data.get("karar")
         if not recommendation: raise Exception("Ajan'dan geçerli tavsiye alınamadı.")
         
         return {"status": "success", "data": {
-            "recommendation": recommendation.upper(),
+            "recommendation": recommendation.strip().upper(),
             "reason": parsed_data.get("reason") or parsed_data.get("gerekce", "Gerekçe belirtilmedi.")
         }}
     except Exception as e:
@@ -278,13 +604,44 @@ def _get_scan_candidates(open_symbols: set, blacklist: dict, status_callback = N
     
     return final_scan_list
 
-def _process_candidate(symbol: str, blacklist: dict, opportunity_callback, status_callback):
-    if len(database.get_all_positions()) >= config.MAX_CONCURRENT_TRADES:
+@request_priority("low")
+def _analyze_candidate(symbol: str) -> dict:
+    """Tarama işçisi: paylaşılan hız sınırlayıcıdan izin alıp sembolü analiz eder."""
+    scan_rate_limiter.acquire()
+    return perform_analysis(symbol, config.PROACTIVE_SCAN_ENTRY_TIMEFRAME)
+
+@request_priority("low")
+def _collect_candidate_data(symbol: str) -> dict:
+    """Toplu tarama işçisi: LLM çağrısı yapmadan sadece sembolün analiz verilerini toplar."""
+    scan_rate_limiter.acquire()
+    try:
+        return _collect_analysis_data(symbol, config.PROACTIVE_SCAN_ENTRY_TIMEFRAME)
+    except Exception as e:
+        logging.error(f"[{symbol}] Veri toplama sırasında hata: {e}", exc_info=True)
+        return {"status": "error", "message": str(e)}
+
+def _iter_scan_results(candidates: list[str], executor: ThreadPoolExecutor):
+    """Aday sembollerin analiz sonuçlarını, aday sırasıyla (sembol, sonuç) olarak üretir."""
+    batch_size = config.PROACTIVE_SCAN_LLM_BATCH_SIZE
+    if batch_size <= 1:
+        futures = [executor.submit(_analyze_candidate, symbol) for symbol in candidates]
+        for symbol, future in zip(candidates, futures):
+            yield symbol, future.result()
+        return
+
+    futures = [executor.submit(_collect_candidate_data, symbol) for symbol in candidates]
+    for offset in range(0, len(candidates), batch_size):
+        chunk = candidates[offset:offset + batch_size]
+        collected = {symbol: future.result() for symbol, future in zip(chunk, futures[offset:offset + batch_size])}
+        results = analyze_batch(collected, config.PROACTIVE_SCAN_ENTRY_TIMEFRAME)
+        for symbol in chunk:
+            yield symbol, results[symbol]
+
+def _process_candidate(symbol: str, analysis_result: dict, blacklist: dict, opportunity_callback, status_callback):
+    if database.count_positions() >= config.MAX_CONCURRENT_TRADES:
         status_callback("UYARI: Tarama sırasında maksimum pozisyon limitine ulaşıldı. Döngü sonlandırılıyor.")
         return False
 
-    analysis_result = perform_analysis(symbol, config.PROACTIVE_SCAN_ENTRY_TIMEFRAME)
-
     if not analysis_result or analysis_result.get('status') != 'success':
         message = f"⚠️ {symbol} için analiz tamamlanamadı. Sebep: {analysis_result.get('message', 'Bilinmiyor')}. 1 saatliğine dinamik kara listeye ekleniyor."
         status_callback(message)
@@ -298,9 +655,9 @@ def _process_candidate(symbol: str, blacklist: dict, opportunity_callback, statu
     else:
         status_callback(f"⚪️ {symbol} için net bir sinyal bulunamadı ('{recommendation}'). Atlanıyor.")
     
-    time.sleep(3)
     return True
 
+@request_priority("low")
 def run_proactive_scanner(opportunity_callback, status_callback):
     BLACKLISTED_SYMBOLS = {}
     
@@ -321,14 +678,37 @@ def run_proactive_scanner(opportunity_callback, status_callback):
     if not candidates:
         status_callback("BİLGİ: Analiz edilecek yeni ve uygun sembol bulunamadı.")
     else:
-        for symbol in candidates:
-            should_continue = _process_candidate(symbol, BLACKLISTED_SYMBOLS, opportunity_callback, status_callback)
-            if not should_continue:
-                break
+        # Analizler işçi havuzunda paralel yürür; sonuçlar ise aday sırasıyla bu thread'de işlenir.
+        # Böylece geri çağrılar sıralı kalır ve pozisyon limiti tek bir yerden denetlenir.
+        workers = max(1, min(config.PROACTIVE_SCAN_WORKERS, len(candidates)))
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scanner")
+        try:
+            for symbol, analysis_result in _iter_scan_results(candidates, executor):
+                should_continue = _process_candidate(symbol, analysis_result, BLACKLISTED_SYMBOLS, opportunity_callback, status_callback)
+                if not should_continue:
+                    break
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    if config.LLM_DECISION_CACHE_ENABLED:
+        cache_stats = decision_cache.stats()
+        status_callback(f"INFO: LLM karar önbelleği: {cache_stats['hits']} isabet, {cache_stats['misses']} ıska (toplam).")
     
     status_callback("--- ✅ Proaktif Tarama Döngüsü Tamamlandı ✅ ---")
 
+def _get_position_lock(symbol: str) -> threading.Lock:
+    with _position_locks_guard:
+        return _position_locks.setdefault(symbol, threading.Lock())
+
+def _get_managed_position(symbol: str) -> dict | None:
+    return database.get_position(symbol)
+
+@request_priority("high")
 def check_and_manage_positions():
+    with _position_check_span.time():
+        _check_and_manage_positions()
+
+def _check_and_manage_positions():
     try:
         exchange_positions_raw = tools.get_open_positions_from_exchange.invoke({})
     except Exception as e:
@@ -342,80 +722,143 @@ def check_and_manage_positions():
     exchange_positions_map = {tools._get_unified_symbol(p.get('symbol')): p for p in exchange_positions_raw}
     db_positions = database.get_all_positions()
 
-    for db_pos in db_positions:
-        symbol = db_pos['symbol']
-        exchange_pos = exchange_positions_map.get(symbol)
+    # Döngüdeki tüm veritabanı değişiklikleri tek bir işlemde kaydedilir.
+    with database.unit_of_work():
+        for db_pos in db_positions:
+            symbol = db_pos['symbol']
+            exchange_pos = exchange_positions_map.get(symbol)
+
+            with _get_position_lock(symbol):
+                # Akış modu kilidi bizden önce almış ve pozisyonu değiştirmiş veya kapatmış olabilir; güncel kaydı kullan.
+                # Borsa listesi alındıktan sonra aynı sembolde yeniden açılmış bir pozisyon bu turda atlanır.
+                current_pos = _get_managed_position(symbol)
+                if not current_pos or current_pos.get('created_at') != db_pos.get('created_at'):
+                    continue
 
-        if not exchange_pos:
-            logging.warning(f"Pozisyon '{symbol}' veritabanında var ama borsada yok. Veritabanından siliniyor.")
-            database.log_trade_to_history(db_pos, db_pos.get('entry_price'), "SYNC_CLOSED")
-            database.remove_position(symbol)
-            continue
+                if not exchange_pos:
+                    logging.warning(f"Pozisyon '{symbol}' veritabanında var ama borsada yok. Veritabanından siliniyor.")
+                    database.log_trade_to_history(current_pos, current_pos.get('entry_price'), "SYNC_CLOSED")
+                    database.remove_position(symbol)
+                    _exchange_stops.pop(symbol, None)
+                    continue
 
-        try:
-            current_price = float(exchange_pos.get('markPrice'))
-            side = db_pos.get("side")
-            entry_price = db_pos.get("entry_price")
-            initial_sl = db_pos.get("initial_stop_loss")
-            pos_amount = db_pos.get("amount")
-            
-            if config.USE_PARTIAL_TP and not db_pos.get('partial_tp_executed'):
-                risk_per_unit = abs(entry_price - initial_sl)
-                partial_tp_price = entry_price + (risk_per_unit * config.PARTIAL_TP_TARGET_RR) if side == 'buy' else entry_price - (risk_per_unit * config.PARTIAL_TP_TARGET_RR)
-
-                if (side == 'buy' and current_price >= partial_tp_price) or (side == 'sell' and current_price <= partial_tp_price):
-                    logging.info(f"PARTIAL TP TETİKLENDİ: {symbol} için kısmi kâr alma hedefine ulaşıldı.")
-                    close_amount = pos_amount * (config.PARTIAL_TP_CLOSE_PERCENT / 100)
-                    remaining_amount = pos_amount - close_amount
-                    
-                    partial_close_params = {"symbol": symbol, "side": 'sell' if side == 'buy' else 'buy', "amount": close_amount}
-                    tools.execute_trade_order.invoke({"params": partial_close_params})
-                    
-                    new_sl_price = entry_price
-                    update_sl_params = {"symbol": symbol, "side": side, "amount": remaining_amount, "new_stop_price": new_sl_price}
-                    tools.update_stop_loss_order.invoke({"params": update_sl_params})
-                    
-                    realized_pnl = abs(current_price - entry_price) * close_amount
-                    database.update_position_after_partial_tp(symbol, remaining_amount, new_sl_price, realized_pnl)
-                    
-                    notif_message = f"PARTIAL TP: {symbol} pozisyonunun %{config.PARTIAL_TP_CLOSE_PERCENT} kadarı kapatıldı. SL giriş fiyatına çekildi."
-                    send_telegram_message(notif_message)
-                    logging.info(notif_message)
+                try:
+                    mark_price = float(exchange_pos.get('markPrice'))
+                except (TypeError, ValueError) as e:
+                    logging.error(f"Pozisyon kontrolü sırasında hata ({symbol}): geçersiz işaret fiyatı: {e}")
                     continue
+                _manage_position(current_pos, mark_price)
 
-            if config.USE_TRAILING_STOP_LOSS:
-                sl_price = db_pos.get("stop_loss", 0.0)
-                activation_price = entry_price * (1 + (config.TRAILING_STOP_ACTIVATION_PERCENT / 100)) if side == 'buy' else entry_price * (1 - (config.TRAILING_STOP_ACTIVATION_PERCENT / 100))
+@request_priority("high")
+def handle_mark_price_tick(symbol: str, mark_price: float):
+    """Akıştan gelen her işaret fiyatında pozisyon tetikleyicilerini (kısmi TP, trailing SL, SL/TP) çalıştırır."""
+    lock = _get_position_lock(symbol)
+    if not lock.acquire(blocking=False):
+        return
+    try:
+        db_pos = _get_managed_position(symbol)
+        if db_pos:
+            _manage_position(db_pos, mark_price)
+    finally:
+        lock.release()
+
+def _manage_position(db_pos: dict, current_price: float):
+    """Tek bir pozisyon için kısmi TP, trailing SL ve SL/TP kurallarını verilen fiyatla uygular."""
+    symbol = db_pos['symbol']
+    try:
+        side = db_pos.get("side")
+        entry_price = db_pos.get("entry_price")
+        initial_sl = db_pos.get("initial_stop_loss")
+        pos_amount = db_pos.get("amount")
+        
+        if config.USE_PARTIAL_TP and not db_pos.get('partial_tp_executed'):
+            risk_per_unit = abs(entry_price - initial_sl)
+            partial_tp_price = entry_price + (risk_per_unit * config.PARTIAL_TP_TARGET_RR) if side == 'buy' else entry_price - (risk_per_unit * config.PARTIAL_TP_TARGET_RR)
+
+            if (side == 'buy' and current_price >= partial_tp_price) or (side == 'sell' and current_price <= partial_tp_price):
+                logging.info(f"PARTIAL TP TETİKLENDİ: {symbol} için kısmi kâr alma hedefine ulaşıldı.")
+                close_amount = pos_amount * (config.PARTIAL_TP_CLOSE_PERCENT / 100)
+                remaining_amount = pos_amount - close_amount
                 
-                if (side == 'buy' and current_price > activation_price) or (side == 'sell' and current_price < activation_price):
-                    new_sl_candidate = current_price * (1 - (config.TRAILING_STOP_ACTIVATION_PERCENT / 100)) if side == 'buy' else current_price * (1 + (config.TRAILING_STOP_ACTIVATION_PERCENT / 100))
-                    
-                    if (side == 'buy' and new_sl_candidate > sl_price) or (side == 'sell' and new_sl_candidate < sl_price):
-                        logging.info(f"TRAILING SL TETİKLENDİ: {symbol} için yeni SL: {new_sl_candidate:.8f}")
-                        update_sl_params = {"symbol": symbol, "side": side, "amount": pos_amount, "new_stop_price": new_sl_candidate}
-                        tools.update_stop_loss_order.invoke({"params": update_sl_params})
-                        database.update_position_sl(symbol, new_sl_candidate)
-
-            final_sl_price = db_pos.get("stop_loss", 0.0)
-            final_tp_price = db_pos.get("take_profit", 0.0)
-            
-            if (side == "buy" and current_price <= final_sl_price) or (side == "sell" and current_price >= final_sl_price):
-                logging.info(f"POZİSYON KAPANDI (SL): {symbol}")
-                close_position_by_symbol(symbol, "SL")
-                continue
-            if (side == "buy" and current_price >= final_tp_price) or (side == "sell" and current_price <= final_tp_price):
-                logging.info(f"POZİSYON KAPANDI (TP): {symbol}")
-                close_position_by_symbol(symbol, "TP")
-                continue
+                partial_close_params = {"symbol": symbol, "side": 'sell' if side == 'buy' else 'buy', "amount": close_amount}
+                tools.execute_trade_order.invoke({"params": partial_close_params})
+                
+                new_sl_price = entry_price
+                update_sl_params = {"symbol": symbol, "side": side, "amount": remaining_amount, "new_stop_price": new_sl_price}
+                tools.update_stop_loss_order.invoke({"params": update_sl_params})
+                _exchange_stops[symbol] = (new_sl_price, time.monotonic())
+                
+                realized_pnl = abs(current_price - entry_price) * close_amount
+                database.update_position_after_partial_tp(symbol, remaining_amount, new_sl_price, realized_pnl)
+                
+                notif_message = f"PARTIAL TP: {symbol} pozisyonunun %{config.PARTIAL_TP_CLOSE_PERCENT} kadarı kapatıldı. SL giriş fiyatına çekildi."
+                send_telegram_message(notif_message)
+                logging.info(notif_message)
+                return
+
+        if config.USE_TRAILING_STOP_LOSS:
+            sl_price = db_pos.get("stop_loss", 0.0)
+            activation_price = entry_price * (1 + (config.TRAILING_STOP_ACTIVATION_PERCENT / 100)) if side == 'buy' else entry_price * (1 - (config.TRAILING_STOP_ACTIVATION_PERCENT / 100))
             
-        except Exception as e:
-            logging.error(f"Pozisyon kontrolü sırasında hata ({symbol}): {e}", exc_info=True)
+            if (side == 'buy' and current_price > activation_price) or (side == 'sell' and current_price < activation_price):
+                new_sl_candidate = current_price * (1 - (config.TRAILING_STOP_ACTIVATION_PERCENT / 100)) if side == 'buy' else current_price * (1 + (config.TRAILING_STOP_ACTIVATION_PERCENT / 100))
+                
+                if (side == 'buy' and new_sl_candidate > sl_price) or (side == 'sell' and new_sl_candidate < sl_price):
+                    database.update_position_sl(symbol, new_sl_candidate)
+                    _refresh_exchange_stop(symbol, side, pos_amount, new_sl_candidate, sl_price)
+                else:
+                    _refresh_exchange_stop(symbol, side, pos_amount, sl_price, sl_price)
+
+        final_sl_price = db_pos.get("stop_loss", 0.0)
+        final_tp_price = db_pos.get("take_profit", 0.0)
+        
+        if (side == "buy" and current_price <= final_sl_price) or (side == "sell" and current_price >= final_sl_price):
+            logging.info(f"POZİSYON KAPANDI (SL): {symbol}")
+            close_position_by_symbol(symbol, "SL")
+            return
+        if (side == "buy" and current_price >= final_tp_price) or (side == "sell" and current_price <= final_tp_price):
+            logging.info(f"POZİSYON KAPANDI (TP): {symbol}")
+            close_position_by_symbol(symbol, "TP")
+            return
+        
+    except Exception as e:
+        logging.error(f"Pozisyon kontrolü sırasında hata ({symbol}): {e}", exc_info=True)
+
+def _refresh_exchange_stop(symbol: str, side: str, amount: float, stop_price: float, previous_stop: float):
+    """
+    Trailing ile ilerleyen SL'i borsadaki emre yansıtır. Emir, sadece borsadaki SL ile arasındaki fark fiyatın
+    %`TRAILING_STOP_MIN_STEP_PERCENT`'ine ulaştıysa ve sembolde son gönderimden bu yana
+    `TRAILING_STOP_MIN_UPDATE_SECONDS` geçtiyse yenilenir; aradaki hareketlerde SL kontrolünü bot kendisi yapar.
+    """
+    now = time.monotonic()
+    exchange_stop, sent_at = _exchange_stops.get(symbol, (previous_stop, 0.0))
+    if abs(stop_price - exchange_stop) < abs(stop_price) * config.TRAILING_STOP_MIN_STEP_PERCENT / 100:
+        return
+    if now - sent_at < config.TRAILING_STOP_MIN_UPDATE_SECONDS:
+        return
+    logging.info(f"TRAILING SL TETİKLENDİ: {symbol} için borsadaki SL güncelleniyor: {exchange_stop:.8f} -> {stop_price:.8f}")
+    update_sl_params = {"symbol": symbol, "side": side, "amount": amount, "new_stop_price": stop_price}
+    result = tools.update_stop_loss_order.invoke({"params": update_sl_params})
+    # Başarısız denemede de zaman kaydedilir; böylece hata durumunda borsaya her fiyatta yeniden istek gitmez.
+    _exchange_stops[symbol] = (exchange_stop if str(result).startswith("HATA") else stop_price, now)
 
 def background_position_checker():
     logging.info("--- Arka plan pozisyon kontrolcüsü başlatıldı. ---")
+    interval = config.POSITION_CHECK_INTERVAL_SECONDS
+    if config.POSITION_STREAM_ENABLED:
+        from position_stream import start_mark_price_stream
+        if start_mark_price_stream(handle_mark_price_tick):
+            interval = config.POSITION_STREAM_RECONCILE_INTERVAL_SECONDS
+            logging.info(f"--- İşaret fiyatı akışı etkin. Periyodik kontrol {interval} saniyede bir mutabakat için çalışacak. ---")
+        else:
+            logging.info("--- Borsa simülatöründe işaret fiyatı akışı kullanılmıyor; pozisyonlar periyodik olarak kontrol edilecek. ---")
+    scheduled_at = time.monotonic()
     while True:
+        # Uykudan planlanandan ne kadar geç uyanıldığı (GIL/gevent çekişmesi, aşırı yüklenme göstergesi).
+        _checker_lag.set(max(0.0, time.monotonic() - scheduled_at))
         try:
             check_and_manage_positions()
         except Exception as e:
             logging.critical(f"Arka plan kontrolcüsünde KRİTİK HATA: {e}", exc_info=True)
-        time.sleep(config.POSITION_CHECK_INTERVAL_SECONDS)
+        scheduled_at = time.monotonic() + interval
+        time.sleep(interval)
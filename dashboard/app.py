@@ -1,31 +1,39 @@
 # dashboard/app.py
 # @author: Memba Co.
 
-import sqlite3
 import os
 import logging
 import sys
+import threading
 import secrets
-from flask import Flask, render_template, jsonify, request, redirect, url_for, session, flash
-from flask_socketio import SocketIO
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
-from contextlib import contextmanager
 from functools import wraps
-from dotenv import load_dotenv
 
-# --- Proje Kök Dizinini Ayarla ve .env Yükle ---
+# --- Proje Kök Dizinini Ayarla ---
 APP_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if APP_ROOT not in sys.path:
     sys.path.append(APP_ROOT)
-dotenv_path = os.path.join(APP_ROOT, '.env')
-load_dotenv(dotenv_path=dotenv_path)
 
-# --- Çekirdek modülleri yükle ---
-import core
 import config
-import tools
-import database
+from startup_timing import StartupTimer
+
+startup = StartupTimer("dashboard")
+if config.STARTUP_TIMING_ENABLED:
+    startup.track_imports()
+
+with startup.step("importlar"):
+    from flask import Flask, Response, render_template, jsonify, request, redirect, url_for, session, flash
+    from flask_socketio import SocketIO
+    from flask_limiter import Limiter
+    from flask_limiter.util import get_remote_address
+    from dotenv import load_dotenv
+
+    # --- .env Yükle ve Çekirdek modülleri yükle ---
+    load_dotenv(dotenv_path=os.path.join(APP_ROOT, '.env'))
+    import core
+    import tools
+    import database
+    import metrics
+    from throttling import request_priority
 
 # --- Uygulama ve Eklentileri Başlat ---
 app = Flask(__name__)
@@ -34,20 +42,10 @@ limiter = Limiter(get_remote_address, app=app, default_limits=["200 per day", "5
 socketio = SocketIO(app, async_mode='gevent')
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-DATABASE_PATH = os.path.join(APP_ROOT, config.DATABASE_FILE)
-
-# --- Veritabanı Bağlantısı ve Yardımcı Fonksiyonlar ---
-@contextmanager
-def get_db_connection():
-    if not os.path.exists(DATABASE_PATH):
-        raise FileNotFoundError(f"Veritabanı bulunamadı: {DATABASE_PATH}")
-    conn = sqlite3.connect(DATABASE_PATH, check_same_thread=False)
-    conn.row_factory = sqlite3.Row
-    try:
-        yield conn
-    finally:
-        conn.close()
+DATABASE_PATH = database.DB_FILE
+metrics.set_process_name("dashboard")
 
+# --- Kimlik Doğrulama ---
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -80,13 +78,23 @@ def logout():
 def index():
     return render_template('index.html')
 
+@app.route('/metrics')
+@limiter.exempt
+def metrics_endpoint():
+    """Prometheus kazıyıcıları için metrikler. Oturum yerine isteğe bağlı METRICS_TOKEN ile korunur."""
+    if not config.METRICS_ENABLED:
+        return Response("Metrikler kapalı.", status=404, mimetype='text/plain')
+    token = os.getenv('METRICS_TOKEN')
+    if token and not secrets.compare_digest(request.headers.get('Authorization', '').encode(), f"Bearer {token}".encode()):
+        return Response("Yetkisiz.", status=401, mimetype='text/plain')
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
 # --- SocketIO Olayları (Real-time İletişim) ---
 @socketio.on('connect')
 @login_required
 def handle_connect(auth):
-    """İstemci bağlandığında tetiklenir."""
+    """İstemci bağlandığında tetiklenir. İlk görüntüyü istemci 'request_dashboard_data' ile ister."""
     logging.info(f"İstemci bağlandı: {request.sid}")
-    emit_dashboard_data()
 
 @socketio.on('disconnect')
 def handle_disconnect():
@@ -96,7 +104,20 @@ def handle_disconnect():
 @socketio.on('request_dashboard_data')
 @login_required
 def handle_data_request():
-    emit_dashboard_data()
+    emit_dashboard_snapshot(request.sid)
+
+@socketio.on('request_history_page')
+@login_required
+def handle_history_page_request(data):
+    """İmleçten (cursor) önceki, daha eski işlem geçmişi sayfasını sadece isteyen istemciye gönderir."""
+    cursor = (data or {}).get('cursor')
+    if not cursor: return
+    try:
+        trades, next_cursor = database.get_trade_history_page(cursor, config.WEB_HISTORY_PAGE_SIZE)
+    except ValueError:
+        socketio.emit('toast', {'message': 'Geçersiz geçmiş imleci.', 'type': 'error'}, to=request.sid)
+        return
+    socketio.emit('history_page', {'trades': trades, 'next_cursor': next_cursor}, to=request.sid)
 
 @socketio.on('start_scan')
 @login_required
@@ -151,7 +172,7 @@ def handle_reanalyze_position(data):
         socketio.emit('toast', {'message': 'Yeniden analiz için sembol belirtilmedi.', 'type': 'error'})
         return
 
-    position = next((p for p in database.get_all_positions() if p['symbol'] == symbol), None)
+    position = database.get_position(symbol)
     if not position:
         socketio.emit('toast', {'message': f'{symbol} için yönetilen pozisyon bulunamadı.', 'type': 'error'})
         return
@@ -202,49 +223,110 @@ def api_new_analysis():
 
 
 # --- Yardımcı Fonksiyonlar ---
+# İstemcilere en son yayınlanan durum. Her değişiklik yayını sürümü bir artırır; istemciler kendi sürümleri
+# ile yayının `base_version` değeri uyuşmazsa tam görüntüyü yeniden ister.
+_dashboard_state = {"version": 0, "last_trade_id": 0, "positions": {}, "stats": None}
+_dashboard_state_lock = threading.Lock()
+
+def _load_open_positions() -> dict:
+    """Yönetilen pozisyonları borsadaki anlık PNL ile birlikte, en yeniden eskiye sıralı döndürür."""
+    exchange_positions = tools.get_open_positions_from_exchange.invoke({})
+    exchange_pnl_map = {
+        tools._get_unified_symbol(pos.get('symbol')): float(pos.get('unrealizedPnl', 0.0)) 
+        for pos in exchange_positions if pos.get('symbol')
+    }
+    positions = sorted(database.get_all_positions(), key=lambda p: p.get('created_at') or '', reverse=True)
+    return {p['symbol']: dict(p, unrealizedPnl=exchange_pnl_map.get(p['symbol'], 0.0)) for p in positions}
+
+def _load_stats() -> dict:
+    # İstatistikler, işlem kaydı sırasında güncellenen özet tablodan okunur.
+    trade_stats = database.get_trade_stats()
+    total_trades = trade_stats['total_trades']
+    win_rate = (trade_stats['winning_trades'] / total_trades * 100) if total_trades > 0 else 0
+    return {'total_pnl': f"{trade_stats['total_pnl']:,.2f}", 'win_rate': f"{win_rate:.2f}", 'total_trades': total_trades}
+
+def _sync_dashboard_state() -> dict | None:
+    """
+    Güncel verileri son yayınlanan durumla karşılaştırır, durumu günceller ve değişiklik (delta) yükünü döndürür.
+    Değişiklik yoksa None döner. `_dashboard_state_lock` altında çağrılmalıdır.
+    """
+    state = _dashboard_state
+    positions = _load_open_positions()
+    stats = _load_stats()
+    page_size = config.WEB_HISTORY_PAGE_SIZE
+    new_trades = database.get_trades_after(state['last_trade_id'], page_size + 1)
+
+    delta = {}
+    if len(new_trades) > page_size:
+        # Tek seferde sayfa boyutundan fazla işlem: yükü sınırlı tutmak için istemcilerden tam görüntü istenir.
+        delta['resync'] = True
+        state['last_trade_id'] = database.get_latest_trade_id()
+    elif new_trades:
+        delta['new_trades'] = list(reversed(new_trades))
+        delta['pnl_points'] = [{'x': t['closed_at'], 'y': t['cumulative_pnl']} for t in new_trades]
+        state['last_trade_id'] = new_trades[-1]['id']
+
+    changed = [p for symbol, p in positions.items() if state['positions'].get(symbol) != p]
+    removed = [symbol for symbol in state['positions'] if symbol not in positions]
+    if changed: delta['positions_changed'] = changed
+    if removed: delta['positions_removed'] = removed
+    if stats != state['stats']: delta['stats'] = stats
+    state['positions'], state['stats'] = positions, stats
+
+    if not delta:
+        return None
+    delta['base_version'] = state['version']
+    state['version'] += 1
+    delta['version'] = state['version']
+    return delta
+
+@request_priority("low")
 def emit_dashboard_data():
-    """Veritabanı ve borsadan verileri alıp istemciye gönderir."""
+    """Son yayından bu yana değişen verileri (yeni işlemler, değişen pozisyonlar, istatistikler) tüm istemcilere gönderir."""
     try:
-        with get_db_connection() as conn:
-            db_positions = conn.execute('SELECT * FROM managed_positions ORDER BY created_at DESC').fetchall()
-            trade_history = conn.execute('SELECT * FROM trade_history ORDER BY closed_at DESC').fetchall()
-
-        exchange_positions = tools.get_open_positions_from_exchange.invoke({})
-        
-        exchange_pnl_map = {
-            tools._get_unified_symbol(pos.get('symbol')): float(pos.get('unrealizedPnl', 0.0)) 
-            for pos in exchange_positions if pos.get('symbol')
-        }
-        
-        open_positions_with_pnl = []
-        for pos in db_positions:
-            pos_dict = dict(pos)
-            pos_dict['unrealizedPnl'] = exchange_pnl_map.get(pos_dict['symbol'], 0.0)
-            open_positions_with_pnl.append(pos_dict)
-
-        total_pnl = sum(trade['pnl'] for trade in trade_history)
-        winning_trades = sum(1 for trade in trade_history if trade['pnl'] > 0)
-        total_trades = len(trade_history)
-        win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
-        stats = {'total_pnl': f"{total_pnl:,.2f}", 'win_rate': f"{win_rate:.2f}", 'total_trades': total_trades}
-        pnl_timeline = [{'x': t['closed_at'], 'y': sum(trade['pnl'] for trade in trade_history if trade['closed_at'] <= t['closed_at'])} for t in sorted(trade_history, key=lambda x: x['closed_at'])]
-        
-        socketio.emit('dashboard_data', {
-            "stats": stats, 
-            "open_positions": open_positions_with_pnl, 
-            "trade_history": [dict(row) for row in trade_history], 
-            "pnl_timeline": pnl_timeline
-        })
+        with _dashboard_state_lock:
+            delta = _sync_dashboard_state()
+        if delta:
+            socketio.emit('dashboard_delta', delta)
     except Exception as e:
         logging.error(f"Dashboard verisi gönderilirken hata: {e}", exc_info=True)
         socketio.emit('toast', {'message': f'Dashboard verileri alınamadı: {e}', 'type': 'error'})
 
+@request_priority("low")
+def emit_dashboard_snapshot(sid: str):
+    """Bir istemciye, güncel sürümle birlikte ilk geçmiş sayfasını ve sınırlı PNL serisini içeren tam görüntüyü gönderir."""
+    try:
+        if not os.path.exists(DATABASE_PATH):
+            raise FileNotFoundError(f"Veritabanı bulunamadı: {DATABASE_PATH}")
+        with _dashboard_state_lock:
+            # Önce bekleyen değişiklikler diğer istemcilere yayınlanır; görüntü tam olarak bu sürümü yansıtır.
+            delta = _sync_dashboard_state()
+            state = _dashboard_state
+            trade_history, next_cursor = database.get_trade_history_page(None, config.WEB_HISTORY_PAGE_SIZE, max_id=state['last_trade_id'])
+            snapshot = {
+                "version": state['version'],
+                "stats": state['stats'],
+                "open_positions": list(state['positions'].values()),
+                "trade_history": trade_history,
+                "next_cursor": next_cursor,
+                "pnl_timeline": database.get_pnl_timeline(config.WEB_TIMELINE_MAX_POINTS, max_id=state['last_trade_id']),
+            }
+        if delta:
+            socketio.emit('dashboard_delta', delta)
+        socketio.emit('dashboard_data', snapshot, to=sid)
+    except Exception as e:
+        logging.error(f"Dashboard verisi gönderilirken hata: {e}", exc_info=True)
+        socketio.emit('toast', {'message': f'Dashboard verileri alınamadı: {e}', 'type': 'error'}, to=sid)
+
 if __name__ == '__main__':
     try:
         logging.info("Dashboard için borsa bağlantısı kuruluyor...")
-        tools.initialize_exchange(config.DEFAULT_MARKET_TYPE)
+        with startup.step("borsa"):
+            tools.initialize_exchange(config.DEFAULT_MARKET_TYPE)
         host = '0.0.0.0'
         port = 5001
+        if config.STARTUP_TIMING_ENABLED:
+            startup.report(config.STARTUP_TIMING_TOP_IMPORTS)
         logging.info(f"Dashboard sunucusu http://{host}:{port} adresinde başlatılıyor...")
         socketio.run(app, host=host, port=port, debug=False)
     except Exception as e:
@@ -6,6 +6,9 @@ document.addEventListener('DOMContentLoaded', function () {
     let pnlChart;
     let currentOpportunity = null;
 
+    // Sunucudan alınan son durum; güncellemeler (delta) bu durumun üzerine uygulanır.
+    const state = { version: null, positions: new Map(), history: [], nextCursor: null, historyLoading: false };
+
     // Element referansları
     const elements = {
         totalPnl: document.getElementById('total-pnl'),
@@ -45,6 +48,24 @@ document.addEventListener('DOMContentLoaded', function () {
         updateDashboard(data);
     });
 
+    socket.on('dashboard_delta', (delta) => {
+        // Bir güncelleme kaçırıldıysa veya sunucu tam yenileme istiyorsa görüntüyü baştan iste.
+        if (state.version === null) return;
+        if (delta.resync || delta.base_version !== state.version) {
+            state.version = null;
+            socket.emit('request_dashboard_data');
+            return;
+        }
+        applyDelta(delta);
+    });
+
+    socket.on('history_page', (page) => {
+        state.historyLoading = false;
+        state.history = state.history.concat(page.trades);
+        state.nextCursor = page.next_cursor;
+        renderTradeHistory(state.history);
+    });
+
     socket.on('scan_status', (data) => {
         elements.scanStatusContainer.innerHTML = `<p>${data.message}</p>`;
         if (data.message.includes('Tamamlandı') || data.message.includes('Başlatılıyor') || data.message.includes('bekleniyor')) {
@@ -94,23 +115,59 @@ document.addEventListener('DOMContentLoaded', function () {
         }
     });
     
+    elements.tradeHistoryContainer.addEventListener('click', function(e) {
+        if (!e.target.closest('button[data-action="load-more"]') || !state.nextCursor || state.historyLoading) return;
+        state.historyLoading = true;
+        socket.emit('request_history_page', { cursor: state.nextCursor });
+    });
+
     elements.confirmOpportunityBtn.addEventListener('click', handleConfirmOpportunity);
     elements.cancelOpportunityBtn.addEventListener('click', hideOpportunityModal);
 
     // --- Arayüz Güncelleme Fonksiyonları ---
     function updateDashboard(data) {
         if (!data) return;
-        
-        const pnlValue = parseFloat(data.stats.total_pnl.replace(',', ''));
-        elements.totalPnl.textContent = `${data.stats.total_pnl} USDT`;
-        elements.totalPnl.className = `mt-1 text-3xl font-semibold ${pnlValue >= 0 ? 'positive-pnl' : 'negative-pnl'}`;
-        elements.winRate.textContent = `${data.stats.win_rate}%`;
-        elements.totalTrades.textContent = data.stats.total_trades;
 
+        state.version = data.version;
+        state.positions = new Map(data.open_positions.map(p => [p.symbol, p]));
+        state.history = data.trade_history;
+        state.nextCursor = data.next_cursor;
+        state.historyLoading = false;
+
+        renderStats(data.stats);
         renderOpenPositions(data.open_positions);
-        renderTradeHistory(data.trade_history);
+        renderTradeHistory(state.history);
         updateChart(data.pnl_timeline);
     }
+
+    function applyDelta(delta) {
+        state.version = delta.version;
+        if (delta.stats) renderStats(delta.stats);
+
+        if (delta.positions_changed || delta.positions_removed) {
+            (delta.positions_removed || []).forEach(symbol => state.positions.delete(symbol));
+            (delta.positions_changed || []).forEach(p => state.positions.set(p.symbol, p));
+            const positions = Array.from(state.positions.values()).sort((a, b) => (b.created_at || '').localeCompare(a.created_at || ''));
+            renderOpenPositions(positions);
+        }
+
+        if (delta.new_trades) {
+            state.history = delta.new_trades.concat(state.history);
+            renderTradeHistory(state.history);
+        }
+        if (delta.pnl_points && pnlChart) {
+            pnlChart.data.datasets[0].data.push(...delta.pnl_points);
+            pnlChart.update();
+        }
+    }
+
+    function renderStats(stats) {
+        const pnlValue = parseFloat(stats.total_pnl.replace(/,/g, ''));
+        elements.totalPnl.textContent = `${stats.total_pnl} USDT`;
+        elements.totalPnl.className = `mt-1 text-3xl font-semibold ${pnlValue >= 0 ? 'positive-pnl' : 'negative-pnl'}`;
+        elements.winRate.textContent = `${stats.win_rate}%`;
+        elements.totalTrades.textContent = stats.total_trades;
+    }
     
     function renderOpenPositions(positions) {
         if (!positions || positions.length === 0) {
@@ -150,7 +207,8 @@ document.addEventListener('DOMContentLoaded', function () {
                 <td class="px-4 py-4 whitespace-nowrap text-sm ${trade.pnl >= 0 ? 'positive-pnl' : 'negative-pnl'}">${trade.pnl.toFixed(2)}</td>
                 <td class="px-4 py-4 whitespace-nowrap text-sm text-slate-300">${trade.status}</td>
                 <td class="px-4 py-4 whitespace-nowrap text-sm text-slate-300">${new Date(trade.closed_at).toLocaleString()}</td></tr>`).join('')}
-            </tbody></table>`;
+            </tbody></table>
+            ${state.nextCursor ? '<div class="text-center mt-4"><button class="btn btn-gray text-xs" data-action="load-more">Daha Fazla Yükle</button></div>' : ''}`;
     }
 
     function updateChart(timelineData) {
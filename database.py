@@ -1,37 +1,354 @@
 # database.py
 # @author: Memba Co.
 
+import os
 import sqlite3
 import logging
+import threading
 from contextlib import contextmanager
+from datetime import datetime, timezone
 from tools import calculate_pnl
 import config
+import metrics
 
-DB_FILE = config.DATABASE_FILE
+# Göreli yol, çalışma dizininden bağımsız olarak proje köküne göre çözülür; böylece bot ve dashboard aynı dosyayı kullanır.
+DB_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), config.DATABASE_FILE)
+# Veritabanı eskiden proje kökünde tutuluyordu; ilk açılışta (WAL dosyalarıyla birlikte) yeni yerine taşınır.
+_LEGACY_DB_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "trades.db")
+
+_local = threading.local()
+_write_lock = threading.RLock()
+_connections: dict[threading.Thread, sqlite3.Connection] = {}
+_connections_lock = threading.Lock()
+
+# Genel veritabanı fonksiyonlarının süre ve hata metrikleri (metrics.py).
+_timed = metrics.Span("db_call", "Veritabanı fonksiyon çağrıları", ("function",)).wrap()
+# `unit_of_work` etkinken yazmalar, bloğu açan thread'in kendi sırasında (`_local.pending_writes`) biriktirilir.
+# Sayaç, herhangi bir thread'in sırası doluyken bellekteki kaydın veritabanından yeniden yüklenmesini engeller.
+_active_units = 0
+_active_units_lock = threading.Lock()
+
+def _open_connection() -> sqlite3.Connection:
+    """WAL modunda, otomatik commit (isolation_level=None) ile çalışan yeni bir bağlantı açar."""
+    os.makedirs(os.path.dirname(DB_FILE), exist_ok=True)
+    conn = sqlite3.connect(
+        DB_FILE,
+        timeout=config.DATABASE_BUSY_TIMEOUT_SECONDS,
+        isolation_level=None,
+        check_same_thread=False,
+        cached_statements=config.DATABASE_STATEMENT_CACHE_SIZE,
+    )
+    conn.row_factory = sqlite3.Row
+    # WAL modunda okuyucular (örn: dashboard) yazıcıları, yazıcılar da okuyucuları bloklamaz.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={int(config.DATABASE_BUSY_TIMEOUT_SECONDS * 1000)}")
+    return conn
+
+def _connect() -> sqlite3.Connection:
+    """Çağıran thread için havuza kaydedilen yeni bir bağlantı açar."""
+    conn = _open_connection()
+    with _connections_lock:
+        # Sonlanmış thread'lerden (örn: tarama havuzu işçileri) kalan bağlantılar burada kapatılır.
+        for thread in [t for t in _connections if not t.is_alive()]:
+            _connections.pop(thread).close()
+        _connections[threading.current_thread()] = conn
+    return conn
+
+def _get_thread_connection() -> sqlite3.Connection:
+    """Çağıran thread'e ait havuzlanmış bağlantıyı döndürür; yoksa oluşturur."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = _local.conn = _connect()
+    return conn
 
 @contextmanager
 def get_db_connection():
-    """Veritabanı bağlantısı oluşturur ve bir context manager olarak sunar."""
-    conn = None
+    """
+    Çağıran thread'in kalıcı bağlantısını okuma amaçlı sunar. Bağlantı kapatılmaz; hazır ifadeler
+    (prepared statements) çağrılar arasında yeniden kullanılır. Yazmalar için `write_transaction` kullanılmalıdır.
+    """
+    yield _get_thread_connection()
+
+@contextmanager
+def write_transaction():
+    """
+    Tüm yazmaların geçtiği tek yol. Süreç içinde yazmaları tek bir kilitle sıraya sokar, diğer süreçlere
+    karşı `BEGIN IMMEDIATE` ile yazma kilidini baştan alır; hata olursa işlemi geri alır.
+    İç içe çağrılar dıştaki işleme dahil olur.
+    """
+    conn = _get_thread_connection()
+    with _write_lock:
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            # İşlem içinde bellekteki kayıtlara yansıtılmış değişiklikler geri alınmış olabilir.
+            _registry.invalidate()
+            raise
+
+@contextmanager
+def unit_of_work():
+    """
+    Blok süresince ÇAĞIRAN thread'in yazmalarını (pozisyon ekleme/güncelleme/silme, geçmiş kaydı) sıraya alır ve
+    blok sonunda geliş sırasıyla tek bir işlemde (tek commit) uygular. Diğer thread'lerin (web, Telegram, tarayıcı)
+    yazmaları sıraya girmez; her zamanki gibi hemen kendi işlemlerinde kaydedilir. Değişiklikler bellekteki
+    pozisyon kaydına anında yansır; böylece sonraki okumalar güncel durumu görür. Blok hata ile biterse sıradaki
+    yazmalar kalıcı olmaz ve bellekteki kayıt veritabanından yeniden yüklenir. Commit başarısız olursa hata
+    çağırana iletilir. Blok süresince veritabanı kilidi tutulmaz; borsa istekleri diğer yazıcıları bekletmez.
+    """
+    global _active_units
+    if getattr(_local, "pending_writes", None) is not None:
+        yield
+        return
+    _local.pending_writes = []
+    with _active_units_lock:
+        _active_units += 1
     try:
-        # check_same_thread=False, Telegram botu gibi çoklu thread ortamları için gereklidir.
-        conn = sqlite3.connect(DB_FILE, check_same_thread=False)
-        conn.row_factory = sqlite3.Row
-        yield conn
-    except Exception as e:
-        logging.error(f"Veritabanı bağlantı hatası: {e}", exc_info=True)
+        try:
+            yield
+        except BaseException:
+            _registry.invalidate()
+            raise
+        pending = _local.pending_writes
+        if not pending:
+            return
+        try:
+            with write_transaction() as conn:
+                for sql, params in pending:
+                    conn.execute(sql, params)
+        except Exception as e:
+            logging.error(f"VERİTABANI: Toplu yazma geri alındı ({len(pending)} değişiklik): {e}")
+            _registry.invalidate()
+            raise
+        logging.info(f"VERİTABANI: {len(pending)} değişiklik tek işlemde kaydedildi.")
     finally:
-        if conn:
-            conn.close()
+        _local.pending_writes = None
+        with _active_units_lock:
+            _active_units -= 1
 
-def init_db():
-    """Veritabanı tablolarını (eğer yoksa) oluşturur ve şema güncellemelerini yapar."""
+def _enqueue_write(sql: str, params: tuple) -> bool:
+    """Çağıran thread'de etkin bir `unit_of_work` varsa yazmayı sıraya ekleyip True döndürür."""
+    return _enqueue_writes([(sql, params)])
+
+def _enqueue_writes(statements: list[tuple[str, tuple]]) -> bool:
+    pending = getattr(_local, "pending_writes", None)
+    if pending is None:
+        return False
+    pending.extend(statements)
+    return True
+
+def _guarded_sl_update(symbol: str, new_sl: float, expected_sl: float) -> tuple[str, tuple]:
+    """
+    Sıraya alınan SL güncellemesi, satırdaki SL hâlâ sıraya alındığı andaki değerse uygulanır. Böylece blok
+    sürerken başka bir thread'in (örn: işaret fiyatı akışı) hemen kaydettiği daha yeni SL, commit sırasında ezilmez.
+    """
+    return "UPDATE managed_positions SET stop_loss = ? WHERE symbol = ? AND stop_loss = ?", (new_sl, symbol, expected_sl)
+
+def _execute_write(sql: str, params: tuple):
+    """Çağıran thread'de etkin bir `unit_of_work` varsa yazmayı sıraya alır, yoksa hemen kendi işleminde uygular."""
+    _execute_writes([(sql, params)])
+
+def _execute_writes(statements: list[tuple[str, tuple]]):
+    """Birbirine bağlı yazmaları aynı işlemde (veya aynı toplu yazma sırasında, ardışık olarak) uygular."""
+    if _enqueue_writes(statements):
+        return
+    with write_transaction() as conn:
+        for sql, params in statements:
+            conn.execute(sql, params)
+
+def close_all_connections():
+    """Havuzdaki tüm bağlantıları kapatır (kapanış sırasında çağrılır)."""
+    with _connections_lock:
+        for conn in _connections.values():
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        _connections.clear()
+    _local.__dict__.pop("conn", None)
+
+def shutdown():
+    """
+    Kapanışta çağrılır: WAL dosyasındaki sayfaları ana veritabanı dosyasına aktarır (checkpoint), WAL'ı
+    sıfırlar ve tüm bağlantıları kapatır. Böylece yalnızca veritabanı dosyası kopyalansa bile veri eksik kalmaz.
+    """
     try:
-        with get_db_connection() as conn:
-            if not conn:
-                logging.error("Veritabanı başlatılamadı: Bağlantı kurulamadı.")
+        with _write_lock, get_db_connection() as conn:
+            busy, _, _ = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+        if busy:
+            logging.warning("VERİTABANI: Kapanışta WAL checkpoint'i başka bir bağlantı tarafından engellendi; WAL dosyası korunuyor.")
+    except sqlite3.Error as e:
+        logging.warning(f"VERİTABANI: Kapanışta WAL checkpoint'i yapılamadı: {e}")
+    finally:
+        _registry.close()
+        close_all_connections()
+
+_POSITION_FIELDS = (
+    "id", "symbol", "side", "amount", "entry_price", "timeframe", "leverage", "stop_loss", "take_profit",
+    "created_at", "initial_stop_loss", "initial_amount", "partial_tp_executed", "realized_pnl",
+)
+
+class PositionRecord:
+    """managed_positions tablosundaki tek bir satırın bellekteki karşılığı."""
+    __slots__ = _POSITION_FIELDS
+
+    def __init__(self, row):
+        for field in _POSITION_FIELDS:
+            setattr(self, field, row[field])
+
+    def to_dict(self) -> dict:
+        return {field: getattr(self, field) for field in _POSITION_FIELDS}
+
+
+class PositionRegistry:
+    """
+    Yönetilen pozisyonların sembole göre indekslenmiş bellekteki kaydı. Yazma fonksiyonları değişiklikleri
+    hem SQLite'a hem de bu kayda işler. Başka bir süreç (örn: dashboard) veritabanını değiştirdiğinde bu durum
+    `PRAGMA data_version` ile ucuzca fark edilir ve kayıt tablodan yeniden yüklenir.
+    """
+
+    def __init__(self):
+        self._records: dict[str, PositionRecord] = {}
+        self._reserved: set[str] = set()
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._version_conn = None
+        self._data_version = None
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded = False
+
+    def close(self):
+        with self._lock:
+            if self._version_conn is not None:
+                self._version_conn.close()
+                self._version_conn = None
+            self._loaded = False
+
+    def _ensure_loaded(self):
+        """Kilit altında çağrılır. Kayıt yüklenmemişse veya veritabanı dışarıdan değiştiyse tablodan yükler."""
+        if self._version_conn is None:
+            self._version_conn = _open_connection()
+        data_version = self._version_conn.execute("PRAGMA data_version").fetchone()[0]
+        # Toplu yazma sıradayken bellekteki kayıt veritabanından daha günceldir; yeniden yüklenmez.
+        if self._loaded and (data_version == self._data_version or _active_units):
+            return
+        rows = self._version_conn.execute("SELECT * FROM managed_positions").fetchall()
+        self._records = {row["symbol"]: PositionRecord(row) for row in rows}
+        self._data_version = data_version
+        self._loaded = True
+
+    def all(self) -> list[dict]:
+        with self._lock:
+            self._ensure_loaded()
+            return [record.to_dict() for record in self._records.values()]
+
+    def get(self, symbol: str) -> dict | None:
+        with self._lock:
+            self._ensure_loaded()
+            record = self._records.get(symbol)
+            return record.to_dict() if record else None
+
+    def count(self) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._records)
+
+    def reserve(self, symbol: str, limit: int) -> bool:
+        """
+        Yeni pozisyon için yer ayırır. Aktif ve rezerve edilmiş pozisyonların toplamı `limit`e ulaştıysa
+        veya sembol zaten yönetiliyorsa False döner. Kontrol ve ayırma aynı kilit altında yapıldığından,
+        aynı anda pozisyon açmaya çalışan thread'ler limiti aşamaz.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            if symbol in self._records or symbol in self._reserved:
+                return False
+            if len(self._records) + len(self._reserved) >= limit:
+                return False
+            self._reserved.add(symbol)
+            return True
+
+    def release(self, symbol: str):
+        with self._lock:
+            self._reserved.discard(symbol)
+
+    def put(self, row):
+        with self._lock:
+            self._ensure_loaded()
+            self._records[row["symbol"]] = PositionRecord(row)
+
+    def update(self, symbol: str, **fields):
+        with self._lock:
+            self._ensure_loaded()
+            record = self._records.get(symbol)
+            if record is None:
                 return
+            for field, value in fields.items():
+                setattr(record, field, value)
+
+    def pop(self, symbol: str):
+        with self._lock:
+            self._ensure_loaded()
+            self._records.pop(symbol, None)
+
+
+_registry = PositionRegistry()
+
+@_timed
+def get_position(symbol: str) -> dict | None:
+    """Tek bir yönetilen pozisyonu sembolüne göre bellekten döndürür."""
+    try:
+        return _registry.get(symbol)
+    except Exception as e:
+        logging.error(f"{symbol} pozisyonu alınırken hata: {e}", exc_info=True)
+        return None
+
+@_timed
+def count_positions() -> int:
+    """Aktif pozisyon sayısını bellekten döndürür."""
+    try:
+        return _registry.count()
+    except Exception as e:
+        logging.error(f"Pozisyon sayısı alınırken hata: {e}", exc_info=True)
+        return 0
+
+@_timed
+def reserve_position_slot(symbol: str, limit: int) -> bool:
+    """Pozisyon limiti dolmamışsa `symbol` için yer ayırır. Açma işlemi bitince `release_position_slot` çağrılmalıdır."""
+    try:
+        return _registry.reserve(symbol, limit)
+    except Exception as e:
+        logging.error(f"{symbol} için pozisyon yeri ayrılırken hata: {e}", exc_info=True)
+        return False
 
+@_timed
+def release_position_slot(symbol: str):
+    _registry.release(symbol)
+
+@_timed
+def _migrate_legacy_db_file():
+    """Proje kökündeki eski veritabanını, yeni yerinde henüz bir veritabanı yoksa oraya taşır."""
+    if DB_FILE == _LEGACY_DB_FILE or os.path.exists(DB_FILE) or not os.path.exists(_LEGACY_DB_FILE):
+        return
+    os.makedirs(os.path.dirname(DB_FILE), exist_ok=True)
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(_LEGACY_DB_FILE + suffix):
+            os.replace(_LEGACY_DB_FILE + suffix, DB_FILE + suffix)
+    logging.info(f"VERİTABANI: {_LEGACY_DB_FILE} dosyası {DB_FILE} konumuna taşındı.")
+
+def init_db():
+    """Veritabanı tablolarını (eğer yoksa) oluşturur ve şema güncellemelerini yapar."""
+    try:
+        _migrate_legacy_db_file()
+        with write_transaction() as conn:
             # Yönetilen pozisyonları tutan ana tablo
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS managed_positions (
@@ -68,6 +385,28 @@ def init_db():
                 )
             ''')
 
+            # İşlem geçmişinden türetilen, her kayıtta güncellenen özet tablolar (dashboard istatistikleri için).
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS trade_stats (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    total_pnl REAL NOT NULL DEFAULT 0.0,
+                    total_trades INTEGER NOT NULL DEFAULT 0,
+                    winning_trades INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS symbol_stats (
+                    symbol TEXT PRIMARY KEY,
+                    total_pnl REAL NOT NULL DEFAULT 0.0,
+                    total_trades INTEGER NOT NULL DEFAULT 0,
+                    winning_trades INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+
+            # Dashboard'un sayfalı geçmiş sorguları için indeksler.
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_trade_history_closed_at ON trade_history (closed_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_trade_history_symbol_closed_at ON trade_history (symbol, closed_at)")
+
             # --- Şema Güncelleme (Migration) ---
             # Programın eski versiyonlarından geçiş yapanlar için eksik sütunları ekler.
             cursor = conn.cursor()
@@ -83,73 +422,222 @@ def init_db():
             if 'realized_pnl' not in columns:
                 cursor.execute('ALTER TABLE managed_positions ADD COLUMN realized_pnl REAL DEFAULT 0.0')
 
-            conn.commit()
+            cursor.execute("PRAGMA table_info(trade_history)")
+            if 'cumulative_pnl' not in [row[1] for row in cursor.fetchall()]:
+                cursor.execute('ALTER TABLE trade_history ADD COLUMN cumulative_pnl REAL')
+
+            # Özetler geçmişle uyuşmuyorsa (ilk kurulum veya eski sürümden geçiş) bir kez baştan hesaplanır.
+            history_count = cursor.execute("SELECT COUNT(*) FROM trade_history").fetchone()[0]
+            stats_row = cursor.execute("SELECT total_trades FROM trade_stats WHERE id = 1").fetchone()
+            if stats_row is None or stats_row[0] != history_count:
+                _rebuild_trade_aggregates(conn)
+
             logging.info("Veritabanı tabloları başarıyla kontrol edildi/oluşturuldu.")
     except Exception as e:
         logging.error(f"Veritabanı başlatılırken kritik bir hata oluştu: {e}", exc_info=True)
 
 
+def _rebuild_trade_aggregates(conn):
+    """trade_history'den kümülatif PNL sütununu ve özet tabloları yeniden oluşturur."""
+    cumulative = 0.0
+    updates, per_symbol = [], {}
+    total_trades = winning_trades = 0
+    for row in conn.execute("SELECT id, symbol, pnl FROM trade_history ORDER BY id"):
+        cumulative += row['pnl']
+        updates.append((cumulative, row['id']))
+        stats = per_symbol.setdefault(row['symbol'], [0.0, 0, 0])
+        stats[0] += row['pnl']
+        stats[1] += 1
+        stats[2] += 1 if row['pnl'] > 0 else 0
+        total_trades += 1
+        winning_trades += 1 if row['pnl'] > 0 else 0
+    conn.executemany("UPDATE trade_history SET cumulative_pnl = ? WHERE id = ?", updates)
+    conn.execute("DELETE FROM symbol_stats")
+    conn.executemany("INSERT INTO symbol_stats (symbol, total_pnl, total_trades, winning_trades) VALUES (?, ?, ?, ?)",
+                     [(symbol, *stats) for symbol, stats in per_symbol.items()])
+    conn.execute("INSERT OR REPLACE INTO trade_stats (id, total_pnl, total_trades, winning_trades) VALUES (1, ?, ?, ?)",
+                 (cumulative, total_trades, winning_trades))
+    logging.info(f"VERİTABANI: İşlem geçmişi özetleri yeniden oluşturuldu ({total_trades} işlem).")
+
+
+@_timed
+def get_trade_stats() -> dict:
+    """Toplam PNL, işlem sayısı ve kazanan işlem sayısını özet tablodan tek satırda okur."""
+    try:
+        with get_db_connection() as conn:
+            row = conn.execute("SELECT total_pnl, total_trades, winning_trades FROM trade_stats WHERE id = 1").fetchone()
+            return dict(row) if row else {"total_pnl": 0.0, "total_trades": 0, "winning_trades": 0}
+    except Exception as e:
+        logging.error(f"İşlem istatistikleri alınırken hata: {e}", exc_info=True)
+        return {"total_pnl": 0.0, "total_trades": 0, "winning_trades": 0}
+
+
+@_timed
+def get_symbol_stats() -> list[dict]:
+    """Sembol bazında toplam PNL ve işlem sayılarını döndürür."""
+    try:
+        with get_db_connection() as conn:
+            return [dict(row) for row in conn.execute("SELECT * FROM symbol_stats ORDER BY total_pnl DESC")]
+    except Exception as e:
+        logging.error(f"Sembol istatistikleri alınırken hata: {e}", exc_info=True)
+        return []
+
+
+@_timed
+def get_pnl_timeline(limit: int | None = None, max_id: int | None = None) -> list[dict]:
+    """
+    Kümülatif PNL serisini ({'x': kapanış zamanı, 'y': kümülatif PNL}) tek sorguda döndürür.
+    `limit` verilirse sadece en yeni `limit` nokta, `max_id` verilirse sadece o kayda kadarki noktalar döner.
+    """
+    sql = "SELECT id, closed_at, cumulative_pnl FROM trade_history"
+    params = []
+    if max_id is not None:
+        sql += " WHERE id <= ?"
+        params.append(max_id)
+    sql += " ORDER BY id DESC"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    try:
+        with get_db_connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+            return [{'x': row['closed_at'], 'y': row['cumulative_pnl']} for row in reversed(rows)]
+    except Exception as e:
+        logging.error(f"PNL zaman çizelgesi alınırken hata: {e}", exc_info=True)
+        return []
+
+
+@_timed
+def get_latest_trade_id() -> int:
+    """En son kaydedilen işlemin kimliğini döndürür (kayıt yoksa 0)."""
+    try:
+        with get_db_connection() as conn:
+            return conn.execute("SELECT COALESCE(MAX(id), 0) FROM trade_history").fetchone()[0]
+    except Exception as e:
+        logging.error(f"Son işlem kimliği alınırken hata: {e}", exc_info=True)
+        return 0
+
+
+@_timed
+def get_trades_after(last_id: int, limit: int) -> list[dict]:
+    """Kimliği `last_id`den büyük olan işlemleri eskiden yeniye, en fazla `limit` adet döndürür."""
+    try:
+        with get_db_connection() as conn:
+            rows = conn.execute("SELECT * FROM trade_history WHERE id > ? ORDER BY id LIMIT ?", (last_id, limit)).fetchall()
+            return [dict(row) for row in rows]
+    except Exception as e:
+        logging.error(f"Yeni işlemler alınırken hata: {e}", exc_info=True)
+        return []
+
+
+@_timed
+def get_trade_history_page(cursor: str | None = None, limit: int = 50, max_id: int | None = None) -> tuple[list[dict], str | None]:
+    """
+    İşlem geçmişini kapanış zamanına göre yeniden eskiye sayfalar halinde döndürür.
+    `cursor`, bir önceki sayfanın döndürdüğü "closed_at|id" imlecidir; son sayfada dönen imleç None olur.
+    """
+    conditions, params = [], []
+    if cursor:
+        closed_at, last_id = cursor.rsplit('|', 1)
+        conditions.append("(closed_at, id) < (?, ?)")
+        params += [closed_at, int(last_id)]
+    if max_id is not None:
+        conditions.append("id <= ?")
+        params.append(max_id)
+    where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+    try:
+        with get_db_connection() as conn:
+            rows = conn.execute(f"SELECT * FROM trade_history {where}ORDER BY closed_at DESC, id DESC LIMIT ?", (*params, limit + 1)).fetchall()
+    except Exception as e:
+        logging.error(f"İşlem geçmişi sayfası alınırken hata: {e}", exc_info=True)
+        return [], None
+    page = [dict(row) for row in rows[:limit]]
+    next_cursor = f"{page[-1]['closed_at']}|{page[-1]['id']}" if len(rows) > limit else None
+    return page, next_cursor
+
+
+@_timed
 def add_position(pos: dict):
     """managed_positions tablosuna yeni bir pozisyon ekler."""
     sql = '''INSERT INTO managed_positions 
-             (symbol, side, amount, initial_amount, entry_price, timeframe, leverage, stop_loss, take_profit, initial_stop_loss, realized_pnl) 
-             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'''
+             (symbol, side, amount, initial_amount, entry_price, timeframe, leverage, stop_loss, take_profit, initial_stop_loss, realized_pnl, created_at) 
+             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'''
     try:
-        with get_db_connection() as conn:
-            if not conn: return
-            initial_amount = pos['amount']
-            initial_sl = pos['stop_loss']
-            conn.execute(sql, (
-                pos['symbol'], pos['side'], pos['amount'], initial_amount, 
-                pos['entry_price'], pos['timeframe'], pos['leverage'], 
-                pos['stop_loss'], pos['take_profit'], initial_sl,
-                0.0 # Yeni pozisyon için realize edilmiş PNL başlangıçta sıfırdır.
-            ))
-            conn.commit()
-            logging.info(f"VERİTABANI: Yeni pozisyon eklendi -> {pos['symbol']}")
+        initial_amount = pos['amount']
+        initial_sl = pos['stop_loss']
+        # CURRENT_TIMESTAMP ile aynı biçim (UTC); kayıt toplu yazma sırasında sıraya alınsa da bellekte hemen oluşturulabilsin diye.
+        created_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        params = (
+            pos['symbol'], pos['side'], pos['amount'], initial_amount, 
+            pos['entry_price'], pos['timeframe'], pos['leverage'], 
+            pos['stop_loss'], pos['take_profit'], initial_sl,
+            0.0, # Yeni pozisyon için realize edilmiş PNL başlangıçta sıfırdır.
+            created_at
+        )
+        if _registry.get(pos['symbol']):
+            raise sqlite3.IntegrityError(f"UNIQUE constraint failed: managed_positions.symbol ({pos['symbol']})")
+        if _enqueue_write(sql, params):
+            _registry.put(dict(zip(
+                ("symbol", "side", "amount", "initial_amount", "entry_price", "timeframe", "leverage", "stop_loss", "take_profit", "initial_stop_loss", "realized_pnl", "created_at"),
+                params), id=None, partial_tp_executed=0))
+        else:
+            with write_transaction() as conn:
+                conn.execute(sql, params)
+                _registry.put(conn.execute("SELECT * FROM managed_positions WHERE symbol = ?", (pos['symbol'],)).fetchone())
+        logging.info(f"VERİTABANI: Yeni pozisyon eklendi -> {pos['symbol']}")
     except sqlite3.IntegrityError:
         logging.warning(f"VERİTABANI UYARI: {pos['symbol']} için zaten aktif bir pozisyon mevcut. Ekleme yapılmadı.")
     except Exception as e:
         logging.error(f"Pozisyon eklenirken hata: {e}", exc_info=True)
 
 
+@_timed
 def update_position_after_partial_tp(symbol: str, new_amount: float, new_sl: float, realized_pnl: float):
     """Kısmi kâr alındıktan sonra pozisyonu günceller, durumu ve realize PNL'i işaretler."""
     sql = "UPDATE managed_positions SET amount = ?, stop_loss = ?, partial_tp_executed = 1, realized_pnl = ? WHERE symbol = ?"
     try:
-        with get_db_connection() as conn:
-            if not conn: return
-            conn.execute(sql, (new_amount, new_sl, realized_pnl, symbol))
-            conn.commit()
-            logging.info(f"VERİTABANI: {symbol} için Kısmi TP sonrası pozisyon güncellendi. Toplam Realize PNL: {realized_pnl:.2f}")
+        current = _registry.get(symbol)
+        if not (current and _enqueue_writes([
+            ("UPDATE managed_positions SET amount = ?, partial_tp_executed = 1, realized_pnl = ? WHERE symbol = ? AND partial_tp_executed = 0",
+             (new_amount, realized_pnl, symbol)),
+            _guarded_sl_update(symbol, new_sl, current['stop_loss']),
+        ])):
+            _execute_write(sql, (new_amount, new_sl, realized_pnl, symbol))
+        _registry.update(symbol, amount=new_amount, stop_loss=new_sl, partial_tp_executed=1, realized_pnl=realized_pnl)
+        logging.info(f"VERİTABANI: {symbol} için Kısmi TP sonrası pozisyon güncellendi. Toplam Realize PNL: {realized_pnl:.2f}")
     except Exception as e:
         logging.error(f"Kısmi TP sonrası veritabanı güncellenirken hata: {e}", exc_info=True)
 
 
+@_timed
 def get_all_positions() -> list[dict]:
-    """Tüm aktif pozisyonları veritabanından çeker."""
+    """Tüm aktif pozisyonları bellekteki kayıttan döndürür."""
     try:
-        with get_db_connection() as conn:
-            if not conn: return []
-            cursor = conn.execute('SELECT * FROM managed_positions')
-            return [dict(row) for row in cursor.fetchall()]
+        return _registry.all()
     except Exception as e:
         logging.error(f"Tüm pozisyonlar alınırken hata: {e}", exc_info=True)
         return []
 
 
+@_timed
 def remove_position(symbol: str) -> dict | None:
     """Bir pozisyonu sembolüne göre aktif tablodan siler ve silinen pozisyonu döndürür."""
     try:
-        with get_db_connection() as conn:
-            if not conn: return None
+        # Toplu yazma sırasında silinecek kayıt, sıradaki değişiklikleri de içeren bellekteki kayıttan alınır.
+        pos_to_remove = _registry.get(symbol)
+        if pos_to_remove and _enqueue_write("DELETE FROM managed_positions WHERE symbol = ?", (symbol,)):
+            _registry.pop(symbol)
+            logging.info(f"VERİTABANI: Pozisyon silindi -> {symbol}")
+            return pos_to_remove
+
+        with write_transaction() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM managed_positions WHERE symbol = ?", (symbol,))
             pos_to_remove = cursor.fetchone()
             
             if pos_to_remove:
                 cursor.execute("DELETE FROM managed_positions WHERE symbol = ?", (symbol,))
-                conn.commit()
+                _registry.pop(symbol)
                 logging.info(f"VERİTABANI: Pozisyon silindi -> {symbol}")
                 return dict(pos_to_remove)
             return None
@@ -158,46 +646,54 @@ def remove_position(symbol: str) -> dict | None:
         return None
 
 
+@_timed
 def update_position_sl(symbol: str, new_sl: float):
     """Bir pozisyonun sadece stop-loss değerini günceller."""
     sql = "UPDATE managed_positions SET stop_loss = ? WHERE symbol = ?"
     try:
-        with get_db_connection() as conn:
-            if not conn: return
-            conn.execute(sql, (new_sl, symbol))
-            conn.commit()
-            logging.info(f"VERİTABANI: {symbol} için SL güncellendi -> {new_sl}")
+        current = _registry.get(symbol)
+        if not (current and _enqueue_write(*_guarded_sl_update(symbol, new_sl, current['stop_loss']))):
+            _execute_write(sql, (new_sl, symbol))
+        _registry.update(symbol, stop_loss=new_sl)
+        logging.info(f"VERİTABANI: {symbol} için SL güncellendi -> {new_sl}")
     except Exception as e:
         logging.error(f"SL güncellenirken hata: {e}", exc_info=True)
 
 
+@_timed
 def log_trade_to_history(closed_pos: dict, close_price: float, status: str):
     """Kapanan bir işlemi geçmiş tablosuna kaydeder."""
+    # Kümülatif PNL, son kaydın değeri üzerine eklenerek yazılır; özet tablolar aynı işlemde güncellenir.
     sql = '''INSERT INTO trade_history 
-             (symbol, side, amount, entry_price, close_price, pnl, status, opened_at) 
-             VALUES (?, ?, ?, ?, ?, ?, ?, ?)'''
+             (symbol, side, amount, entry_price, close_price, pnl, status, opened_at, cumulative_pnl) 
+             VALUES (?, ?, ?, ?, ?, ?, ?, ?, COALESCE((SELECT cumulative_pnl FROM trade_history ORDER BY id DESC LIMIT 1), 0) + ?)'''
+    stats_sql = '''INSERT INTO trade_stats (id, total_pnl, total_trades, winning_trades) VALUES (1, ?, 1, ?)
+                  ON CONFLICT(id) DO UPDATE SET total_pnl = total_pnl + excluded.total_pnl,
+                  total_trades = total_trades + 1, winning_trades = winning_trades + excluded.winning_trades'''
+    symbol_stats_sql = '''INSERT INTO symbol_stats (symbol, total_pnl, total_trades, winning_trades) VALUES (?, ?, 1, ?)
+                         ON CONFLICT(symbol) DO UPDATE SET total_pnl = total_pnl + excluded.total_pnl,
+                         total_trades = total_trades + 1, winning_trades = winning_trades + excluded.winning_trades'''
     try:
-        with get_db_connection() as conn:
-            if not conn: return
-            
-            # Geçmişe kaydederken, pozisyonun ORİJİNAL miktarını kullanırız.
-            initial_amount = closed_pos.get('initial_amount') or closed_pos.get('amount')
-            
-            # Pozisyonun kalan kısmının PNL'ini hesapla
-            remaining_amount_pnl = calculate_pnl(
-                closed_pos.get('side', ''), 
-                closed_pos.get('entry_price', 0), 
-                close_price, 
-                closed_pos.get('amount', 0)
-            )
-            
-            # Varsa, kısmi kâr almadan dolayı önceden realize edilmiş PNL'i al
-            previously_realized_pnl = closed_pos.get('realized_pnl', 0.0)
-            
-            # Toplam PNL = Önceki Kazanç (kısmi TP'den) + Son Kapanışın Kazancı
-            total_pnl = previously_realized_pnl + remaining_amount_pnl
+        # Geçmişe kaydederken, pozisyonun ORİJİNAL miktarını kullanırız.
+        initial_amount = closed_pos.get('initial_amount') or closed_pos.get('amount')
+        
+        # Pozisyonun kalan kısmının PNL'ini hesapla
+        remaining_amount_pnl = calculate_pnl(
+            closed_pos.get('side', ''), 
+            closed_pos.get('entry_price', 0), 
+            close_price, 
+            closed_pos.get('amount', 0)
+        )
+        
+        # Varsa, kısmi kâr almadan dolayı önceden realize edilmiş PNL'i al
+        previously_realized_pnl = closed_pos.get('realized_pnl', 0.0)
+        
+        # Toplam PNL = Önceki Kazanç (kısmi TP'den) + Son Kapanışın Kazancı
+        total_pnl = previously_realized_pnl + remaining_amount_pnl
 
-            conn.execute(sql, (
+        is_win = 1 if total_pnl > 0 else 0
+        _execute_writes([
+            (sql, (
                 closed_pos.get('symbol'), 
                 closed_pos.get('side'), 
                 initial_amount, # Geçmişe ORİJİNAL miktarı kaydet
@@ -205,9 +701,12 @@ def log_trade_to_history(closed_pos: dict, close_price: float, status: str):
                 close_price, 
                 total_pnl, # Geçmişe TOPLAM PNL'i kaydet
                 status, 
-                closed_pos.get('created_at')
-            ))
-            conn.commit()
-            logging.info(f"VERİTABANI: İşlem geçmişe kaydedildi -> {closed_pos.get('symbol')}, PNL: {total_pnl:.2f} USDT, Durum: {status}")
+                closed_pos.get('created_at'),
+                total_pnl
+            )),
+            (stats_sql, (total_pnl, is_win)),
+            (symbol_stats_sql, (closed_pos.get('symbol'), total_pnl, is_win)),
+        ])
+        logging.info(f"VERİTABANI: İşlem geçmişe kaydedildi -> {closed_pos.get('symbol')}, PNL: {total_pnl:.2f} USDT, Durum: {status}")
     except Exception as e:
         logging.error(f"İşlem geçmişi kaydedilirken hata: {e}", exc_info=True)
@@ -0,0 +1,95 @@
+# decision_cache.py
+# @author: Memba Co.
+
+import time
+import hashlib
+import threading
+
+import config
+import metrics
+from market_data import timeframe_to_ms
+
+# Osilatör türü göstergeler (0-100 aralığı) mutlak adımla, fiyat ölçekli göstergeler ise
+# anlık fiyatın yüzdesi olarak belirlenen adımla kuantize edilir.
+_OSCILLATOR_KEYS = {"rsi", "stoch_k", "stoch_d", "adx"}
+
+
+def _quantize(value, step: float):
+    if not isinstance(value, (int, float)) or step <= 0:
+        return value
+    return round(value / step)
+
+
+class DecisionCache:
+    """
+    LLM ticaret kararlarını, girdilerin kuantize edilmiş bir parmak izine göre saklar.
+    Kayıtlar TTL dolduğunda veya giriş zaman aralığında yeni bir mum kapandığında geçersiz olur.
+    """
+
+    def __init__(self, ttl_seconds: float, oscillator_step: float, price_step_percent: float, max_entries: int = 1000):
+        self.ttl_seconds = ttl_seconds
+        self.oscillator_step = oscillator_step
+        self.price_step_percent = price_step_percent
+        self.max_entries = max_entries
+        self._entries: dict[str, tuple[float, dict]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def fingerprint(self, symbol: str, entry_tf: str, data: dict) -> str:
+        """Analiz girdilerinden, küçük dalgalanmalara duyarsız bir anahtar üretir."""
+        price_step = data["current_price"] * self.price_step_percent / 100
+        parts = [symbol, entry_tf]
+        for group in ("entry_indicators", "trend_indicators"):
+            for key, value in sorted(data[group].items()):
+                step = self.oscillator_step if key in _OSCILLATOR_KEYS else price_step
+                parts.append(f"{group}.{key}={_quantize(value, step)}")
+        sentiment = data["market_sentiment"]
+        parts.append(f"funding={_quantize(sentiment.get('funding_rate'), 0.00005)}")
+        parts.append(f"bid_ask={_quantize(sentiment.get('bid_ask_ratio'), 0.25)}")
+        parts.append(f"news={data.get('news_data')}")
+        return hashlib.sha1("|".join(map(str, parts)).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.time():
+                self.hits += 1
+                return dict(entry[1])
+            if entry:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, entry_tf: str, decision: dict):
+        """Kararı, TTL ile giriş mumunun kapanış zamanından hangisi önceyse o ana kadar saklar."""
+        now = time.time()
+        tf_ms = timeframe_to_ms(entry_tf)
+        candle_close = ((int(now * 1000) // tf_ms) + 1) * tf_ms / 1000
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+                while len(self._entries) >= self.max_entries:
+                    del self._entries[next(iter(self._entries))]
+            self._entries[key] = (min(now + self.ttl_seconds, candle_close), dict(decision))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+decision_cache = DecisionCache(
+    ttl_seconds=config.LLM_DECISION_CACHE_TTL_SECONDS,
+    oscillator_step=config.LLM_DECISION_CACHE_OSCILLATOR_STEP,
+    price_step_percent=config.LLM_DECISION_CACHE_PRICE_STEP_PERCENT,
+)
+
+
+def _collect_decision_cache_metrics():
+    stats = decision_cache.stats()
+    for event in ("hits", "misses"):
+        yield ("memba_cache_events_total", "counter", "Önbellek olayları (isabet, ıskalama, yenileme...)", {"cache": "llm_decision", "event": event}, stats[event])
+    yield ("memba_cache_entries", "gauge", "Önbellekteki kayıt sayısı", {"cache": "llm_decision"}, stats["size"])
+
+
+metrics.registry.register_collector(_collect_decision_cache_metrics)
@@ -0,0 +1,471 @@
+# exchange_simulator.py
+# @author: Memba Co.
+
+import os
+import csv
+import time
+import random
+import threading
+import zlib
+from collections import Counter
+from datetime import datetime, timezone
+
+import numpy as np
+import ccxt
+
+import config
+from market_data import timeframe_to_ms
+
+_MINUTE_MS = 60_000
+_FUNDING_INTERVAL_MS = 8 * 3_600_000
+
+
+def _hash_noise(values: np.ndarray, seed: int) -> np.ndarray:
+    """Tam sayı dizisinden platformdan bağımsız, deterministik [-1, 1) aralığında gürültü üretir (splitmix64)."""
+    x = values.astype(np.uint64) + np.uint64(seed)
+    x = (x + np.uint64(0x9E3779B97F4A7C15))
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    x = x ^ (x >> np.uint64(31))
+    return (x >> np.uint64(11)).astype(np.float64) / float(1 << 52) - 1.0
+
+
+class _SyntheticSeries:
+    """
+    Bir sembol için fiyatı dakikanın saf bir fonksiyonu olarak üreten sentetik seri.
+    Farklı periyotlardaki dalgalar ve dakika bazlı gürültü ile trend/yatay dönemler oluşur;
+    aynı tohum (seed) ve zaman için her zaman aynı değerler döner.
+    """
+
+    def __init__(self, symbol: str, seed: int):
+        self.seed = zlib.crc32(f"{seed}:{symbol}".encode("utf-8"))
+        rng = random.Random(self.seed)
+        self.base_price = 10 ** rng.uniform(-1, 4.5)
+        self.waves = [(rng.uniform(0.04, 0.12), rng.uniform(2, 6) * 1440, rng.uniform(0, 6.283)),
+                      (rng.uniform(0.01, 0.03), rng.uniform(4, 10) * 60, rng.uniform(0, 6.283)),
+                      (rng.uniform(0.002, 0.008), rng.uniform(20, 60), rng.uniform(0, 6.283))]
+        self.noise = rng.uniform(0.0005, 0.002)
+        self.base_volume = rng.uniform(5e4, 5e6) / self.base_price
+
+    def prices(self, minutes: np.ndarray) -> np.ndarray:
+        log_price = self.noise * _hash_noise(minutes, self.seed)
+        for amplitude, period, phase in self.waves:
+            log_price += amplitude * np.sin(2 * np.pi * minutes / period + phase)
+        return self.base_price * np.exp(log_price)
+
+    def price_at(self, now_ms: int) -> float:
+        return float(self.prices(np.array([now_ms // _MINUTE_MS], dtype=np.int64))[0])
+
+    def ohlcv(self, start_ms: int, tf_ms: int, count: int, now_ms: int) -> list[list]:
+        minutes_per_bar = max(1, tf_ms // _MINUTE_MS)
+        first_minute = start_ms // _MINUTE_MS
+        minutes = np.arange(first_minute, first_minute + count * minutes_per_bar, dtype=np.int64)
+        prices = self.prices(minutes).reshape(count, minutes_per_bar)
+        volumes = self.base_volume * (1.0 + 0.5 * _hash_noise(minutes, self.seed + 1)).reshape(count, minutes_per_bar)
+        now_minute = now_ms // _MINUTE_MS
+        bars = []
+        for i in range(count):
+            # Henüz kapanmamış mum, sadece şu ana kadarki dakikalardan oluşur.
+            filled = int(min(minutes_per_bar, now_minute - (first_minute + i * minutes_per_bar) + 1))
+            if filled <= 0:
+                break
+            row = prices[i, :filled]
+            bars.append([start_ms + i * tf_ms, float(row[0]), float(row.max()), float(row.min()), float(row[-1]), float(volumes[i, :filled].sum())])
+        return bars
+
+
+class _RecordedSeries:
+    """
+    `timestamp,open,high,low,close,volume` sütunlu 1 dakikalık bir CSV dosyasını yeniden oynatır;
+    daha büyük zaman aralıkları bu mumlardan birleştirilerek üretilir.
+    """
+
+    def __init__(self, path: str):
+        with open(path, newline="") as f:
+            rows = [row for row in csv.reader(f) if row and row[0].isdigit()]
+        data = np.array([[float(v) for v in row[:6]] for row in rows], dtype=np.float64).reshape(-1, 6)
+        self.timestamps = data[:, 0].astype(np.int64)
+        self.open, self.high, self.low, self.close, self.volume = (data[:, k] for k in range(1, 6))
+        self.base_volume = float(self.volume.mean()) if len(self.volume) else 0.0
+
+    def price_at(self, now_ms: int) -> float:
+        index = max(0, int(np.searchsorted(self.timestamps, now_ms, side="right")) - 1)
+        return float(self.close[index])
+
+    def ohlcv(self, start_ms: int, tf_ms: int, count: int, now_ms: int) -> list[list]:
+        lo = int(np.searchsorted(self.timestamps, start_ms, side="left"))
+        hi = int(np.searchsorted(self.timestamps, min(start_ms + count * tf_ms, now_ms + 1), side="left"))
+        if hi <= lo:
+            return []
+        groups = (self.timestamps[lo:hi] - start_ms) // tf_ms
+        starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+        ends = np.r_[starts[1:], len(groups)]
+        return [[int(start_ms + groups[a] * tf_ms), float(self.open[lo + a]), float(self.high[lo + a:lo + b].max()),
+                 float(self.low[lo + a:lo + b].min()), float(self.close[lo + b - 1]), float(self.volume[lo + a:lo + b].sum())]
+                for a, b in zip(starts, ends)]
+
+
+def _endpoint(method):
+    """Her borsa çağrısında gecikme ve hata enjeksiyonu uygular, çağrı sayacını artırır ve tetik emirlerini işler."""
+    def wrapper(self, *args, **kwargs):
+        self._before_call(method.__name__)
+        with self._lock:
+            self._process_trigger_orders()
+            return method(self, *args, **kwargs)
+    wrapper.__name__ = method.__name__
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+class SimulatedExchange:
+    """
+    `ccxt.binance`'in bu projede kullanılan metotlarını süreç içinde taklit eden deterministik borsa.
+    Piyasa verisi sentetik olarak üretilir veya `data_dir` altındaki CSV dosyalarından yeniden oynatılır.
+    Emirler anlık fiyattan doldurulur, STOP_MARKET / TAKE_PROFIT_MARKET emirleri fiyat seviyeye ulaştığında
+    tetiklenir. Gecikme (latency) ve hata oranı ayarlanabilir; `call_counts` her metodun kaç kez çağrıldığını tutar.
+    """
+
+    def __init__(self, market_type: str = "future", symbols: list[str] | None = None, seed: int = 42,
+                 latency_ms: float = 0.0, latency_jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 start_time_ms: int | None = None, speed: float = 1.0, data_dir: str | None = None,
+                 start_balance: float = 10_000.0):
+        self.options = {"defaultType": market_type.lower()}
+        self.has = {"createOrders": True}
+        self.symbols = list(symbols or config.SIMULATOR_SYMBOLS)
+        self.seed = seed
+        self.latency_ms, self.latency_jitter_ms, self.error_rate = latency_ms, latency_jitter_ms, error_rate
+        self.speed = speed
+        self.markets = {}
+        self.call_counts = Counter()
+        self.balance = start_balance
+        self.positions: dict[str, dict] = {}
+        self.open_orders: dict[str, dict] = {}
+        self.orders: dict[str, dict] = {}
+        self.leverage: dict[str, int] = {}
+        self._next_order_id = 1
+        self._rng = random.Random(seed)
+        self._lock = threading.RLock()
+        self._start_wall = time.time()
+        self._start_ms = start_time_ms if start_time_ms is not None else int(self._start_wall * 1000)
+        self._offset_ms = 0
+        self._series = {}
+        for symbol in self.symbols:
+            path = os.path.join(data_dir, f"{symbol.replace('/', '')}_1m.csv") if data_dir else None
+            self._series[symbol] = _RecordedSeries(path) if path and os.path.exists(path) else _SyntheticSeries(symbol, seed)
+
+    # --- Simülasyon kontrolü ---
+    def milliseconds(self) -> int:
+        """Simülasyon saati: başlangıç zamanı + (geçen gerçek süre x hız) + elle ilerletilen süre."""
+        return int(self._start_ms + (time.time() - self._start_wall) * 1000 * self.speed + self._offset_ms)
+
+    def advance(self, seconds: float):
+        """Simülasyon saatini ileri alır (hız 0 iken fiyatları hareket ettirmenin tek yolu)."""
+        with self._lock:
+            self._offset_ms += int(seconds * 1000)
+
+    def reset_call_counts(self):
+        self.call_counts.clear()
+
+    def _before_call(self, name: str):
+        self.call_counts[name] += 1
+        if self.latency_ms or self.latency_jitter_ms:
+            with self._lock:
+                jitter = self._rng.uniform(-self.latency_jitter_ms, self.latency_jitter_ms)
+            time.sleep(max(0.0, self.latency_ms + jitter) / 1000)
+        if self.error_rate:
+            with self._lock:
+                failed = self._rng.random() < self.error_rate
+            if failed:
+                raise ccxt.NetworkError(f"binance simülatörü: {name} için enjekte edilmiş ağ hatası")
+
+    def _market(self, symbol: str) -> str:
+        unified = symbol.split(':')[0]
+        if unified not in self._series:
+            raise ccxt.BadSymbol(f"binance simülatörü: bilinmeyen sembol {symbol}")
+        return unified
+
+    def _price(self, symbol: str, now_ms: int | None = None) -> float:
+        return self._series[symbol].price_at(now_ms if now_ms is not None else self.milliseconds())
+
+    # --- Piyasa bilgisi ---
+    def set_sandbox_mode(self, enabled: bool):
+        pass
+
+    @_endpoint
+    def load_markets(self, reload: bool = False) -> dict:
+        self.markets = {symbol: {"symbol": symbol, "base": symbol.split('/')[0], "quote": "USDT", "active": True,
+                                 "precision": {"amount": 3, "price": 6}} for symbol in self.symbols}
+        return self.markets
+
+    def amount_to_precision(self, symbol: str, amount: float) -> str:
+        return f"{float(amount):.{self.markets.get(self._market(symbol), {}).get('precision', {}).get('amount', 3)}f}"
+
+    def price_to_precision(self, symbol: str, price: float) -> str:
+        return f"{float(price):.{self.markets.get(self._market(symbol), {}).get('precision', {}).get('price', 6)}f}"
+
+    # --- Piyasa verisi ---
+    @_endpoint
+    def fetch_ohlcv(self, symbol: str, timeframe: str = "1m", since: int | None = None, limit: int | None = None, params=None) -> list[list]:
+        market = self._market(symbol)
+        tf_ms = timeframe_to_ms(timeframe)
+        limit = limit or 500
+        now_ms = self.milliseconds()
+        current_bar = now_ms // tf_ms * tf_ms
+        start_ms = -(-since // tf_ms) * tf_ms if since is not None else current_bar - (limit - 1) * tf_ms
+        count = min(limit, max(0, (current_bar - start_ms) // tf_ms + 1))
+        return self._series[market].ohlcv(start_ms, tf_ms, count, now_ms) if count else []
+
+    def _ticker(self, symbol: str, now_ms: int) -> dict:
+        last = self._price(symbol, now_ms)
+        day_ago = self._price(symbol, now_ms - 86_400_000)
+        return {"symbol": symbol, "timestamp": now_ms, "last": last, "close": last, "bid": last * 0.9999, "ask": last * 1.0001,
+                "percentage": (last / day_ago - 1) * 100, "quoteVolume": self._series[symbol].base_volume * last * 1440}
+
+    @_endpoint
+    def fetch_ticker(self, symbol: str, params=None) -> dict:
+        return self._ticker(self._market(symbol), self.milliseconds())
+
+    @_endpoint
+    def fetch_tickers(self, symbols: list[str] | None = None, params=None) -> dict:
+        now_ms = self.milliseconds()
+        return {symbol: self._ticker(symbol, now_ms) for symbol in (symbols or self.symbols)}
+
+    @_endpoint
+    def fapiPublicGetTicker24hr(self, params=None) -> list[dict]:
+        now_ms = self.milliseconds()
+        tickers = (self._ticker(symbol, now_ms) for symbol in self.symbols)
+        return [{"symbol": t["symbol"].replace('/', ''), "lastPrice": str(t["last"]), "priceChangePercent": f"{t['percentage']:.3f}",
+                 "quoteVolume": str(t["quoteVolume"])} for t in tickers]
+
+    @_endpoint
+    def fapiPublicGetTickerPrice(self, params=None) -> list[dict]:
+        now_ms = self.milliseconds()
+        return [{"symbol": symbol.replace('/', ''), "price": str(self._price(symbol, now_ms))} for symbol in self.symbols]
+
+    def _funding(self, symbol: str, now_ms: int) -> dict:
+        period = now_ms // _FUNDING_INTERVAL_MS
+        rate = 0.0001 * (1 + float(_hash_noise(np.array([period], dtype=np.int64), zlib.crc32(symbol.encode()))[0]))
+        return {"rate": rate, "next": (period + 1) * _FUNDING_INTERVAL_MS, "mark": self._price(symbol, now_ms)}
+
+    @_endpoint
+    def fapiPublicGetPremiumIndex(self, params=None) -> list[dict]:
+        now_ms = self.milliseconds()
+        result = []
+        for symbol in self.symbols:
+            funding = self._funding(symbol, now_ms)
+            result.append({"symbol": symbol.replace('/', ''), "markPrice": str(funding["mark"]),
+                           "lastFundingRate": str(funding["rate"]), "nextFundingTime": funding["next"]})
+        return result
+
+    @_endpoint
+    def fetch_funding_rate(self, symbol: str, params=None) -> dict:
+        market = self._market(symbol)
+        funding = self._funding(market, self.milliseconds())
+        return {"symbol": f"{market}:USDT", "fundingRate": funding["rate"], "markPrice": funding["mark"], "fundingTimestamp": funding["next"]}
+
+    @_endpoint
+    def fetch_order_book(self, symbol: str, limit: int | None = None, params=None) -> dict:
+        market = self._market(symbol)
+        now_ms = self.milliseconds()
+        price = self._price(market, now_ms)
+        levels = limit or 20
+        sizes = 1.0 + _hash_noise(np.arange(2 * levels, dtype=np.int64) + now_ms // 1000, zlib.crc32(market.encode()))
+        base_size = self._series[market].base_volume
+        bids = [[price * (1 - 0.0001 * (i + 1)), float(base_size * sizes[i])] for i in range(levels)]
+        asks = [[price * (1 + 0.0001 * (i + 1)), float(base_size * sizes[levels + i])] for i in range(levels)]
+        return {"symbol": market, "bids": bids, "asks": asks, "timestamp": now_ms}
+
+    # --- Hesap ---
+    @_endpoint
+    def fetch_balance(self, params=None) -> dict:
+        used = sum(p["contracts"] * p["entry_price"] / p["leverage"] for p in self.positions.values())
+        unrealized = sum(self._unrealized_pnl(symbol, p) for symbol, p in self.positions.items())
+        total = self.balance + unrealized
+        return {"USDT": {"free": total - used, "used": used, "total": total}, "total": {"USDT": total}}
+
+    def _unrealized_pnl(self, symbol: str, position: dict) -> float:
+        direction = 1 if position["side"] == "long" else -1
+        return direction * (self._price(symbol) - position["entry_price"]) * position["contracts"]
+
+    @_endpoint
+    def fetch_positions_risk(self, symbols: list[str] | None = None, params=None) -> list[dict]:
+        result = []
+        markets = {self._market(symbol) for symbol in symbols} if symbols else None
+        for symbol, position in self.positions.items():
+            if markets is not None and symbol not in markets:
+                continue
+            mark = self._price(symbol)
+            result.append({"symbol": f"{symbol}:USDT", "contracts": position["contracts"], "side": position["side"],
+                           "entryPrice": position["entry_price"], "markPrice": mark, "leverage": position["leverage"],
+                           "unrealizedPnl": self._unrealized_pnl(symbol, position)})
+        return result
+
+    @_endpoint
+    def set_leverage(self, leverage: int, symbol: str, params=None) -> dict:
+        self.leverage[self._market(symbol)] = int(leverage)
+        return {"symbol": symbol, "leverage": int(leverage)}
+
+    # --- Emirler ---
+    def _fill(self, symbol: str, side: str, amount: float, price: float, reduce_only: bool = False) -> float:
+        """Piyasa emrini pozisyona uygular; gerçekleşen miktarı döndürür."""
+        position = self.positions.get(symbol)
+        signed = amount if side == "buy" else -amount
+        current = 0.0 if not position else (position["contracts"] if position["side"] == "long" else -position["contracts"])
+        if reduce_only:
+            if current == 0 or (current > 0) == (signed > 0):
+                return 0.0
+            signed = max(-abs(current), min(abs(current), signed))
+
+        new = current + signed
+        if current and (current > 0) != (signed > 0):
+            closed = min(abs(current), abs(signed))
+            direction = 1 if current > 0 else -1
+            self.balance += direction * (price - position["entry_price"]) * closed
+            entry = position["entry_price"] if abs(new) > 0 and (new > 0) == (current > 0) else price
+        else:
+            entry = (abs(current) * position["entry_price"] + abs(signed) * price) / abs(new) if position else price
+
+        if abs(new) < 1e-12:
+            self.positions.pop(symbol, None)
+        else:
+            self.positions[symbol] = {"side": "long" if new > 0 else "short", "contracts": abs(new), "entry_price": entry,
+                                      "leverage": self.leverage.get(symbol, config.LEVERAGE)}
+        return abs(signed)
+
+    def _order(self, symbol: str, order_type: str, side: str, amount: float, price, params: dict, status: str, filled: float = 0.0) -> dict:
+        order_id = str(self._next_order_id)
+        self._next_order_id += 1
+        order = {"id": order_id, "clientOrderId": params.get("clientOrderId"), "symbol": symbol, "type": order_type.lower(),
+                 "side": side, "amount": amount, "price": price, "stopPrice": params.get("stopPrice"),
+                 "reduceOnly": bool(params.get("reduceOnly")), "status": status, "filled": filled, "timestamp": self.milliseconds()}
+        self.orders[order_id] = order
+        return order
+
+    def _create_order(self, symbol: str, order_type: str, side: str, amount, price=None, params=None) -> dict:
+        market = self._market(symbol)
+        params = params or {}
+        amount = float(amount)
+        order_type_lower = order_type.lower()
+        if amount <= 0:
+            raise ccxt.InvalidOrder("binance simülatörü: miktar sıfırdan büyük olmalı")
+        if order_type_lower in ("stop_market", "take_profit_market"):
+            if params.get("stopPrice") is None:
+                raise ccxt.InvalidOrder("binance simülatörü: stopPrice zorunlu")
+            order = self._order(market, order_type, side, amount, None, params, "open")
+            self.open_orders[order["id"]] = order
+            return dict(order)
+
+        last = self._price(market)
+        if order_type_lower == "limit" and price is not None and ((side == "buy" and float(price) < last) or (side == "sell" and float(price) > last)):
+            order = self._order(market, order_type, side, amount, float(price), params, "open")
+            self.open_orders[order["id"]] = order
+            return dict(order)
+        fill_price = float(price) if order_type_lower == "limit" and price is not None else last
+        filled = self._fill(market, side, amount, fill_price, bool(params.get("reduceOnly")))
+        return dict(self._order(market, order_type, side, amount, fill_price, params, "closed", filled))
+
+    def _process_trigger_orders(self):
+        """Fiyatı tetik seviyesine ulaşan stop/TP emirlerini ve fiyatı gelen limit emirleri doldurur."""
+        for order_id, order in list(self.open_orders.items()):
+            last = self._price(order["symbol"])
+            if order["type"] == "limit":
+                triggered = (order["side"] == "buy" and last <= order["price"]) or (order["side"] == "sell" and last >= order["price"])
+                fill_price = order["price"]
+            else:
+                stop = float(order["stopPrice"])
+                is_stop = order["type"] == "stop_market"
+                if order["side"] == "sell":
+                    triggered = last <= stop if is_stop else last >= stop
+                else:
+                    triggered = last >= stop if is_stop else last <= stop
+                fill_price = last
+            if triggered:
+                del self.open_orders[order_id]
+                order["filled"] = self._fill(order["symbol"], order["side"], order["amount"], fill_price, order["reduceOnly"])
+                order["status"] = "closed"
+        # Pozisyonu kapanmış sembollerdeki reduceOnly emirler borsada olduğu gibi geçersiz kalır.
+        for order_id, order in list(self.open_orders.items()):
+            if order["reduceOnly"] and order["symbol"] not in self.positions:
+                del self.open_orders[order_id]
+                order["status"] = "expired"
+
+    @_endpoint
+    def create_order(self, symbol: str, type: str, side: str, amount, price=None, params=None) -> dict:
+        return self._create_order(symbol, type, side, amount, price, params)
+
+    @_endpoint
+    def create_market_order(self, symbol: str, side: str, amount, price=None, params=None) -> dict:
+        return self._create_order(symbol, "market", side, amount, None, params)
+
+    @_endpoint
+    def create_limit_order(self, symbol: str, side: str, amount, price, params=None) -> dict:
+        return self._create_order(symbol, "limit", side, amount, price, params)
+
+    @_endpoint
+    def create_orders(self, orders: list[dict], params=None) -> list[dict]:
+        """Toplu emir: her emir ayrı değerlendirilir, reddedilenler ccxt gibi `status: rejected` olarak döner."""
+        results = []
+        for order in orders:
+            try:
+                results.append(self._create_order(order["symbol"], order["type"], order["side"], order["amount"],
+                                                  order.get("price"), order.get("params")))
+            except ccxt.BaseError as e:
+                results.append({"info": {"code": -1000, "msg": str(e)}, "status": "rejected"})
+        return results
+
+    @_endpoint
+    def fetch_open_orders(self, symbol: str | None = None, since=None, limit=None, params=None) -> list[dict]:
+        market = self._market(symbol) if symbol else None
+        return [dict(o) for o in self.open_orders.values() if market is None or o["symbol"] == market]
+
+    @_endpoint
+    def fetch_order(self, id: str | None, symbol: str | None = None, params=None) -> dict:
+        """Emri borsa kimliğiyle veya (ccxt'deki gibi) `params['clientOrderId']` ile bulur."""
+        client_order_id = (params or {}).get("clientOrderId")
+        if client_order_id is not None:
+            order = next((o for o in self.orders.values() if o["clientOrderId"] == client_order_id), None)
+        else:
+            order = self.orders.get(str(id))
+        if order is None:
+            raise ccxt.OrderNotFound(f"binance simülatörü: emir bulunamadı {client_order_id or id}")
+        return dict(order)
+
+    @_endpoint
+    def cancel_order(self, id: str, symbol: str | None = None, params=None) -> dict:
+        order = self.open_orders.pop(str(id), None)
+        if order is None:
+            raise ccxt.OrderNotFound(f"binance simülatörü: emir bulunamadı {id}")
+        order["status"] = "canceled"
+        return dict(order)
+
+    @_endpoint
+    def cancel_all_orders(self, symbol: str | None = None, params=None) -> list[dict]:
+        market = self._market(symbol) if symbol else None
+        canceled = [self.open_orders.pop(order_id) for order_id, o in list(self.open_orders.items()) if market is None or o["symbol"] == market]
+        for order in canceled:
+            order["status"] = "canceled"
+        return [dict(o) for o in canceled]
+
+    def close(self):
+        pass
+
+
+def _parse_start_time(value: str | None) -> int | None:
+    if not value:
+        return None
+    return int(datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def create_simulated_exchange(market_type: str = "future") -> SimulatedExchange:
+    """Simülatörü config.py'deki SIMULATOR_* ayarlarıyla (ortam değişkenleriyle ezilebilir) oluşturur."""
+    return SimulatedExchange(
+        market_type=market_type,
+        seed=int(os.getenv("SIMULATOR_SEED", config.SIMULATOR_SEED)),
+        latency_ms=float(os.getenv("SIMULATOR_LATENCY_MS", config.SIMULATOR_LATENCY_MS)),
+        latency_jitter_ms=float(os.getenv("SIMULATOR_LATENCY_JITTER_MS", config.SIMULATOR_LATENCY_JITTER_MS)),
+        error_rate=float(os.getenv("SIMULATOR_ERROR_RATE", config.SIMULATOR_ERROR_RATE)),
+        start_time_ms=_parse_start_time(os.getenv("SIMULATOR_START_TIME", config.SIMULATOR_START_TIME)),
+        speed=float(os.getenv("SIMULATOR_SPEED", config.SIMULATOR_SPEED)),
+        data_dir=os.getenv("SIMULATOR_DATA_DIR", config.SIMULATOR_DATA_DIR),
+        start_balance=config.SIMULATOR_START_BALANCE,
+    )
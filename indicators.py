@@ -0,0 +1,211 @@
+# indicators.py
+# @author: Memba Co.
+
+import copy
+import math
+import threading
+from collections import OrderedDict, deque
+
+import config
+
+# Not: Hesaplamalar pandas-ta'nın (TA-Lib'siz) varsayılan formüllerini birebir izler:
+# RSI/ATR/ADX için Wilder (rma, adjust=True ewm), MACD için SMA ile tohumlanan EMA,
+# Bollinger için ddof=0 standart sapma, Stochastic için SMA ile yumuşatılmış %K/%D.
+
+_EPSILON = 2.220446049250313e-16
+
+
+class _Ewm:
+    """pandas `Series.ewm(alpha=..., adjust=...).mean()` ile aynı sonucu veren artımlı ortalama."""
+    __slots__ = ("alpha", "adjust", "min_periods", "weighted", "old_wt", "nobs")
+
+    def __init__(self, alpha: float, adjust: bool, min_periods: int = 1):
+        self.alpha, self.adjust, self.min_periods = alpha, adjust, max(min_periods, 1)
+        self.weighted, self.old_wt, self.nobs = None, 1.0, 0
+
+    def update(self, value: float | None) -> float | None:
+        is_observation = value is not None and not math.isnan(value)
+        if self.weighted is None:
+            if is_observation:
+                self.weighted, self.nobs = value, 1
+        else:
+            self.old_wt *= 1.0 - self.alpha
+            if is_observation:
+                self.nobs += 1
+                new_wt = 1.0 if self.adjust else self.alpha
+                if self.weighted != value:
+                    self.weighted = (self.old_wt * self.weighted + new_wt * value) / (self.old_wt + new_wt)
+                self.old_wt = self.old_wt + new_wt if self.adjust else 1.0
+        return self.weighted if self.nobs >= self.min_periods else None
+
+
+class _Rma(_Ewm):
+    """pandas-ta `rma`: alpha=1/length, adjust=True, min_periods=length."""
+    __slots__ = ()
+
+    def __init__(self, length: int):
+        super().__init__(1.0 / length, adjust=True, min_periods=length)
+
+
+class _Ema:
+    """pandas-ta `ema`: ilk `length` değerin SMA'sı ile tohumlanan, adjust=False EMA."""
+    __slots__ = ("length", "seed", "ewm")
+
+    def __init__(self, length: int):
+        self.length = length
+        self.seed: list[float] = []
+        self.ewm = _Ewm(2.0 / (length + 1), adjust=False)
+
+    def update(self, value: float) -> float | None:
+        if len(self.seed) < self.length:
+            self.seed.append(value)
+            if len(self.seed) < self.length:
+                return None
+            return self.ewm.update(sum(self.seed) / self.length)
+        return self.ewm.update(value)
+
+
+class _Sma:
+    """Sabit uzunluklu halka tampon üzerinde basit hareketli ortalama."""
+    __slots__ = ("window",)
+
+    def __init__(self, length: int):
+        self.window = deque(maxlen=length)
+
+    def update(self, value: float) -> float | None:
+        self.window.append(value)
+        return sum(self.window) / len(self.window) if len(self.window) == self.window.maxlen else None
+
+
+class IndicatorEngine:
+    """
+    Tek bir (sembol, zaman aralığı) çifti için RSI, MACD, Bollinger, Stochastic, ADX ve ATR
+    durumunu tutar. Kapanmış her mum durumu O(1) maliyetle ilerletir; son (oluşmakta olan)
+    mum ise durumun bir kopyası üzerinde değerlendirilir ve kalıcı olarak işlenmez.
+    """
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self.last_closed_ts = None
+        self.prev_close = self.prev_high = self.prev_low = None
+        self.rsi_pos, self.rsi_neg = _Rma(14), _Rma(14)
+        self.ema_fast, self.ema_slow, self.macd_signal = _Ema(12), _Ema(26), _Ema(9)
+        self.bb_window = deque(maxlen=20)
+        self.stoch_highs, self.stoch_lows = deque(maxlen=14), deque(maxlen=14)
+        self.stoch_k, self.stoch_d = _Sma(3), _Sma(3)
+        self.atr, self.dm_pos, self.dm_neg, self.adx = _Rma(14), _Rma(14), _Rma(14), _Rma(14)
+
+    def _step(self, high: float, low: float, close: float) -> dict:
+        values = {}
+
+        # RSI(14)
+        diff = close - self.prev_close if self.prev_close is not None else None
+        pos_avg = self.rsi_pos.update(max(diff, 0.0) if diff is not None else None)
+        neg_avg = self.rsi_neg.update(min(diff, 0.0) if diff is not None else None)
+        values['rsi'] = _safe_div(100 * pos_avg, pos_avg + abs(neg_avg)) if pos_avg is not None and neg_avg is not None else None
+
+        # MACD(12, 26, 9)
+        fast, slow = self.ema_fast.update(close), self.ema_slow.update(close)
+        macd = fast - slow if fast is not None and slow is not None else None
+        signal = self.macd_signal.update(macd) if macd is not None else None
+        values['macd_line'], values['macd_signal'] = macd, signal
+
+        # Bollinger Bantları(20, 2.0)
+        self.bb_window.append(close)
+        if len(self.bb_window) == self.bb_window.maxlen:
+            mean = sum(self.bb_window) / len(self.bb_window)
+            std = math.sqrt(sum((x - mean) ** 2 for x in self.bb_window) / len(self.bb_window))
+            values.update(bband_lower=mean - 2.0 * std, bband_middle=mean, bband_upper=mean + 2.0 * std)
+        else:
+            values.update(bband_lower=None, bband_middle=None, bband_upper=None)
+
+        # Stochastic(14, 3, 3)
+        self.stoch_highs.append(high); self.stoch_lows.append(low)
+        stoch_k = stoch_d = None
+        if len(self.stoch_highs) == self.stoch_highs.maxlen:
+            lowest, highest = min(self.stoch_lows), max(self.stoch_highs)
+            raw_k = 100 * (close - lowest) / ((highest - lowest) or _EPSILON)
+            stoch_k = self.stoch_k.update(raw_k)
+            stoch_d = self.stoch_d.update(stoch_k) if stoch_k is not None else None
+        values['stoch_k'], values['stoch_d'] = stoch_k, stoch_d
+
+        # ATR(14) ve ADX(14)
+        if self.prev_close is not None:
+            true_range = max(high - low, abs(high - self.prev_close), abs(self.prev_close - low))
+            up, down = high - self.prev_high, self.prev_low - low
+            plus_dm = up if up > down and up > 0 else 0.0
+            minus_dm = down if down > up and down > 0 else 0.0
+        else:
+            true_range = plus_dm = minus_dm = None
+        atr = self.atr.update(true_range)
+        plus_avg, minus_avg = self.dm_pos.update(plus_dm), self.dm_neg.update(minus_dm)
+        adx = None
+        if atr is not None and plus_avg is not None and minus_avg is not None:
+            dx = None
+            if atr > 0:
+                dmp, dmn = 100 * plus_avg / atr, 100 * minus_avg / atr
+                dx = _safe_div(100 * abs(dmp - dmn), dmp + dmn)
+            adx = self.adx.update(dx)
+        values['adx'], values['atr'] = adx, atr
+
+        self.prev_close, self.prev_high, self.prev_low = close, high, low
+        return values
+
+    def update(self, bars: list[list]) -> dict | None:
+        """
+        Zaman sırasına göre dizili OHLCV mumlarını alır ve son mumun gösterge değerlerini döndürür.
+        Son mum hariç tümü kapanmış kabul edilir; daha önce işlenmemiş olanlar duruma eklenir.
+        Durumla ardışık olmayan bir seri gelirse motor sıfırlanıp baştan ısıtılır.
+        """
+        bars = [bar for bar in bars if all(v is not None for v in bar[:5])]
+        if not bars:
+            return None
+        closed, forming = bars[:-1], bars[-1]
+
+        if self.last_closed_ts is not None:
+            index = len(closed) - 1
+            while index >= 0 and closed[index][0] > self.last_closed_ts:
+                index -= 1
+            if index >= 0 and closed[index][0] == self.last_closed_ts:
+                closed = closed[index + 1:]
+            else:
+                self._reset()
+
+        for bar in closed:
+            self._step(float(bar[2]), float(bar[3]), float(bar[4]))
+            self.last_closed_ts = bar[0]
+
+        return copy.deepcopy(self)._step(float(forming[2]), float(forming[3]), float(forming[4]))
+
+
+def _safe_div(numerator: float, denominator: float) -> float | None:
+    return numerator / denominator if denominator else None
+
+
+class IndicatorRegistry:
+    """(sembol, zaman aralığı) başına bir `IndicatorEngine` tutan, LRU ile sınırlı kayıt defteri."""
+
+    def __init__(self, max_engines: int):
+        self.max_engines = max_engines
+        self._engines: OrderedDict[tuple[str, str], tuple[IndicatorEngine, threading.Lock]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def compute(self, symbol: str, timeframe: str, bars: list[list]) -> dict | None:
+        key = (symbol, timeframe)
+        with self._lock:
+            entry = self._engines.get(key)
+            if entry is None:
+                entry = self._engines[key] = (IndicatorEngine(), threading.Lock())
+                while len(self._engines) > self.max_engines:
+                    self._engines.popitem(last=False)
+            else:
+                self._engines.move_to_end(key)
+        engine, engine_lock = entry
+        with engine_lock:
+            return engine.update(bars)
+
+
+indicator_registry = IndicatorRegistry(max_engines=config.OHLCV_CACHE_MAX_SERIES)
+
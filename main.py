@@ -4,17 +4,27 @@
 import os
 import json
 import time
+import atexit
+import signal
 import threading
 import logging
 import subprocess
 import sys
 from dotenv import load_dotenv
 
-import core
-import tools
 import config
-import database
-import telegram_bot
+from startup_timing import StartupTimer
+
+# Ağır bağımlılıklar (LangChain, pandas-ta, telegram) ilk kullanımda yüklenir; burada kalanların süresi ölçülür.
+startup = StartupTimer("main")
+if config.STARTUP_TIMING_ENABLED:
+    startup.track_imports()
+
+with startup.step("importlar"):
+    import core
+    import tools
+    import database
+    import metrics
 
 load_dotenv()
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -175,10 +185,24 @@ def cli_proactive_scanner():
         status_callback=status_handler
     )
 
+def run_telegram_bot():
+    """Telegram botunu, kütüphanesi menüyü bekletmeden kendi thread'inde yüklenecek şekilde başlatır."""
+    import telegram_bot
+    telegram_bot.run_telegram_bot()
+
+def _handle_sigterm(signum, frame):
+    """`docker stop` SIGTERM gönderir; normal çıkışa çevrilerek atexit kapanış adımları çalıştırılır."""
+    logging.info("SIGTERM alındı, bot kapatılıyor...")
+    sys.exit(0)
+
 def main():
+    signal.signal(signal.SIGTERM, _handle_sigterm)
     try:
-        database.init_db()
-        tools.initialize_exchange(config.DEFAULT_MARKET_TYPE)
+        with startup.step("veritabanı"):
+            database.init_db()
+        atexit.register(database.shutdown)
+        with startup.step("borsa"):
+            tools.initialize_exchange(config.DEFAULT_MARKET_TYPE)
     except Exception as e:
         logging.critical(f"Uygulama başlatılırken kritik bir hata oluştu: {e}")
         sys.exit(1)
@@ -191,9 +215,13 @@ def main():
     checker_thread = threading.Thread(target=core.background_position_checker, daemon=True)
     checker_thread.start()
 
+    if config.METRICS_ENABLED:
+        # Dashboard ayrı bir süreç; kontrolcü ve tarama metrikleri ona anlık görüntü dosyasıyla iletilir.
+        metrics.start_snapshot_writer()
+
     if config.TELEGRAM_ENABLED:
         logging.info("--- Telegram Botu başlatılıyor... ---")
-        telegram_thread = threading.Thread(target=telegram_bot.run_telegram_bot, daemon=True)
+        telegram_thread = threading.Thread(target=run_telegram_bot, daemon=True)
         telegram_thread.start()
 
     launch_dashboard()
@@ -205,6 +233,9 @@ def main():
         "p": ("PROAKTİF TARAMAYI BAŞLAT (CLI)", cli_proactive_scanner),
         "q": ("Çıkış", lambda: print("Bot kapatılıyor..."))
     }
+
+    if config.STARTUP_TIMING_ENABLED:
+        startup.report(config.STARTUP_TIMING_TOP_IMPORTS)
     
     while True:
         print("\n" + "="*50 + "\n           TERMINAL MENU\n" + "="*50)
@@ -0,0 +1,377 @@
+# market_data.py
+# @author: Memba Co.
+
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict
+
+import numpy as np
+
+import config
+import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows: süreçler arası dosya kilidi yok, süreç içi kilitler yine geçerli.
+    fcntl = None
+
+_TIMEFRAME_UNITS_MS = {'m': 60_000, 'h': 3_600_000, 'd': 86_400_000, 'w': 604_800_000, 'M': 2_592_000_000}
+
+def timeframe_to_ms(timeframe: str) -> int:
+    """'15m', '4h', '1d' gibi bir zaman aralığını milisaniyeye çevirir."""
+    amount, unit = timeframe[:-1], timeframe[-1]
+    if unit not in _TIMEFRAME_UNITS_MS or not amount.isdigit():
+        raise ValueError(f"Geçersiz zaman aralığı: {timeframe}")
+    return int(amount) * _TIMEFRAME_UNITS_MS[unit]
+
+
+class CandleStore:
+    """
+    Kapanmış mumları (sembol, zaman aralığı) başına bir dosyada, float64 (N, 6) kayıtlar halinde diskte tutar.
+    Dosyalar np.memmap ile kopyalanmadan okunur; eşitleme yalnızca son kayıttan sonraki eksik aralığı
+    borsadan indirip dosyanın sonuna ekler. Aynı dizini paylaşan süreçler (bot, dashboard) dosya kilidiyle sırayla yazar.
+    """
+    _COLUMNS = 6
+    _RECORD_BYTES = _COLUMNS * 8
+
+    def __init__(self, root: str, page_size: int):
+        self.root = root
+        self.page_size = page_size
+        self._locks: dict[tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self.stats = {"local_reads": 0, "sync_requests": 0, "synced_bars": 0, "gaps": 0}
+
+    def _path(self, symbol: str, timeframe: str) -> str:
+        return os.path.join(self.root, f"{symbol.split(':')[0].replace('/', '')}_{timeframe}.f8")
+
+    @contextmanager
+    def _locked(self, symbol: str, timeframe: str):
+        with self._locks_guard:
+            lock = self._locks.setdefault((symbol, timeframe), threading.Lock())
+        with lock:
+            os.makedirs(self.root, exist_ok=True)
+            with open(self._path(symbol, timeframe) + ".lock", "w") as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                yield
+
+    def read(self, symbol: str, timeframe: str) -> np.ndarray:
+        """Serinin tüm kapanmış mumlarını salt okunur bir (N, 6) memmap olarak döndürür (dosya yoksa boş dizi)."""
+        path = self._path(symbol, timeframe)
+        count = os.path.getsize(path) // self._RECORD_BYTES if os.path.exists(path) else 0
+        if count == 0:
+            return np.empty((0, self._COLUMNS), dtype=np.float64)
+        # Yarım kalmış (örn: çökme sırasında yazılan) son kayıt, şekil gereği okunmaz.
+        return np.memmap(path, dtype=np.float64, mode="r", shape=(count, self._COLUMNS))
+
+    def _write(self, path: str, bars: np.ndarray, append: bool):
+        if append and os.path.exists(path) and os.path.getsize(path) % self._RECORD_BYTES:
+            os.truncate(path, os.path.getsize(path) // self._RECORD_BYTES * self._RECORD_BYTES)
+        if append:
+            with open(path, "ab") as f:
+                f.write(np.ascontiguousarray(bars, dtype=np.float64).tobytes())
+            return
+        # Açık memmap'ler eski dosyayı görmeye devam eder; yeni içerik atomik olarak yerine geçer.
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(np.ascontiguousarray(bars, dtype=np.float64).tobytes())
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def _closed(bars, tf_ms: int, now_ms: int) -> np.ndarray:
+        array = np.asarray(bars, dtype=np.float64).reshape(-1, CandleStore._COLUMNS)
+        return array[array[:, 0] + tf_ms <= now_ms]
+
+    def _append_closed(self, symbol: str, timeframe: str, bars, now_ms: int, contiguous: bool = True) -> bool:
+        """
+        Kapanmış mumları serinin sonuna ekler. `contiguous` ise seriyle arada boşluk olduğunda hiçbir şey yazmadan
+        False döner; değilse (borsadan sayfalanarak indirilen aralık) borsadaki boşluklar olduğu gibi saklanır.
+        """
+        tf_ms = timeframe_to_ms(timeframe)
+        closed = self._closed(bars, tf_ms, now_ms)
+        if not contiguous and len(closed):
+            closed = closed[np.unique(closed[:, 0], return_index=True)[1]]
+        stored = self.read(symbol, timeframe)
+        if len(stored):
+            last = stored[-1, 0]
+            closed = closed[closed[:, 0] > last]
+            if len(closed) and closed[0, 0] != last + tf_ms:
+                if contiguous:
+                    return False
+                self.stats["gaps"] += 1
+        if len(closed) > 1 and np.any(np.diff(closed[:, 0]) != tf_ms):
+            if contiguous:
+                return False
+            self.stats["gaps"] += 1
+        if len(closed):
+            self._write(self._path(symbol, timeframe), closed, append=True)
+            self.stats["synced_bars"] += len(closed)
+        return True
+
+    def append_closed(self, symbol: str, timeframe: str, bars: list[list], now_ms: int) -> bool:
+        """Başka bir kaynaktan (örn: önbellek kuyruk yenilemesi) gelen mumlardan kapanmış olanları depoya ekler."""
+        with self._locked(symbol, timeframe):
+            return self._append_closed(symbol, timeframe, bars, now_ms)
+
+    def _fetch_pages(self, exchange, symbol: str, timeframe: str, since_ms: int, end_ms: float | None = None) -> list[list]:
+        """`since_ms`ten itibaren (verilirse `end_ms`e kadar) mumları `page_size`lık sayfalar halinde indirir."""
+        tf_ms = timeframe_to_ms(timeframe)
+        bars, cursor = [], since_ms
+        while end_ms is None or cursor < end_ms:
+            page = exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=cursor, limit=self.page_size)
+            self.stats["sync_requests"] += 1
+            bars.extend(bar for bar in page or [] if end_ms is None or bar[0] < end_ms)
+            if not page or len(page) < self.page_size:
+                break
+            cursor = int(page[-1][0]) + tf_ms
+        return bars
+
+    def _prepend(self, exchange, symbol: str, timeframe: str, since_ms: int, now_ms: int) -> int:
+        """Kilit altında çağrılır. `since_ms` ile serinin ilk kaydı arasındaki geçmişi indirip serinin başına ekler."""
+        tf_ms = timeframe_to_ms(timeframe)
+        stored = self.read(symbol, timeframe)
+        end = stored[0, 0] if len(stored) else now_ms
+        older = self._closed(self._fetch_pages(exchange, symbol, timeframe, since_ms // tf_ms * tf_ms, end), tf_ms, now_ms)
+        if not len(older):
+            return 0
+        older = older[np.unique(older[:, 0], return_index=True)[1]]
+        self._write(self._path(symbol, timeframe), np.vstack([older, stored]), append=False)
+        self.stats["synced_bars"] += len(older)
+        return len(older)
+
+    def get_ohlcv(self, exchange, symbol: str, timeframe: str, limit: int = 200) -> list[list]:
+        """
+        Son `limit` mumu diskteki seriden okur; sadece son kayıttan sonraki mumları (ve henüz kapanmamış
+        güncel mumu) borsadan sayfalayarak çeker. Seri istenen derinlikten kısaysa eksik kısım serinin başına
+        indirilir. Mevcut geçmiş hiçbir durumda silinmez; seri ne kadar geride kalmış olursa olsun aradaki
+        aralık tamamlanır.
+        """
+        tf_ms = timeframe_to_ms(timeframe)
+        with self._locked(symbol, timeframe):
+            now_ms = exchange.milliseconds()
+            stored = self.read(symbol, timeframe)
+            if len(stored):
+                fresh = self._fetch_pages(exchange, symbol, timeframe, int(stored[-1, 0]) + tf_ms)
+            else:
+                fresh = exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit) or []
+                self.stats["sync_requests"] += 1
+            self._append_closed(symbol, timeframe, fresh, now_ms, contiguous=False)
+
+            stored = self.read(symbol, timeframe)
+            if 0 < len(stored) < limit - 1:
+                self._prepend(exchange, symbol, timeframe, int(stored[0, 0]) - (limit - 1 - len(stored)) * tf_ms, now_ms)
+                stored = self.read(symbol, timeframe)
+
+            self.stats["local_reads"] += 1
+            open_bars = [list(bar) for bar in fresh if bar[0] + tf_ms > now_ms]
+            closed_count = max(limit - len(open_bars), 0)
+            closed = [[int(bar[0]), *bar[1:]] for bar in stored[max(len(stored) - closed_count, 0):].tolist()]
+            return closed + open_bars[-limit:] if limit else []
+
+    def backfill(self, exchange, symbol: str, timeframe: str, since_ms: int) -> int:
+        """`since_ms` ile serinin ilk kaydı arasındaki geçmişi sayfa sayfa indirip serinin başına ekler (geriye dönük testler için)."""
+        with self._locked(symbol, timeframe):
+            return self._prepend(exchange, symbol, timeframe, since_ms, exchange.milliseconds())
+
+
+candle_store = CandleStore(
+    root=os.path.join(os.path.dirname(os.path.abspath(__file__)), config.OHLCV_STORE_DIR),
+    page_size=config.OHLCV_STORE_PAGE_SIZE,
+)
+
+
+class _CandleSeries:
+    """Tek bir (sembol, zaman aralığı) çifti için önbellekteki mum serisi."""
+    __slots__ = ("bars", "fetched_at", "lock")
+
+    def __init__(self):
+        self.bars: list[list] = []
+        self.fetched_at = 0.0
+        self.lock = threading.Lock()
+
+
+class CandleCache:
+    """
+    Süreç genelinde paylaşılan OHLCV önbelleği.
+    Seriyi bir kez indirir, sonraki çağrılarda sadece son kapanmış mumdan sonraki
+    mumları çeker ve en az kullanılan serileri (LRU) bellekten atar.
+    `store` verilirse ilk yükleme diskteki mum deposundan yapılır ve yeni kapanan mumlar depoya da yazılır.
+    """
+
+    def __init__(self, max_series: int, max_bars: int, refresh_seconds: float, store: CandleStore | None = None):
+        self.max_series = max_series
+        self.max_bars = max_bars
+        self.refresh_seconds = refresh_seconds
+        self.store = store
+        self._series: OrderedDict[tuple[str, str], _CandleSeries] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "tail_refreshes": 0, "full_fetches": 0, "evictions": 0}
+
+    def _get_series(self, key: tuple[str, str]) -> _CandleSeries:
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _CandleSeries()
+                while len(self._series) > self.max_series:
+                    self._series.popitem(last=False)
+                    self.stats["evictions"] += 1
+            else:
+                self._series.move_to_end(key)
+            return series
+
+    def get_ohlcv(self, exchange, symbol: str, timeframe: str, limit: int = 200) -> list[list]:
+        """Önbellekteki son `limit` mumu döndürür; gerekirse sadece eksik kuyruğu borsadan tamamlar."""
+        series = self._get_series((symbol, timeframe))
+        with series.lock:
+            now = time.monotonic()
+            if len(series.bars) >= limit and now - series.fetched_at < self.refresh_seconds:
+                self.stats["hits"] += 1
+                return [bar[:] for bar in series.bars[-limit:]]
+
+            if len(series.bars) >= limit and not self._refresh_tail(exchange, symbol, timeframe, series):
+                series.bars = []
+
+            if len(series.bars) < limit:
+                bars = self._load_series(exchange, symbol, timeframe, limit)
+                self.stats["full_fetches"] += 1
+                series.bars = [list(bar) for bar in bars] if bars else []
+
+            series.fetched_at = time.monotonic()
+            return [bar[:] for bar in series.bars[-limit:]]
+
+    def _load_series(self, exchange, symbol: str, timeframe: str, limit: int) -> list[list]:
+        if self.store:
+            try:
+                return self.store.get_ohlcv(exchange, symbol, timeframe, limit)
+            except OSError as e:
+                logging.warning(f"Mum deposu okunamadı ({symbol} {timeframe}), borsadan çekilecek: {e}")
+        return exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit)
+
+    def _refresh_tail(self, exchange, symbol: str, timeframe: str, series: _CandleSeries) -> bool:
+        """Son (henüz kapanmamış olabilecek) mumdan itibaren yeni mumları çekip seriye ekler."""
+        tf_ms = timeframe_to_ms(timeframe)
+        since = series.bars[-1][0]
+        missing = int((time.time() * 1000 - since) // tf_ms) + 2
+        if missing > self.max_bars:
+            return False
+
+        new_bars = exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=missing)
+        self.stats["tail_refreshes"] += 1
+        if not new_bars or new_bars[0][0] != since:
+            logging.warning(f"OHLCV önbelleği: {symbol} {timeframe} serisinde boşluk tespit edildi, tam yenileme yapılacak.")
+            return False
+
+        series.bars = series.bars[:-1] + [list(bar) for bar in new_bars]
+        if self.store:
+            try:
+                self.store.append_closed(symbol, timeframe, new_bars, exchange.milliseconds())
+            except OSError as e:
+                logging.warning(f"Mum deposuna yazılamadı ({symbol} {timeframe}): {e}")
+        if len(series.bars) > self.max_bars:
+            series.bars = series.bars[-self.max_bars:]
+        return True
+
+    def invalidate(self, symbol: str | None = None):
+        """Belirtilen sembolün (veya tüm sembollerin) serilerini önbellekten siler."""
+        with self._lock:
+            for key in [k for k in self._series if symbol is None or k[0] == symbol]:
+                del self._series[key]
+
+
+candle_cache = CandleCache(
+    max_series=config.OHLCV_CACHE_MAX_SERIES,
+    max_bars=config.OHLCV_CACHE_MAX_BARS,
+    refresh_seconds=config.OHLCV_CACHE_REFRESH_SECONDS,
+    store=candle_store if config.OHLCV_STORE_ENABLED else None,
+)
+
+
+class TickerSnapshot:
+    """
+    Tüm sembollerin son fiyatlarını tek bir toplu istekle çekip bellekte tutar.
+    Anlık görüntü `max_staleness` saniyeden eskiyse ilk fiyat sorgusunda yenilenir.
+    """
+
+    def __init__(self, max_staleness: float):
+        self.max_staleness = max_staleness
+        self._prices: dict[str, float] = {}
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "refreshes": 0}
+
+    def update(self, prices: dict[str, float]):
+        """Başka bir toplu yanıttan (örn: 24s ticker listesi) elde edilen fiyatlarla görüntüyü tazeler."""
+        with self._lock:
+            self._prices = dict(prices)
+            self._fetched_at = time.monotonic()
+
+    def get_price(self, symbol: str, fetch_all) -> float | None:
+        """Fiyatı bellekten döndürür; görüntü eskiyse önce `fetch_all()` ile topluca yeniler."""
+        with self._lock:
+            if time.monotonic() - self._fetched_at > self.max_staleness:
+                try:
+                    self._prices = fetch_all()
+                    self.stats["refreshes"] += 1
+                except Exception as e:
+                    # Başarısız yenileme de zaman damgasını günceller; böylece bu pencere boyunca
+                    # toplu istek tekrar denenmez ve sorgular tekil isteklere düşer.
+                    logging.warning(f"Toplu fiyat görüntüsü yenilenemedi: {e}")
+                    self._prices = {}
+                self._fetched_at = time.monotonic()
+            price = self._prices.get(symbol)
+            self.stats["hits" if price is not None else "misses"] += 1
+            return price
+
+
+ticker_snapshot = TickerSnapshot(max_staleness=config.TICKER_SNAPSHOT_MAX_STALENESS_SECONDS)
+
+
+class FundingRateCache:
+    """
+    Tüm USDT-M sembollerinin fonlama oranlarını tek bir premiumIndex isteğiyle yükler.
+    Her kayıt, borsanın bildirdiği bir sonraki fonlama zamanına kadar geçerli kalır; süresi dolan
+    veya önbellekte olmayan semboller için toplu yenileme en fazla `min_refresh_seconds` saniyede bir yapılır.
+    """
+
+    def __init__(self, min_refresh_seconds: float):
+        self.min_refresh_seconds = min_refresh_seconds
+        self._entries: dict[str, dict] = {}
+        self._refreshed_at = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "refreshes": 0}
+
+    def get(self, symbol: str, fetch_all) -> dict | None:
+        """{'funding_rate', 'mark_price', 'next_funding_time'} döndürür; süresi dolmuşsa `fetch_all()` ile yeniler."""
+        with self._lock:
+            entry = self._entries.get(symbol)
+            if entry and entry["next_funding_time"] > time.time() * 1000:
+                self.stats["hits"] += 1
+                return dict(entry)
+
+            self.stats["misses"] += 1
+            if time.monotonic() - self._refreshed_at >= self.min_refresh_seconds:
+                try:
+                    self._entries = fetch_all()
+                    self.stats["refreshes"] += 1
+                except Exception as e:
+                    logging.warning(f"Toplu fonlama oranı verisi yenilenemedi: {e}")
+                self._refreshed_at = time.monotonic()
+            entry = self._entries.get(symbol)
+            return dict(entry) if entry else None
+
+
+funding_rate_cache = FundingRateCache(min_refresh_seconds=config.FUNDING_CACHE_MIN_REFRESH_SECONDS)
+
+
+def _collect_cache_metrics():
+    """Önbelleklerin zaten tuttuğu istatistikleri /metrics kazındığında okur; sıcak yollara sayaç eklenmez."""
+    caches = (("ohlcv", candle_cache), ("ohlcv_store", candle_store), ("ticker", ticker_snapshot), ("funding_rate", funding_rate_cache))
+    for cache_name, cache in caches:
+        for event, value in dict(cache.stats).items():
+            yield ("memba_cache_events_total", "counter", "Önbellek olayları (isabet, ıskalama, yenileme...)", {"cache": cache_name, "event": event}, value)
+
+
+metrics.registry.register_collector(_collect_cache_metrics)
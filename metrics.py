@@ -0,0 +1,329 @@
+# metrics.py
+# @author: Memba Co.
+
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+from functools import wraps
+from contextlib import contextmanager
+
+import config
+
+# Süre histogramlarının (saniye) varsayılan kova sınırları; 1 ms'lik DB çağrılarından dakikalık LLM çağrılarına kadar.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Borsa nesnesinde ağ isteği yapan metotların önekleri; `amount_to_precision` gibi yerel yardımcılar ölçülmez.
+EXCHANGE_REQUEST_PREFIXES = ("fetch", "create", "cancel", "edit", "set_leverage", "set_margin", "load_markets",
+                              "fapi", "dapi", "sapi", "public", "private")
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help_text: str, label_names: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def samples(self) -> list[tuple[str, dict, float]]:
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name, dict(zip(self.label_names, key)), value) for key, value in items]
+
+
+class Counter(_Metric):
+    """Sadece artan sayaç (istek, hata, yeniden deneme sayıları)."""
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """Anlık değer (açık pozisyon sayısı, kontrol döngüsü gecikmesi)."""
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Histogram(_Metric):
+    """Kovalara ayrılmış gözlem dağılımı; `_bucket`, `_sum` ve `_count` serileri olarak sunulur."""
+    type = "histogram"
+
+    def __init__(self, name: str, help_text: str, label_names: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        self._observe(self._key(labels), value)
+
+    def _observe(self, key: tuple, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self) -> list[tuple[str, dict, float]]:
+        with self._lock:
+            items = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items()]
+        result = []
+        for key, (counts, total, count) in items:
+            labels = dict(zip(self.label_names, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                result.append((f"{self.name}_bucket", dict(labels, le=_format_value(bound)), cumulative))
+            result.append((f"{self.name}_sum", labels, total))
+            result.append((f"{self.name}_count", labels, count))
+        return result
+
+
+class Span:
+    """
+    Bir işlemin süresini `memba_<ad>_duration_seconds` histogramına, fırlattığı hataları ise
+    `memba_<ad>_errors_total` sayacına (hata türüyle) kaydeder.
+    """
+
+    def __init__(self, name: str, help_text: str, label_names: tuple = ()):
+        self.histogram = registry.register(Histogram(f"memba_{name}_duration_seconds", f"{help_text} (süre, saniye)", label_names))
+        self.errors = registry.register(Counter(f"memba_{name}_errors_total", f"{help_text} (hata sayısı)", tuple(label_names) + ("error",)))
+
+    @contextmanager
+    def time(self, **labels):
+        if not config.METRICS_ENABLED:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.errors.inc(error=type(e).__name__, **labels)
+            raise
+        finally:
+            self.histogram.observe(time.perf_counter() - started, **labels)
+
+    def wrap(self, label: str = "function"):
+        """Fonksiyonu, adı `label` etiketine yazılarak ölçen bir dekoratör döndürür (sık çağrılan fonksiyonlar için)."""
+        def decorator(fn):
+            key = (fn.__name__,)
+
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not config.METRICS_ENABLED:
+                    return fn(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                except Exception as e:
+                    self.errors.inc(error=type(e).__name__, **{label: fn.__name__})
+                    raise
+                finally:
+                    self.histogram._observe(key, time.perf_counter() - started)
+            return wrapper
+        return decorator
+
+
+class Registry:
+    """
+    Süreç içindeki tüm metrikleri ve kazıma (scrape) anında okunan toplayıcıları tutar.
+    Toplayıcılar, önbellek istatistikleri gibi zaten tutulan değerleri sadece istendiğinde okur;
+    böylece kimse kazımıyorken sıcak yollara ek maliyet gelmez.
+    """
+
+    def __init__(self, process: str = "main"):
+        self.process = process
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def register_collector(self, collector):
+        """`collector()` çağrıldığında (ad, tür, açıklama, etiketler, değer) demetleri döndürmelidir."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def collect(self) -> list[list]:
+        """Tüm örnekleri `process` etiketiyle birlikte [aile, tür, açıklama, ad, etiketler, değer] listesi olarak döndürür."""
+        with self._lock:
+            metrics, collectors = list(self._metrics.values()), list(self._collectors)
+        rows = []
+        for metric in metrics:
+            for sample_name, labels, value in metric.samples():
+                rows.append([metric.name, metric.type, metric.help, sample_name, dict(labels, process=self.process), value])
+        for collector in collectors:
+            try:
+                for name, metric_type, help_text, labels, value in collector():
+                    rows.append([name, metric_type, help_text, name, dict(labels, process=self.process), value])
+            except Exception as e:
+                logging.warning(f"METRİK: Toplayıcı çalıştırılamadı ({getattr(collector, '__name__', collector)}): {e}")
+        return rows
+
+
+registry = Registry()
+
+
+def counter(name: str, help_text: str, label_names: tuple = ()) -> Counter:
+    return registry.register(Counter(name, help_text, label_names))
+
+
+def gauge(name: str, help_text: str, label_names: tuple = ()) -> Gauge:
+    return registry.register(Gauge(name, help_text, label_names))
+
+
+def histogram(name: str, help_text: str, label_names: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+    return registry.register(Histogram(name, help_text, label_names, buckets))
+
+
+def set_process_name(name: str):
+    """Bu süreçten çıkan örneklere eklenecek `process` etiketini ayarlar."""
+    registry.process = name
+
+
+# --- Borsa çağrıları ---
+EXCHANGE_SPAN = Span("exchange_request", "Borsa API çağrıları", ("method",))
+
+
+class InstrumentedExchange:
+    """
+    ccxt (veya simülatör) nesnesini saran vekil. Ağ isteği yapan metotların süresini ve hatalarını ölçer;
+    diğer tüm nitelik okuma/yazmaları doğrudan asıl nesneye iletilir.
+    """
+    __slots__ = ("_exchange",)
+
+    def __init__(self, exchange):
+        object.__setattr__(self, "_exchange", exchange)
+
+    def __getattr__(self, name: str):
+        value = getattr(self._exchange, name)
+        if not callable(value) or not name.startswith(EXCHANGE_REQUEST_PREFIXES):
+            return value
+
+        @wraps(value)
+        def timed_request(*args, **kwargs):
+            with EXCHANGE_SPAN.time(method=name):
+                return value(*args, **kwargs)
+        return timed_request
+
+    def __setattr__(self, name: str, value):
+        setattr(self._exchange, name, value)
+
+
+def instrument_exchange(exchange):
+    return InstrumentedExchange(exchange) if config.METRICS_ENABLED else exchange
+
+
+# --- Prometheus metin formatı ve süreçler arası paylaşım ---
+def _metrics_dir() -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), config.METRICS_DIR)
+
+
+def _scrape_marker() -> str:
+    return os.path.join(_metrics_dir(), ".last_scrape")
+
+
+def _read_snapshots() -> list[list]:
+    """Diğer süreçlerin (örn. arka plan kontrolcüsünü çalıştıran main.py) güncel anlık görüntülerini okur."""
+    directory = _metrics_dir()
+    max_age = config.METRICS_SNAPSHOT_INTERVAL_SECONDS * 3
+    rows = []
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return rows
+    for file_name in names:
+        if not file_name.endswith(".json") or file_name == f"{registry.process}.json":
+            continue
+        path = os.path.join(directory, file_name)
+        try:
+            if time.time() - os.path.getmtime(path) > max_age:
+                continue
+            with open(path, encoding="utf-8") as f:
+                rows.extend(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return rows
+
+
+def render() -> str:
+    """Bu sürecin ve taze anlık görüntüsü bulunan diğer süreçlerin metriklerini Prometheus metin formatında döndürür."""
+    try:
+        os.makedirs(_metrics_dir(), exist_ok=True)
+        with open(_scrape_marker(), "a"):
+            os.utime(_scrape_marker())
+    except OSError as e:
+        logging.warning(f"METRİK: Kazıma işareti yazılamadı: {e}")
+
+    families: dict[str, tuple[str, str, list]] = {}
+    for family, metric_type, help_text, sample_name, labels, value in registry.collect() + _read_snapshots():
+        families.setdefault(family, (metric_type, help_text, []))[2].append((sample_name, labels, value))
+
+    lines = []
+    for family, (metric_type, help_text, samples) in sorted(families.items()):
+        lines.append(f"# HELP {family} {help_text}")
+        lines.append(f"# TYPE {family} {metric_type}")
+        lines.extend(f"{sample_name}{_format_labels(labels)} {_format_value(value)}" for sample_name, labels, value in samples)
+    return "\n".join(lines) + "\n"
+
+
+def _write_snapshot():
+    path = os.path.join(_metrics_dir(), f"{registry.process}.json")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(registry.collect(), f)
+    os.replace(tmp_path, path)
+
+
+def start_snapshot_writer():
+    """
+    Dashboard ayrı bir süreçte çalıştığından, bu sürecin metriklerini periyodik olarak diske yazan thread'i başlatır.
+    Son `METRICS_SNAPSHOT_IDLE_SECONDS` içinde /metrics kazınmadıysa hiçbir şey yazılmaz.
+    """
+    def loop():
+        while True:
+            time.sleep(config.METRICS_SNAPSHOT_INTERVAL_SECONDS)
+            try:
+                if time.time() - os.path.getmtime(_scrape_marker()) > config.METRICS_SNAPSHOT_IDLE_SECONDS:
+                    continue
+                _write_snapshot()
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                logging.warning(f"METRİK: Anlık görüntü yazılamadı: {e}")
+
+    threading.Thread(target=loop, daemon=True, name="metrics-snapshot").start()
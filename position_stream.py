@@ -0,0 +1,189 @@
+# position_stream.py
+# @author: Memba Co.
+
+import os
+import json
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+from aiohttp import web
+
+import config
+import database
+from tools import _get_unified_symbol, str_to_bool
+
+
+def _stream_name(symbol: str) -> str:
+    """'BTC/USDT' -> 'btcusdt@markPrice@1s'"""
+    return f"{symbol.replace('/', '').lower()}@markPrice@1s"
+
+
+class MarkPriceStream:
+    """
+    Binance vadeli işlem işaret fiyatı (markPrice) akışına abone olur ve yönetilen her pozisyonun
+    fiyat güncellemesinde `on_tick(symbol, mark_price)` geri çağrısını bir işçi thread'inde çalıştırır.
+    Abonelikler, veritabanındaki pozisyonlara göre SUBSCRIBE/UNSUBSCRIBE mesajlarıyla güncel tutulur.
+    """
+
+    def __init__(self, url: str, on_tick, symbols_provider=None, resync_seconds: float = 5.0):
+        self.url = url
+        self.on_tick = on_tick
+        self.symbols_provider = symbols_provider or (lambda: {p['symbol'] for p in database.get_all_positions()})
+        self.resync_seconds = resync_seconds
+        self.subscribed: set[str] = set()
+        self._in_flight: set[str] = set()
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="mark-price")
+        self._request_id = 0
+        self._stopped = asyncio.Event()
+
+    async def _send(self, ws, method: str, streams: list[str]):
+        self._request_id += 1
+        await ws.send_str(json.dumps({"method": method, "params": streams, "id": self._request_id}))
+
+    async def _sync_subscriptions(self, ws):
+        wanted = await asyncio.get_running_loop().run_in_executor(None, self.symbols_provider)
+        to_add, to_remove = wanted - self.subscribed, self.subscribed - wanted
+        if to_add:
+            await self._send(ws, "SUBSCRIBE", [_stream_name(s) for s in sorted(to_add)])
+        if to_remove:
+            await self._send(ws, "UNSUBSCRIBE", [_stream_name(s) for s in sorted(to_remove)])
+        if to_add or to_remove:
+            logging.info(f"İŞARET FİYATI AKIŞI: Abonelikler güncellendi -> {sorted(wanted)}")
+        self.subscribed = set(wanted)
+
+    async def _resync_loop(self, ws):
+        while not ws.closed:
+            await asyncio.sleep(self.resync_seconds)
+            await self._sync_subscriptions(ws)
+
+    def _dispatch(self, payload: dict):
+        data = payload.get("data", payload)
+        if not isinstance(data, dict) or data.get("e") != "markPriceUpdate":
+            return
+        symbol = _get_unified_symbol(data.get("s"))
+        if symbol not in self.subscribed or symbol in self._in_flight:
+            return
+        try:
+            mark_price = float(data["p"])
+        except (KeyError, TypeError, ValueError):
+            return
+
+        self._in_flight.add(symbol)
+        future = asyncio.get_running_loop().run_in_executor(self._executor, self.on_tick, symbol, mark_price)
+        future.add_done_callback(lambda f, s=symbol: self._on_tick_done(s, f))
+
+    def _on_tick_done(self, symbol: str, future):
+        self._in_flight.discard(symbol)
+        if future.exception():
+            logging.error(f"İŞARET FİYATI AKIŞI: {symbol} için tetikleyici hatası: {future.exception()}")
+
+    async def run(self):
+        """Bağlantı koparsa artan bekleme süreleriyle yeniden bağlanarak akışı sürekli dinler."""
+        backoff = 1
+        async with aiohttp.ClientSession() as session:
+            while not self._stopped.is_set():
+                try:
+                    async with session.ws_connect(self.url, heartbeat=30) as ws:
+                        logging.info(f"İŞARET FİYATI AKIŞI: {self.url} adresine bağlanıldı.")
+                        backoff = 1
+                        self.subscribed = set()
+                        await self._sync_subscriptions(ws)
+                        resync_task = asyncio.create_task(self._resync_loop(ws))
+                        try:
+                            async for message in ws:
+                                if message.type == aiohttp.WSMsgType.TEXT:
+                                    self._dispatch(json.loads(message.data))
+                                elif message.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                                    break
+                        finally:
+                            resync_task.cancel()
+                except Exception as e:
+                    logging.error(f"İŞARET FİYATI AKIŞI: Bağlantı hatası: {e}")
+                if not self._stopped.is_set():
+                    logging.warning(f"İŞARET FİYATI AKIŞI: {backoff} saniye sonra yeniden bağlanılacak.")
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, 60)
+
+    def stop(self):
+        self._stopped.set()
+
+
+def resolve_stream_url() -> str | None:
+    """
+    `tools.initialize_exchange` ile aynı ortam değişkenlerine göre akış adresini seçer: simülatörde fiyatlar süreç içinde
+    üretildiğinden akış kullanılmaz (None), testnet'te testnet akışı, aksi halde ana ağ akışı kullanılır.
+    `MARK_PRICE_STREAM_URL` (örn: LocalMarkPriceServer) verilirse simülatör dışındaki modlarda onu ezer.
+    """
+    if str_to_bool(os.getenv("USE_EXCHANGE_SIMULATOR", "False")):
+        return None
+    default_url = config.POSITION_STREAM_TESTNET_URL if str_to_bool(os.getenv("USE_TESTNET", "False")) else config.POSITION_STREAM_URL
+    return os.getenv("MARK_PRICE_STREAM_URL") or default_url
+
+
+def start_mark_price_stream(on_tick) -> MarkPriceStream | None:
+    """Akışı kendi olay döngüsüne sahip bir daemon thread'de başlatır; simülatör modunda başlatmaz ve None döner."""
+    url = resolve_stream_url()
+    if url is None:
+        return None
+    stream = MarkPriceStream(url, on_tick, resync_seconds=config.POSITION_STREAM_RESYNC_SECONDS)
+    threading.Thread(target=lambda: asyncio.run(stream.run()), name="mark-price-stream", daemon=True).start()
+    return stream
+
+
+class LocalMarkPriceServer:
+    """
+    Binance'in birleşik akış (combined stream) protokolünü taklit eden yerel WebSocket sunucusu.
+    SUBSCRIBE/UNSUBSCRIBE mesajlarını kabul eder ve `push()` ile verilen fiyatları abone istemcilere
+    gönderir. Akış modunu canlı borsa olmadan uçtan uca denemek için `MARK_PRICE_STREAM_URL`
+    bu sunucunun adresine (örn: ws://127.0.0.1:8765/stream) yönlendirilebilir.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765):
+        self.host, self.port = host, port
+        self.clients: dict[web.WebSocketResponse, set[str]] = {}
+        self._runner = None
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}/stream"
+
+    async def _handle(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.clients[ws] = set()
+        async for message in ws:
+            if message.type != aiohttp.WSMsgType.TEXT:
+                continue
+            request_data = json.loads(message.data)
+            streams = set(request_data.get("params", []))
+            if request_data.get("method") == "SUBSCRIBE":
+                self.clients[ws] |= streams
+            elif request_data.get("method") == "UNSUBSCRIBE":
+                self.clients[ws] -= streams
+            await ws.send_str(json.dumps({"result": None, "id": request_data.get("id")}))
+        self.clients.pop(ws, None)
+        return ws
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/stream", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        return self
+
+    async def push(self, symbol: str, mark_price: float):
+        stream = _stream_name(symbol)
+        payload = json.dumps({"stream": stream, "data": {"e": "markPriceUpdate", "s": symbol.replace('/', ''), "p": str(mark_price)}})
+        for ws, streams in list(self.clients.items()):
+            if stream in streams and not ws.closed:
+                await ws.send_str(payload)
+
+    async def stop(self):
+        for ws in list(self.clients):
+            await ws.close()
+        if self._runner:
+            await self._runner.cleanup()
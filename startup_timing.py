@@ -0,0 +1,99 @@
+# startup_timing.py
+# @author: Memba Co.
+
+import sys
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from importlib.machinery import SourceFileLoader, SourcelessFileLoader, ExtensionFileLoader
+
+_TIMED_LOADERS = (SourceFileLoader, SourcelessFileLoader, ExtensionFileLoader)
+
+
+class _ImportTimer:
+    """
+    `python -X importtime` benzeri ölçüm yapan meta path bulucusu. Her modülün yüklenme süresini,
+    alt importlar dahil (kümülatif) ve hariç (kendi) olarak kaydeder. Sadece dosyadan yüklenen
+    modüller ölçülür; yerleşik ve dondurulmuş modüller zaten anlık yüklenir.
+    """
+
+    def __init__(self):
+        self.records: dict[str, tuple[float, float]] = {}
+        self._local = threading.local()
+
+    def find_spec(self, fullname, path, target=None):
+        if getattr(self._local, "searching", False):
+            return None
+        self._local.searching = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    if isinstance(spec.loader, _TIMED_LOADERS):
+                        self._wrap(spec.loader, fullname)
+                    return spec
+            return None
+        finally:
+            self._local.searching = False
+
+    def _wrap(self, loader, fullname: str):
+        exec_module = loader.exec_module
+
+        def timed_exec_module(module):
+            stack = self._local.__dict__.setdefault("stack", [])
+            stack.append(0.0)
+            started = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                cumulative = time.perf_counter() - started
+                children = stack.pop()
+                if stack:
+                    stack[-1] += cumulative
+                self.records[fullname] = (cumulative - children, cumulative)
+
+        loader.exec_module = timed_exec_module
+
+
+class StartupTimer:
+    """Başlangıç adımlarının sürelerini ve import dökümünü toplayıp tek bir rapor olarak loglar."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.steps: list[tuple[str, float]] = []
+        self.import_timer: _ImportTimer | None = None
+
+    def track_imports(self):
+        """Bu çağrıdan sonra yapılan ilk importları ölçmeye başlar."""
+        if self.import_timer is None:
+            self.import_timer = _ImportTimer()
+            sys.meta_path.insert(0, self.import_timer)
+
+    @contextmanager
+    def step(self, label: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((label, time.perf_counter() - started))
+
+    def _stop_tracking(self):
+        if self.import_timer in sys.meta_path:
+            sys.meta_path.remove(self.import_timer)
+
+    def report(self, top_n: int = 15):
+        """Toplam süreyi, adımları ve en yavaş `top_n` importu (kümülatif süreye göre) loglar."""
+        self._stop_tracking()
+        total = time.perf_counter() - self.started
+        steps_text = ", ".join(f"{label} {seconds:.2f}s" for label, seconds in self.steps)
+        logging.info(f"BAŞLANGIÇ SÜRESİ ({self.name}): {total:.2f}s" + (f" [{steps_text}]" if steps_text else ""))
+        if not self.import_timer or not self.import_timer.records:
+            return
+        slowest = sorted(self.import_timer.records.items(), key=lambda item: item[1][1], reverse=True)[:top_n]
+        lines = [f"  {cumulative * 1e6:>10.0f} | {self_time * 1e6:>10.0f} | {name}" for name, (self_time, cumulative) in slowest]
+        logging.info(f"BAŞLANGIÇ IMPORT DÖKÜMÜ ({self.name}, en yavaş {len(slowest)} modül):\n"
+                     f"  kümülatif µs |   kendi µs | modül\n" + "\n".join(lines))
@@ -102,7 +102,7 @@ async def button_callback_handler(update: Update, context: ContextTypes.DEFAULT_
 
     if action == "reanalyze":
         await query.edit_message_text(text=f"🔄 `{symbol}` için yeniden analiz yapılıyor...", parse_mode=ParseMode.MARKDOWN)
-        position = await asyncio.to_thread(lambda: next((p for p in database.get_all_positions() if p['symbol'] == symbol), None))
+        position = await asyncio.to_thread(database.get_position, symbol)
         if position:
             result = await asyncio.to_thread(core.reanalyze_position, position)
             if result.get('status') == 'success':
@@ -0,0 +1,8 @@
+# tests/conftest.py
+# @author: Memba Co.
+
+import os
+import sys
+
+# Modüller proje kökünde düz olarak durduğundan, testler hangi dizinden çalıştırılırsa çalıştırılsın kök dizin içe aktarma yoluna eklenir.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
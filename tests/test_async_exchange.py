@@ -0,0 +1,47 @@
+# tests/test_async_exchange.py
+# @author: Memba Co.
+
+import threading
+
+import pytest
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("ccxt.async_support")
+
+import tools
+from async_exchange import AsyncExchangeClient, AsyncExchangeRunner
+
+
+def _loop_threads() -> list[threading.Thread]:
+    return [thread for thread in threading.enumerate() if thread.name == "async-exchange"]
+
+
+def test_failed_start_stops_the_loop_thread(monkeypatch):
+    async def failing_start(self):
+        raise ConnectionError("piyasalar yüklenemedi")
+
+    monkeypatch.setattr(AsyncExchangeClient, "start", failing_start)
+    runner = AsyncExchangeRunner()
+
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            runner.run(lambda client: client.fetch_price("BTC/USDT"))
+
+    assert runner.client is None and runner.loop is None
+    assert _loop_threads() == []
+
+
+def test_simulator_mode_uses_the_shared_simulated_exchange(monkeypatch):
+    monkeypatch.setenv("USE_EXCHANGE_SIMULATOR", "true")
+    monkeypatch.setattr(tools, "exchange", None)
+    runner = AsyncExchangeRunner()
+    try:
+        prices = runner.run(lambda client: client.fetch_many("fetch_price", ["BTC/USDT", "ETH/USDT"]), timeout=30)
+        bars = runner.run(lambda client: client.fetch_ohlcv("BTC/USDT", "15m", limit=50), timeout=30)
+    finally:
+        runner.shutdown()
+
+    assert runner.client is None and tools.exchange is not None
+    assert all(isinstance(price, float) and price > 0 for price in prices.values())
+    assert len(bars) == 50
+    assert _loop_threads() == []
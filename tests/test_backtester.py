@@ -0,0 +1,133 @@
+# tests/test_backtester.py
+# @author: Memba Co.
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pandas")
+
+import backtester
+from backtester import BacktestSettings, TRADE_HISTORY_COLUMNS, periodic_signals, run_backtest
+
+
+def make_bars(count: int, seed: int) -> "np.ndarray":
+    """Her çalıştırmada aynı olan 1 dakikalık rastgele yürüyüş mumları."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, count)))
+    high = close * (1 + np.abs(rng.normal(0, 0.001, count)))
+    low = close * (1 - np.abs(rng.normal(0, 0.001, count)))
+    timestamps = 1_704_067_200_000 + np.arange(count) * 60_000
+    return np.column_stack([timestamps, close, high, low, close, np.ones(count)]).astype(np.float64)
+
+
+def manage_position_bar_by_bar(symbol: str, bars, signals, settings: BacktestSettings) -> list[dict]:
+    """
+    core.open_new_position ve core._manage_position kurallarının döngüyle yazılmış karşılığı: her mum
+    kapanışı, kontrolcünün bir turudur. Vektörel motorun bununla aynı işlemleri üretmesi beklenir.
+    """
+    atr = backtester.compute_atr(bars, settings.atr_length)
+    timestamps, close = bars[:, 0], bars[:, 4]
+    trades, balance, cumulative_pnl, pos = [], settings.start_balance, 0.0, None
+
+    def record(index: int, close_price: float, status: str):
+        nonlocal balance, cumulative_pnl
+        pnl = pos["realized_pnl"] + backtester._calculate_pnl(pos["side"], pos["entry_price"], close_price, pos["amount"])
+        balance += pnl
+        cumulative_pnl += pnl
+        trades.append({
+            "id": len(trades) + 1, "symbol": symbol, "side": pos["side"], "amount": pos["initial_amount"],
+            "entry_price": pos["entry_price"], "close_price": close_price, "pnl": pnl, "status": status,
+            "opened_at": backtester._format_time(timestamps[pos["index"]]), "closed_at": backtester._format_time(timestamps[index]),
+            "cumulative_pnl": cumulative_pnl,
+        })
+
+    for i, current_price in enumerate(close):
+        if pos is not None:
+            side, entry_price = pos["side"], pos["entry_price"]
+            closed = False
+            partial_done = False
+            if settings.use_partial_tp and not pos["partial_tp_executed"]:
+                risk_per_unit = abs(entry_price - pos["initial_stop_loss"])
+                partial_tp_price = entry_price + risk_per_unit * settings.partial_tp_target_rr if side == "buy" else entry_price - risk_per_unit * settings.partial_tp_target_rr
+                if (side == "buy" and current_price >= partial_tp_price) or (side == "sell" and current_price <= partial_tp_price):
+                    close_amount = pos["amount"] * (settings.partial_tp_close_percent / 100)
+                    pos["realized_pnl"] = abs(current_price - entry_price) * close_amount
+                    pos["amount"] -= close_amount
+                    pos["stop_loss"] = entry_price
+                    pos["partial_tp_executed"] = True
+                    partial_done = True
+
+            if not partial_done:
+                sl_price = pos["stop_loss"]
+                if settings.use_trailing_stop_loss:
+                    trail = settings.trailing_stop_activation_percent / 100
+                    activation_price = entry_price * (1 + trail) if side == "buy" else entry_price * (1 - trail)
+                    if (side == "buy" and current_price > activation_price) or (side == "sell" and current_price < activation_price):
+                        candidate = current_price * (1 - trail) if side == "buy" else current_price * (1 + trail)
+                        if (side == "buy" and candidate > sl_price) or (side == "sell" and candidate < sl_price):
+                            pos["stop_loss"] = candidate
+                # _manage_position'daki gibi bu turun SL/TP kontrolü, tur başındaki SL ile yapılır.
+                if (side == "buy" and current_price <= sl_price) or (side == "sell" and current_price >= sl_price):
+                    record(i, float(current_price), "SL")
+                    closed = True
+                elif (side == "buy" and current_price >= pos["take_profit"]) or (side == "sell" and current_price <= pos["take_profit"]):
+                    record(i, float(current_price), "TP")
+                    closed = True
+            if closed:
+                pos = None
+            continue
+
+        if signals[i] != 0 and not np.isnan(atr[i]) and atr[i] > 0 and i < len(close) - 1:
+            direction = int(signals[i])
+            sl_distance = float(atr[i]) * settings.atr_multiplier_sl
+            entry_price = float(current_price)
+            stop_loss = entry_price - direction * sl_distance
+            amount = balance * (settings.risk_per_trade_percent / 100) / sl_distance
+            pos = {
+                "index": i, "side": "buy" if direction > 0 else "sell", "entry_price": entry_price,
+                "stop_loss": stop_loss, "initial_stop_loss": stop_loss,
+                "take_profit": entry_price + direction * sl_distance * settings.risk_reward_ratio_tp,
+                "amount": amount, "initial_amount": amount, "realized_pnl": 0.0, "partial_tp_executed": False,
+            }
+
+    if pos is not None:
+        record(len(close) - 1, float(close[-1]), "BACKTEST_END")
+    return trades
+
+
+SETTINGS = {
+    "defaults": BacktestSettings(),
+    "no_partial_tp": BacktestSettings(use_partial_tp=False),
+    "no_trailing": BacktestSettings(use_trailing_stop_loss=False),
+    "no_trailing_no_partial": BacktestSettings(use_trailing_stop_loss=False, use_partial_tp=False),
+    "far_partial_tp": BacktestSettings(partial_tp_target_rr=3.0, partial_tp_close_percent=25.0),
+    "tight_trailing": BacktestSettings(trailing_stop_activation_percent=0.3, atr_multiplier_sl=3.0),
+}
+
+
+@pytest.mark.parametrize("every", [37, 500])
+@pytest.mark.parametrize("name", SETTINGS)
+def test_vectorized_trades_match_bar_by_bar_port(name, every):
+    bars = make_bars(60_000, seed=1)
+    signals = periodic_signals(len(bars), every)
+    settings = SETTINGS[name]
+
+    expected = manage_position_bar_by_bar("BTC/USDT", bars, signals, settings)
+    actual = run_backtest("BTC/USDT", bars, signals, settings)
+
+    assert len(actual) == len(expected)
+    assert {trade["status"] for trade in expected} >= {"SL", "TP"}
+    for got, want in zip(actual, expected):
+        assert {key: got[key] for key in ("opened_at", "closed_at", "side", "status")} == \
+               {key: want[key] for key in ("opened_at", "closed_at", "side", "status")}
+        for key in ("amount", "entry_price", "close_price", "pnl", "cumulative_pnl"):
+            assert got[key] == pytest.approx(want[key], rel=1e-9), f"{got['opened_at']} {key}"
+
+
+def test_trades_follow_trade_history_schema():
+    bars = make_bars(5_000, seed=2)
+    trades = run_backtest("ETH/USDT", bars, periodic_signals(len(bars), 50))
+
+    assert trades
+    assert all(tuple(trade) == TRADE_HISTORY_COLUMNS for trade in trades)
+    assert trades[-1]["cumulative_pnl"] == pytest.approx(sum(trade["pnl"] for trade in trades))
@@ -0,0 +1,101 @@
+# tests/test_database.py
+# @author: Memba Co.
+
+import os
+import sqlite3
+import threading
+
+import pytest
+
+import database
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Her test için geçici bir veritabanı dosyası ve tek bir açık pozisyon hazırlar."""
+    database.close_all_connections()
+    monkeypatch.setattr(database, "DB_FILE", str(tmp_path / "data" / "trades.db"))
+    monkeypatch.setattr(database, "_LEGACY_DB_FILE", str(tmp_path / "trades.db"))
+    monkeypatch.setattr(database, "_registry", database.PositionRegistry())
+    database.init_db()
+    database.add_position({
+        "symbol": "BTC/USDT", "side": "buy", "amount": 1.0, "entry_price": 100.0, "timeframe": "15m",
+        "leverage": 10, "stop_loss": 95.0, "take_profit": 110.0,
+    })
+    yield database
+    database.close_all_connections()
+
+
+def _in_other_thread(func, *args):
+    """İşaret fiyatı akışının işçi thread'i gibi, çağıranın `unit_of_work` bloğu dışında çalışır."""
+    worker = threading.Thread(target=func, args=args)
+    worker.start()
+    worker.join()
+
+
+def _stored_stop_loss(symbol: str) -> float:
+    with database.get_db_connection() as conn:
+        return conn.execute("SELECT stop_loss FROM managed_positions WHERE symbol = ?", (symbol,)).fetchone()["stop_loss"]
+
+
+def test_tick_write_during_cycle_is_not_overwritten_by_queued_sl(db):
+    with db.unit_of_work():
+        db.update_position_sl("BTC/USDT", 101.0)
+        # Kontrolcü turu sürerken bir tetikleme, SL'yi daha da yukarı taşıyıp hemen kaydeder.
+        _in_other_thread(db.update_position_sl, "BTC/USDT", 103.0)
+        assert _stored_stop_loss("BTC/USDT") == 103.0
+
+    assert _stored_stop_loss("BTC/USDT") == 103.0
+    assert db.get_position("BTC/USDT")["stop_loss"] == 103.0
+
+
+def test_tick_write_during_cycle_survives_queued_partial_tp(db):
+    with db.unit_of_work():
+        db.update_position_after_partial_tp("BTC/USDT", 0.5, 100.0, 2.5)
+        _in_other_thread(db.update_position_sl, "BTC/USDT", 102.0)
+
+    position = db.get_position("BTC/USDT")
+    assert position["stop_loss"] == 102.0
+    assert position["amount"] == 0.5
+    assert position["partial_tp_executed"] == 1
+    assert position["realized_pnl"] == 2.5
+
+
+def test_queued_sl_updates_apply_in_order_without_interference(db):
+    with db.unit_of_work():
+        db.update_position_sl("BTC/USDT", 98.0)
+        db.update_position_sl("BTC/USDT", 99.5)
+        assert _stored_stop_loss("BTC/USDT") == 95.0
+
+    assert _stored_stop_loss("BTC/USDT") == 99.5
+    assert db.get_position("BTC/USDT")["stop_loss"] == 99.5
+
+
+def test_shutdown_checkpoints_wal_into_database_file(db):
+    db.update_position_sl("BTC/USDT", 97.0)
+    assert os.path.getsize(db.DB_FILE + "-wal") > 0
+
+    db.shutdown()
+
+    assert not os.path.exists(db.DB_FILE + "-wal") or os.path.getsize(db.DB_FILE + "-wal") == 0
+    with sqlite3.connect(db.DB_FILE) as conn:
+        assert conn.execute("SELECT stop_loss FROM managed_positions").fetchone()[0] == 97.0
+
+
+def test_legacy_database_is_moved_into_data_dir(tmp_path, monkeypatch):
+    legacy = tmp_path / "trades.db"
+    with sqlite3.connect(legacy) as conn:
+        conn.execute("CREATE TABLE managed_positions (symbol TEXT)")
+        conn.execute("INSERT INTO managed_positions VALUES ('ETH/USDT')")
+    conn.close()
+    database.close_all_connections()
+    monkeypatch.setattr(database, "DB_FILE", str(tmp_path / "data" / "trades.db"))
+    monkeypatch.setattr(database, "_LEGACY_DB_FILE", str(legacy))
+    monkeypatch.setattr(database, "_registry", database.PositionRegistry())
+
+    database._migrate_legacy_db_file()
+
+    assert not legacy.exists()
+    with sqlite3.connect(database.DB_FILE) as conn:
+        assert conn.execute("SELECT symbol FROM managed_positions").fetchall() == [("ETH/USDT",)]
+    conn.close()
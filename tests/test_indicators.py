@@ -0,0 +1,110 @@
+# tests/test_indicators.py
+# @author: Memba Co.
+
+import math
+import random
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pandas_ta")  # df.ta erişimcisini kaydeder
+
+from indicators import IndicatorEngine
+
+# Motorun çıktı anahtarları ile tools.get_technical_indicators'ın kullandığı pandas-ta sütunları.
+PANDAS_TA_COLUMNS = {
+    "rsi": "RSI_14", "macd_line": "MACD_12_26_9", "macd_signal": "MACDs_12_26_9",
+    "bband_lower": "BBL_20_2.0", "bband_middle": "BBM_20_2.0", "bband_upper": "BBU_20_2.0",
+    "stoch_k": "STOCHk_14_3_3", "stoch_d": "STOCHd_14_3_3", "adx": "ADX_14", "atr": "ATRr_14",
+}
+REL_TOL = 1e-6
+WINDOW = 200  # Canlıda her çağrıda motora verilen mum sayısı.
+
+
+def make_bars(count: int, seed: int = 42, start_ts: int = 1_700_000_000_000, step_ms: int = 900_000) -> list[list]:
+    """Rastgele yürüyüşle üretilmiş, her çalıştırmada aynı olan OHLCV mumları."""
+    rng = random.Random(seed)
+    bars, price = [], 100.0
+    for i in range(count):
+        open_price = price
+        close = max(open_price * (1 + rng.gauss(0, 0.01)), 1.0)
+        high = max(open_price, close) * (1 + abs(rng.gauss(0, 0.004)))
+        low = min(open_price, close) * (1 - abs(rng.gauss(0, 0.004)))
+        bars.append([start_ts + i * step_ms, open_price, high, low, close, rng.uniform(10, 1000)])
+        price = close
+    return bars
+
+
+def pandas_ta_reference(bars: list[list]):
+    """Aynı mumlar için pandas-ta'nın tam hesaplaması; her satır o muma kadarki veriyle hesaplanmış değerleri içerir."""
+    df = pd.DataFrame(bars, columns=["timestamp", "open", "high", "low", "close", "volume"])
+    df.ta.rsi(append=True); df.ta.macd(append=True); df.ta.bbands(append=True); df.ta.stoch(append=True); df.ta.adx(append=True)
+    df.ta.atr(append=True)
+    return df
+
+
+def assert_matches(actual: dict, row, context: str):
+    mismatches = {}
+    for key, column in PANDAS_TA_COLUMNS.items():
+        value, reference = actual.get(key), row[column]
+        if pd.isna(reference) and value is None:
+            continue
+        if value is None or pd.isna(reference) or not math.isclose(value, reference, rel_tol=REL_TOL, abs_tol=1e-9):
+            mismatches[key] = (value, reference)
+    assert not mismatches, f"{context}: pandas-ta ile uyuşmayan göstergeler {{anahtar: (motor, pandas-ta)}}: {mismatches}"
+
+
+def test_cold_start_matches_pandas_ta():
+    bars = make_bars(WINDOW)
+    reference = pandas_ta_reference(bars)
+
+    actual = IndicatorEngine().update(bars)
+
+    assert_matches(actual, reference.iloc[-1], "soğuk başlangıç")
+    assert all(actual[key] is not None for key in PANDAS_TA_COLUMNS)
+
+
+def test_warm_up_period_returns_none_like_pandas_ta():
+    bars = make_bars(30)
+    reference = pandas_ta_reference(bars)
+
+    assert_matches(IndicatorEngine().update(bars), reference.iloc[-1], "ısınma dönemi")
+
+
+def test_streaming_bar_by_bar_matches_pandas_ta():
+    bars = make_bars(WINDOW + 300)
+    # Göstergeler geriye bakmadığından, tam serinin i. satırı ilk i+1 mumla yapılan hesaplamaya eşittir.
+    reference = pandas_ta_reference(bars)
+    engine = IndicatorEngine()
+    engine.update(bars[:WINDOW])
+
+    for i in range(WINDOW, len(bars)):
+        window = bars[i + 1 - WINDOW:i + 1]
+        forming = bars[i]
+        # Mum oluşurken farklı fiyatlarla yapılan ara çağrılar motorun kalıcı durumunu değiştirmemeli.
+        for factor in (0.97, 1.03):
+            intrabar = [forming[0], forming[1], max(forming[2], forming[4] * factor), min(forming[3], forming[4] * factor), forming[4] * factor, forming[5]]
+            engine.update(window[:-1] + [intrabar])
+
+        assert_matches(engine.update(window), reference.iloc[i], f"mum {i}")
+
+
+def test_forming_bar_matches_pandas_ta_with_intrabar_price():
+    bars = make_bars(WINDOW + 50)
+    engine = IndicatorEngine()
+    engine.update(bars[:-1])
+
+    forming = list(bars[-1])
+    forming[4] = forming[2] = forming[2] * 1.02
+    updated = bars[:-1] + [forming]
+
+    assert_matches(engine.update(updated[-WINDOW:]), pandas_ta_reference(updated).iloc[-1], "oluşan mum")
+
+
+def test_non_contiguous_series_rebuilds_from_scratch():
+    engine = IndicatorEngine()
+    engine.update(make_bars(WINDOW, seed=1))
+    # Önceki durumla ortak kapanmış mumu olmayan seri (örn: önbellek boşluk nedeniyle yeniden indirildi).
+    other = make_bars(WINDOW, seed=2, start_ts=1_800_000_000_000)
+
+    assert_matches(engine.update(other), pandas_ta_reference(other).iloc[-1], "yeniden oluşturma")
@@ -0,0 +1,127 @@
+# tests/test_position_stream.py
+# @author: Memba Co.
+
+import socket
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+import config
+from position_stream import LocalMarkPriceServer, MarkPriceStream, _stream_name, resolve_stream_url
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_for(predicate, timeout: float = 5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("Beklenen durum zaman aşımına kadar oluşmadı.")
+        await asyncio.sleep(0.01)
+
+
+class _Harness:
+    """Yerel sunucuyu ve ona bağlanan akışı aynı olay döngüsünde çalıştırır; gelen tetiklemeleri kaydeder."""
+
+    def __init__(self, symbols: set[str]):
+        self.symbols = set(symbols)
+        self.ticks: list[tuple[str, float]] = []
+        self._ticks_lock = threading.Lock()
+        self.server = LocalMarkPriceServer(port=_free_port())
+        self.stream = MarkPriceStream(self.server.url, self._on_tick, symbols_provider=lambda: set(self.symbols), resync_seconds=0.05)
+
+    def _on_tick(self, symbol: str, mark_price: float):
+        # Tetikleyiciler canlıdaki gibi akışın işçi thread'lerinde çalışır.
+        with self._ticks_lock:
+            self.ticks.append((symbol, mark_price))
+
+    def subscribed_streams(self) -> set[str]:
+        return set().union(*self.server.clients.values()) if self.server.clients else set()
+
+    async def __aenter__(self):
+        await self.server.start()
+        self.task = asyncio.create_task(self.stream.run())
+        return self
+
+    async def __aexit__(self, *exc):
+        self.stream.stop()
+        await self.server.stop()
+        self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
+
+
+def test_tick_reaches_callback_for_subscribed_symbols_only():
+    async def scenario():
+        async with _Harness({"BTC/USDT"}) as harness:
+            await _wait_for(lambda: _stream_name("BTC/USDT") in harness.subscribed_streams())
+
+            await harness.server.push("ETH/USDT", 2500.0)
+            await harness.server.push("BTC/USDT", 65000.5)
+            await _wait_for(lambda: harness.ticks)
+
+            await asyncio.sleep(0.1)
+            assert harness.ticks == [("BTC/USDT", 65000.5)]
+
+    asyncio.run(scenario())
+
+
+def test_subscriptions_follow_managed_positions():
+    async def scenario():
+        async with _Harness({"BTC/USDT"}) as harness:
+            await _wait_for(lambda: harness.subscribed_streams() == {_stream_name("BTC/USDT")})
+
+            harness.symbols = {"ETH/USDT"}
+            await _wait_for(lambda: harness.subscribed_streams() == {_stream_name("ETH/USDT")})
+
+            await harness.server.push("ETH/USDT", 2500.0)
+            await _wait_for(lambda: harness.ticks == [("ETH/USDT", 2500.0)])
+
+    asyncio.run(scenario())
+
+
+def test_resubscribes_after_reconnect():
+    async def scenario():
+        async with _Harness({"BTC/USDT", "ETH/USDT"}) as harness:
+            expected = {_stream_name("BTC/USDT"), _stream_name("ETH/USDT")}
+            await _wait_for(lambda: harness.subscribed_streams() == expected)
+            first_connection = next(iter(harness.server.clients))
+
+            # Sunucu bağlantıyı keser (örn: Binance'in 24 saatlik bağlantı sınırı); istemci yeniden bağlanmalı.
+            await first_connection.close()
+            await _wait_for(lambda: first_connection not in harness.server.clients)
+            await _wait_for(lambda: harness.subscribed_streams() == expected, timeout=10.0)
+            assert first_connection not in harness.server.clients
+
+            await harness.server.push("ETH/USDT", 2400.0)
+            await _wait_for(lambda: harness.ticks == [("ETH/USDT", 2400.0)])
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("env, expected", [
+    ({}, config.POSITION_STREAM_URL),
+    ({"USE_TESTNET": "False"}, config.POSITION_STREAM_URL),
+    ({"USE_TESTNET": "True"}, config.POSITION_STREAM_TESTNET_URL),
+    ({"USE_TESTNET": "True", "MARK_PRICE_STREAM_URL": "ws://127.0.0.1:8765/stream"}, "ws://127.0.0.1:8765/stream"),
+    ({"USE_EXCHANGE_SIMULATOR": "true"}, None),
+    ({"USE_EXCHANGE_SIMULATOR": "true", "MARK_PRICE_STREAM_URL": "ws://127.0.0.1:8765/stream"}, None),
+])
+def test_stream_url_follows_exchange_mode(monkeypatch, env, expected):
+    for name in ("USE_TESTNET", "USE_EXCHANGE_SIMULATOR", "MARK_PRICE_STREAM_URL"):
+        monkeypatch.delenv(name, raising=False)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+
+    assert resolve_stream_url() == expected
+
+
+def test_testnet_stream_is_not_mainnet():
+    assert "stream.binancefuture.com" in config.POSITION_STREAM_TESTNET_URL
+    assert config.POSITION_STREAM_TESTNET_URL != config.POSITION_STREAM_URL
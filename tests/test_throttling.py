@@ -0,0 +1,51 @@
+# tests/test_throttling.py
+# @author: Memba Co.
+
+import ast
+import os
+
+import pytest
+
+from metrics import EXCHANGE_REQUEST_PREFIXES
+from throttling import ENDPOINT_WEIGHTS, endpoint_weight
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _exchange_requests(filename: str) -> set[str]:
+    """Dosyada `exchange.<metot>(...)` biçiminde çağrılan ve bütçeye takılan (ağ isteği yapan) metotlar."""
+    with open(os.path.join(ROOT, filename), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    return {
+        node.func.attr for node in ast.walk(tree)
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+        and isinstance(node.func.value, ast.Name) and node.func.value.id == "exchange"
+        and node.func.attr.startswith(EXCHANGE_REQUEST_PREFIXES)
+    }
+
+
+@pytest.mark.parametrize("filename", ["tools.py", "market_data.py"])
+def test_every_exchange_request_has_a_weight(filename):
+    methods = _exchange_requests(filename)
+
+    assert methods
+    assert sorted(methods - set(ENDPOINT_WEIGHTS)) == []
+
+
+@pytest.mark.parametrize("method, params, expected", [
+    ("fapiPublicGetTicker24hr", None, 40),
+    ("fapiPublicGetTicker24hr", {"symbol": "BTCUSDT"}, 1),
+    ("fapiPublicGetTickerPrice", None, 2),
+    ("fapiPublicGetPremiumIndex", None, 10),
+    ("fapiPublicGetPremiumIndex", {"symbol": "BTCUSDT"}, 1),
+])
+def test_market_wide_endpoints_weigh_more_without_a_symbol(method, params, expected):
+    args = (params,) if params is not None else ()
+    assert endpoint_weight(method, args) == expected
+
+
+def test_open_orders_and_ohlcv_weights_follow_arguments():
+    assert endpoint_weight("fetch_open_orders", ("BTC/USDT",)) == 1
+    assert endpoint_weight("fetch_open_orders") == 40
+    assert endpoint_weight("fetch_ohlcv", ("BTC/USDT", "15m", None, 1000)) == 5
+    assert endpoint_weight("fetch_ohlcv", ("BTC/USDT", "15m"), {"limit": 50}) == 1
@@ -0,0 +1,358 @@
+# throttling.py
+# @author: Memba Co.
+
+import os
+import time
+import struct
+import asyncio
+import logging
+import threading
+from functools import wraps
+from contextlib import contextmanager
+
+import config
+import metrics
+from metrics import EXCHANGE_REQUEST_PREFIXES
+
+try:
+    import fcntl
+except ImportError:  # Windows: süreçler arası dosya kilidi yok, süreç içi kilit yine geçerli.
+    fcntl = None
+
+
+class RateLimiter:
+    """
+    Thread'ler arasında paylaşılan token-bucket hız sınırlayıcı.
+    `acquire()` bir token alır; token yoksa sırası gelene kadar çağıran thread'i bekletir.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int = 1):
+        self.rate = rate_per_minute / 60.0
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Bir token tüketir ve beklenen süreyi (saniye) döndürür."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class AsyncRateLimiter:
+    """
+    asyncio görevleri için token-bucket hız sınırlayıcı ve eş zamanlı istek sınırı.
+    `async with limiter:` bloğu hem bir token tüketir hem de eş zamanlı istek sayısını sınırlar.
+    """
+
+    def __init__(self, rate_per_second: float, max_concurrent: int):
+        self.rate = rate_per_second
+        self.max_concurrent = max(1, max_concurrent)
+        self._tokens = float(self.max_concurrent)
+        self._updated_at = time.monotonic()
+        self._semaphore = None
+
+    async def __aenter__(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        await self._semaphore.acquire()
+        if self.rate > 0:
+            now = time.monotonic()
+            self._tokens = min(self.max_concurrent, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+            if self._tokens < 0:
+                await asyncio.sleep(-self._tokens / self.rate)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._semaphore.release()
+        return False
+
+
+# --- Borsa istek ağırlığı bütçesi ---
+# Binance, IP başına dakikalık bir "ağırlık" limiti uygular; aşılırsa 429, ısrar edilirse 418 (IP yasağı) döner.
+# Aşağıdaki tablo kullandığımız uç noktaların ağırlıklarıdır (USDⓈ-M Futures dokümantasyonu). Tabloda olmayan
+# istekler varsayılan ağırlıkla sayılır; gerçek kullanım her yanıttaki `X-MBX-USED-WEIGHT-1M` başlığıyla düzeltilir.
+DEFAULT_ENDPOINT_WEIGHT = 1
+PRIORITIES = ("high", "normal", "low")
+
+_priority = threading.local()
+
+
+def _arg(args: tuple, kwargs: dict, name: str, index: int, default=None):
+    if name in kwargs:
+        return kwargs[name]
+    return args[index] if len(args) > index else default
+
+
+def _ohlcv_weight(args: tuple, kwargs: dict) -> int:
+    limit = _arg(args, kwargs, "limit", 3) or 500
+    return 1 if limit < 100 else 2 if limit < 500 else 5 if limit <= 1000 else 10
+
+
+def _order_book_weight(args: tuple, kwargs: dict) -> int:
+    limit = _arg(args, kwargs, "limit", 1) or 500
+    return 2 if limit <= 50 else 5 if limit <= 100 else 10 if limit <= 500 else 20
+
+
+def _open_orders_weight(args: tuple, kwargs: dict) -> int:
+    return 1 if _arg(args, kwargs, "symbol", 0) else 40
+
+
+def _market_wide_weight(single: int, market_wide: int):
+    """Örtük (implicit) API uçları için: parametrelerde sembol varsa tek sembollük, yoksa tüm piyasanın ağırlığı."""
+    def weight(args: tuple, kwargs: dict) -> int:
+        params = _arg(args, kwargs, "params", 0) or {}
+        return single if params.get("symbol") else market_wide
+    return weight
+
+
+ENDPOINT_WEIGHTS = {
+    "load_markets": 10,
+    "fetch_ohlcv": _ohlcv_weight,
+    "fetch_order_book": _order_book_weight,
+    "fetch_open_orders": _open_orders_weight,
+    "fetch_ticker": 1,
+    "fetch_tickers": 40,
+    "fetch_funding_rate": 1,
+    "fetch_balance": 5,
+    "fetch_positions_risk": 5,
+    "fetch_order": 1,
+    "set_leverage": 1,
+    "fapiPublicGetTickerPrice": _market_wide_weight(1, 2),
+    "fapiPublicGetTicker24hr": _market_wide_weight(1, 40),
+    "fapiPublicGetPremiumIndex": _market_wide_weight(1, 10),
+    # Emir uçlarının IP ağırlığı 0'dır; yine de IP yasağı sırasında bekletilmeleri için en az 1 sayılır.
+    "create_order": 1,
+    "create_market_order": 1,
+    "create_limit_order": 1,
+    "create_orders": 5,
+    "cancel_order": 1,
+    "cancel_all_orders": 1,
+}
+
+
+def endpoint_weight(method: str, args: tuple = (), kwargs: dict | None = None) -> int:
+    weight = ENDPOINT_WEIGHTS.get(method, DEFAULT_ENDPOINT_WEIGHT)
+    return weight(args, kwargs or {}) if callable(weight) else weight
+
+
+@contextmanager
+def request_priority(priority: str):
+    """
+    Bu blok (veya dekore edilen fonksiyon) içinde aynı thread'den yapılan borsa isteklerinin önceliğini ayarlar.
+    Bütçe daralınca önce 'low' (tarama, dashboard yenileme), en son 'high' (pozisyon kontrolü, kapatma) istekler bekletilir.
+    """
+    previous = getattr(_priority, "value", None)
+    _priority.value = priority
+    try:
+        yield
+    finally:
+        _priority.value = previous
+
+
+def current_priority() -> str:
+    return getattr(_priority, "value", None) or "normal"
+
+
+class WeightBudget:
+    """
+    Borsa istek ağırlığını dakikalık pencerelerle sayan ve öncelik bazlı kısıtlayan muhasebeci.
+    Durum (dakika, kullanılan ağırlık, yasak bitişi) küçük bir dosyada tutulur ve `flock` ile korunur;
+    böylece bot süreci (kontrolcü, tarayıcı, Telegram) ve ayrı çalışan dashboard aynı bütçeyi paylaşır.
+    """
+    _RECORD = struct.Struct("<qdd")
+
+    def __init__(self, path: str, limit_per_minute: float, priority_shares: dict, default_ban_seconds: float):
+        self.path = path
+        self.limit_per_minute = limit_per_minute
+        self.priority_shares = priority_shares
+        self.default_ban_seconds = default_ban_seconds
+        self._fd = None
+        self._fallback_state = [0, 0.0, 0.0]
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "weight": 0, "throttled_requests": 0, "throttled_seconds": 0.0, "header_syncs": 0, "bans": 0}
+
+    def _file(self) -> int | None:
+        if self._fd is None:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            except OSError as e:
+                logging.warning(f"Ağırlık bütçesi dosyası açılamadı, bütçe sadece bu süreç için tutulacak: {e}")
+                self._fd = -1
+        return self._fd if self._fd >= 0 else None
+
+    @contextmanager
+    def _shared_state(self):
+        """Paylaşılan durumu [dakika, kullanılan ağırlık, yasak bitişi] listesi olarak kilit altında okuyup geri yazar."""
+        with self._lock:
+            fd = self._file()
+            if fd is None:
+                yield self._fallback_state
+                return
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                os.lseek(fd, 0, os.SEEK_SET)
+                data = os.read(fd, self._RECORD.size)
+                state = list(self._RECORD.unpack(data)) if len(data) == self._RECORD.size else [0, 0.0, 0.0]
+                yield state
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.write(fd, self._RECORD.pack(int(state[0]), float(state[1]), float(state[2])))
+            finally:
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _roll(state: list, now: float):
+        minute = int(now // 60)
+        if state[0] != minute:
+            state[0], state[1] = minute, 0.0
+
+    def try_acquire(self, weight: float, priority: str) -> float:
+        """Önceliğin payı yetiyorsa ağırlığı ayırıp 0, yetmiyorsa beklenmesi gereken süreyi (saniye) döndürür."""
+        allowed = self.limit_per_minute * self.priority_shares.get(priority, self.priority_shares["normal"])
+        now = time.time()
+        with self._shared_state() as state:
+            if state[2] > now:
+                return state[2] - now
+            self._roll(state, now)
+            # Boş bir pencerede, payından büyük tek bir istek de yapılabilmelidir.
+            if state[1] > 0 and state[1] + weight > allowed:
+                return (state[0] + 1) * 60 - now
+            state[1] += weight
+        return 0.0
+
+    def _account(self, weight: float, priority: str, waited: float):
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["weight"] += weight
+            if waited > 0:
+                self.stats["throttled_requests"] += 1
+                self.stats["throttled_seconds"] += waited
+        if waited >= 1:
+            logging.info(f"Borsa ağırlık bütçesi: '{priority}' öncelikli istek {waited:.1f}s bekletildi.")
+
+    def acquire(self, weight: float, priority: str | None = None) -> float:
+        """Bütçeden ağırlık ayırır; gerekirse çağıran thread'i bekletir ve beklenen süreyi döndürür."""
+        priority = priority or current_priority()
+        started = time.monotonic()
+        while (wait := self.try_acquire(weight, priority)) > 0:
+            time.sleep(wait)
+        waited = time.monotonic() - started
+        self._account(weight, priority, waited if waited > 0.001 else 0.0)
+        return waited
+
+    async def acquire_async(self, weight: float, priority: str | None = None) -> float:
+        priority = priority or current_priority()
+        started = time.monotonic()
+        while (wait := self.try_acquire(weight, priority)) > 0:
+            await asyncio.sleep(wait)
+        waited = time.monotonic() - started
+        self._account(weight, priority, waited if waited > 0.001 else 0.0)
+        return waited
+
+    def update_from_headers(self, headers):
+        """Yanıttaki `X-MBX-USED-WEIGHT-1M` başlığıyla (diğer istemcilerin kullanımı dahil) sayacı düzeltir."""
+        if not headers:
+            return
+        used = next((value for key, value in headers.items() if key.lower() == "x-mbx-used-weight-1m"), None)
+        try:
+            used = float(used)
+        except (TypeError, ValueError):
+            return
+        with self._shared_state() as state:
+            self._roll(state, time.time())
+            state[1] = max(state[1], used)
+            self.stats["header_syncs"] += 1
+
+    def record_ban(self, headers=None):
+        """429/418 yanıtından sonra, `Retry-After` süresi boyunca tüm istekleri durdurur."""
+        retry_after = next((value for key, value in (headers or {}).items() if key.lower() == "retry-after"), None)
+        try:
+            seconds = float(retry_after)
+        except (TypeError, ValueError):
+            seconds = self.default_ban_seconds
+        with self._shared_state() as state:
+            state[2] = max(state[2], time.time() + seconds)
+            self.stats["bans"] += 1
+        logging.error(f"Borsa istek limiti aşıldı (429/418). Tüm istekler {seconds:.0f}s durduruluyor.")
+
+    def used_weight(self) -> float:
+        with self._shared_state() as state:
+            self._roll(state, time.time())
+            return state[1]
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """ccxt'nin 429 (RateLimitExceeded) ve 418 (DDoSProtection) hataları; ccxt'yi import etmeden sınıf adıyla tanınır."""
+    return any(cls.__name__ in ("RateLimitExceeded", "DDoSProtection") for cls in type(error).__mro__)
+
+
+class WeightBudgetedExchange:
+    """
+    ccxt nesnesini saran vekil: ağ isteği yapan her metottan önce bütçeden ağırlık ayırır, sonra yanıt
+    başlıklarıyla bütçeyi düzeltir. Diğer tüm nitelik okuma/yazmaları doğrudan asıl nesneye iletilir.
+    """
+    __slots__ = ("_exchange", "_budget")
+
+    def __init__(self, exchange, budget: WeightBudget):
+        object.__setattr__(self, "_exchange", exchange)
+        object.__setattr__(self, "_budget", budget)
+
+    def __getattr__(self, name: str):
+        value = getattr(self._exchange, name)
+        if not callable(value) or not name.startswith(EXCHANGE_REQUEST_PREFIXES):
+            return value
+        exchange, budget = self._exchange, self._budget
+
+        @wraps(value)
+        def budgeted_request(*args, **kwargs):
+            budget.acquire(endpoint_weight(name, args, kwargs))
+            try:
+                return value(*args, **kwargs)
+            except Exception as e:
+                if is_rate_limit_error(e):
+                    budget.record_ban(getattr(exchange, "last_response_headers", None))
+                raise
+            finally:
+                budget.update_from_headers(getattr(exchange, "last_response_headers", None))
+        return budgeted_request
+
+    def __setattr__(self, name: str, value):
+        setattr(self._exchange, name, value)
+
+
+weight_budget = WeightBudget(
+    path=os.path.join(os.path.dirname(os.path.abspath(__file__)), config.EXCHANGE_WEIGHT_STATE_FILE),
+    limit_per_minute=config.EXCHANGE_WEIGHT_LIMIT_PER_MINUTE,
+    priority_shares=config.EXCHANGE_WEIGHT_PRIORITY_SHARES,
+    default_ban_seconds=config.EXCHANGE_WEIGHT_BAN_DEFAULT_SECONDS,
+)
+
+
+def budget_exchange(exchange):
+    return WeightBudgetedExchange(exchange, weight_budget) if config.EXCHANGE_WEIGHT_BUDGET_ENABLED else exchange
+
+
+def _collect_weight_metrics():
+    stats = dict(weight_budget.stats)
+    yield ("memba_exchange_weight_used", "gauge", "Bu dakikada kullanılan borsa istek ağırlığı (tüm süreçler)", {}, weight_budget.used_weight())
+    yield ("memba_exchange_weight_limit", "gauge", "Dakikalık borsa istek ağırlığı limiti", {}, weight_budget.limit_per_minute)
+    for event in ("requests", "weight", "throttled_requests", "throttled_seconds", "header_syncs", "bans"):
+        yield ("memba_exchange_weight_events_total", "counter", "Ağırlık bütçesi olayları (bu süreç)", {"event": event}, stats[event])
+
+
+if config.EXCHANGE_WEIGHT_BUDGET_ENABLED:
+    metrics.registry.register_collector(_collect_weight_metrics)
@@ -4,17 +4,21 @@
 import os
 import ccxt
 import time
-import pandas as pd
-import pandas_ta as ta
 import logging
 import requests
 import ast
+import uuid
 from datetime import datetime
 from dotenv import load_dotenv
-from langchain.tools import tool
+from langchain_core.tools import tool
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 import config
+import metrics
+from throttling import budget_exchange
+from market_data import candle_cache, candle_store, ticker_snapshot, funding_rate_cache
+from indicators import indicator_registry
+from notifications import send_telegram_message
 
 def str_to_bool(val: str) -> bool:
     """Metin bir değeri boolean'a çevirir."""
@@ -24,9 +28,22 @@ load_dotenv()
 exchange = None
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+_retries = metrics.counter("memba_retries_total", "Hata nedeniyle yeniden denenen araç çağrıları", ("function",))
+
+def _record_retry(retry_state):
+    """tenacity `before_sleep` kancası: her yeniden denemeyi fonksiyon adıyla sayar."""
+    _retries.inc(function=retry_state.fn.__name__)
+
 def initialize_exchange(market_type: str = "spot"):
     """Global borsa nesnesini, belirtilen piyasa türü için ayarlar."""
     global exchange
+    if str_to_bool(os.getenv("USE_EXCHANGE_SIMULATOR", "False")):
+        from exchange_simulator import create_simulated_exchange
+        exchange = metrics.instrument_exchange(create_simulated_exchange(market_type))
+        exchange.load_markets()
+        logging.warning(f"--- BORSA SİMÜLATÖRÜ KULLANILIYOR ('{market_type.upper()}' pazarı, {len(exchange.symbols)} sembol) ---")
+        return
+
     use_testnet = str_to_bool(os.getenv("USE_TESTNET", "False"))
     api_key = os.getenv("BINANCE_API_KEY")
     secret_key = os.getenv("BINANCE_SECRET_KEY")
@@ -44,6 +61,8 @@ def initialize_exchange(market_type: str = "spot"):
         exchange.set_sandbox_mode(True)
     else:
         exchange = ccxt.binance(config_data)
+    # Ağırlık bütçesi sadece gerçek borsaya uygulanır; simülatörün limiti yoktur.
+    exchange = budget_exchange(metrics.instrument_exchange(exchange))
 
     try:
         exchange.load_markets()
@@ -76,9 +95,33 @@ def calculate_pnl(side: str, entry_price: float, close_price: float, amount: flo
     elif side.lower() == 'sell': return (entry_price - close_price) * amount
     return 0.0
 
-@retry(wait=wait_exponential(multiplier=1, min=2, max=10), stop=stop_after_attempt(3))
+def _fetch_all_last_prices() -> dict[str, float]:
+    """Tüm sembollerin son fiyatlarını tek bir istekle çeker ({'BTC/USDT': 65000.0, ...})."""
+    if exchange.options.get('defaultType') == 'future':
+        return {_get_unified_symbol(t['symbol']): float(t['price']) for t in exchange.fapiPublicGetTickerPrice() if t.get('symbol', '').endswith('USDT')}
+    return {_get_unified_symbol(s): float(t['last']) for s, t in exchange.fetch_tickers().items() if s.split(':')[0].endswith('/USDT') and t.get('last') is not None}
+
+def _fetch_all_funding_rates() -> dict[str, dict]:
+    """Tüm USDT-M sembollerinin fonlama verisini tek bir premiumIndex isteğiyle çeker."""
+    funding_rates = {}
+    for item in exchange.fapiPublicGetPremiumIndex():
+        if not item.get('symbol', '').endswith('USDT'): continue
+        try:
+            funding_rates[_get_unified_symbol(item['symbol'])] = {
+                "funding_rate": float(item['lastFundingRate']),
+                "mark_price": float(item['markPrice']),
+                "next_funding_time": int(item['nextFundingTime']),
+            }
+        except (KeyError, TypeError, ValueError):
+            continue
+    return funding_rates
+
+@retry(wait=wait_exponential(multiplier=1, min=2, max=10), stop=stop_after_attempt(3), before_sleep=_record_retry)
 def _fetch_price_natively(symbol: str) -> float | None:
     if not exchange: return None
+    if config.TICKER_SNAPSHOT_ENABLED:
+        price = ticker_snapshot.get_price(_get_unified_symbol(symbol), _fetch_all_last_prices)
+        if price is not None: return price
     try:
         ticker = exchange.fetch_ticker(_get_unified_symbol(symbol))
         return float(ticker.get("last")) if ticker and ticker.get("last") is not None else None
@@ -86,6 +129,15 @@ def _fetch_price_natively(symbol: str) -> float | None:
         logging.warning(f"{symbol} için fiyat çekilirken yeniden denenecek hata: {e}")
         raise
 
+def _fetch_ohlcv(symbol: str, timeframe: str, limit: int = 200) -> list:
+    """OHLCV verisini, etkinse paylaşılan mum önbelleği veya diskteki mum deposu üzerinden çeker."""
+    unified_symbol = _get_unified_symbol(symbol)
+    if config.OHLCV_CACHE_ENABLED:
+        return candle_cache.get_ohlcv(exchange, unified_symbol, timeframe, limit=limit)
+    if config.OHLCV_STORE_ENABLED:
+        return candle_store.get_ohlcv(exchange, unified_symbol, timeframe, limit=limit)
+    return exchange.fetch_ohlcv(unified_symbol, timeframe=timeframe, limit=limit)
+
 @tool
 def get_market_price(symbol: str) -> str:
     """Belirtilen kripto para biriminin anlık piyasa fiyatını alır."""
@@ -97,7 +149,7 @@ def get_market_price(symbol: str) -> str:
         return f"HATA: Fiyat alınamadı. Sembol: '{symbol}'. Hata: {e}"
 
 @tool
-@retry(wait=wait_exponential(multiplier=1, min=4, max=15), stop=stop_after_attempt(3))
+@retry(wait=wait_exponential(multiplier=1, min=4, max=15), stop=stop_after_attempt(3), before_sleep=_record_retry)
 def get_technical_indicators(params_str: str) -> dict:
     """
     Metin olarak verilen bir sözlüğü (örn: "{'symbol': 'BTC/USDT', 'timeframe': '1h'}")
@@ -117,10 +169,21 @@ def get_technical_indicators(params_str: str) -> dict:
     
     try:
         logging.info(f"  [TI Tool] Adım 2a: OHLCV verisi çekiliyor ({symbol}, {timeframe})...")
-        bars = exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=200)
+        bars = _fetch_ohlcv(symbol, timeframe, limit=200)
         logging.info(f"  [TI Tool] Adım 2b: OHLCV verisi çekildi, {len(bars) if bars else 0} mum alındı.")
         if not bars or len(bars) < 50: return {"status": "error", "message": f"Yetersiz veri ({len(bars) if bars else 0} mum)."}
         
+        if config.USE_INCREMENTAL_INDICATORS:
+            logging.info(f"  [TI Tool] Adım 2c: Teknik analiz hesaplamaları (artımlı motor) yapılıyor...")
+            values = indicator_registry.compute(_get_unified_symbol(symbol), timeframe, bars)
+            if values is None: return {"status": "error", "message": "Temizlendikten sonra yetersiz veri (0 mum)."}
+            indicators = {key: values.get(key) for key in ("rsi", "macd_line", "macd_signal", "bband_lower", "bband_middle", "bband_upper", "stoch_k", "stoch_d", "adx")}
+            logging.info(f"  [TI Tool] Adım 2d: Hesaplamalar tamamlandı.")
+            return {"status": "success", "data": indicators}
+
+        # pandas/pandas-ta sadece artımlı motor kapalıyken gerekir; başlangıcı yavaşlatmamak için burada yüklenir.
+        import pandas as pd
+        import pandas_ta  # noqa: F401  (df.ta erişimcisini kaydeder)
         df = pd.DataFrame(bars, columns=["timestamp", "open", "high", "low", "close", "volume"])
         for col in ['open', 'high', 'low', 'close', 'volume']: df[col] = pd.to_numeric(df[col], errors='coerce')
         df.dropna(inplace=True)
@@ -144,6 +207,156 @@ def get_technical_indicators(params_str: str) -> dict:
         logging.error(f"Teknik gösterge alınırken beklenmedik hata ({symbol}, {timeframe}): {e}", exc_info=True)
         return {"status": "error", "message": f"Beklenmedik hata: {e}"}
 
+def _order_rejection(order) -> str | None:
+    """Toplu emir yanıtındaki bir bacağın ret nedenini döndürür; emir kabul edildiyse None."""
+    if not isinstance(order, dict):
+        return f"geçersiz yanıt: {order}"
+    info = order.get("info") if isinstance(order.get("info"), dict) else {}
+    if order.get("status") == "rejected" or "code" in info or not order.get("id"):
+        return f"{info.get('code', '?')}: {info.get('msg', 'emir reddedildi')}"
+    return None
+
+def _unwind_bracket_entry(unified_symbol: str, side: str, order_id: str | None = None, client_order_id: str | None = None) -> dict:
+    """
+    Giriş emrini borsadan sorgular; hâlâ açıksa iptal eder, dolmuş kısmını reduceOnly piyasa emriyle kapatır.
+    Kapatılan miktar, emrin gerçekten dolan miktarı ile borsadaki pozisyonun (aynı yönde) büyüklüğünü aşmaz;
+    böylece botun sahibi olmadığı bir pozisyona dokunulmaz. reduceOnly ters pozisyon açılmasını da önler.
+    """
+    step = {"action": "close", "leg": "entry"}
+    try:
+        params = {'clientOrderId': client_order_id} if client_order_id else {}
+        try:
+            order = exchange.fetch_order(order_id, unified_symbol, params)
+        except ccxt.OrderNotFound:
+            # İstek borsaya hiç ulaşmamış; kapatılacak bir şey yok.
+            return dict(step, status="not_found")
+        if order.get('status') == 'open':
+            try:
+                exchange.cancel_order(order['id'], unified_symbol)
+            except ccxt.OrderNotFound:
+                pass
+            order = exchange.fetch_order(order['id'], unified_symbol)
+        filled = float(order.get('filled') or 0.0)
+        if filled <= 0:
+            return dict(step, status="not_filled")
+
+        position_side = 'long' if side == 'buy' else 'short'
+        contracts = sum(
+            abs(float(p.get('contracts') or 0.0)) for p in exchange.fetch_positions_risk([unified_symbol])
+            if _get_unified_symbol(p.get('symbol')) == unified_symbol and p.get('side') == position_side
+        )
+        close_amount = min(filled, contracts)
+        if close_amount <= 0:
+            return dict(step, status="no_position")
+        opposite_side = 'sell' if side == 'buy' else 'buy'
+        exchange.create_order(unified_symbol, 'market', opposite_side, close_amount, None, {'reduceOnly': True})
+        return dict(step, status="ok", amount=close_amount)
+    except Exception as e:
+        return dict(step, status="failed", error=str(e))
+
+def _cancel_bracket_leg(unified_symbol: str, name: str, order_id: str) -> dict:
+    try:
+        exchange.cancel_order(order_id, unified_symbol)
+        return {"action": "cancel", "leg": name, "status": "ok"}
+    except ccxt.OrderNotFound:
+        # Emir tetiklenmiş veya pozisyon kapandığı için zaten geçersiz kalmış olabilir.
+        return {"action": "cancel", "leg": name, "status": "not_found"}
+    except Exception as e:
+        return {"action": "cancel", "leg": name, "status": "failed", "error": str(e)}
+
+def _compensate_bracket(unified_symbol: str, side: str, legs: list[dict]) -> list[dict]:
+    """
+    Kısmen reddedilen bir toplu emirden sonra kabul edilen bacakları geri alır: SL/TP emirlerini iptal eder,
+    giriş emrini iptal edip dolmuş kısmını kapatır.
+    """
+    accepted = {leg["leg"]: leg for leg in legs if leg["status"] == "accepted"}
+    steps = [_cancel_bracket_leg(unified_symbol, name, accepted[name]["order_id"]) for name in ("stop_loss", "take_profit") if name in accepted]
+    if "entry" in accepted:
+        steps.append(_unwind_bracket_entry(unified_symbol, side, order_id=accepted["entry"]["order_id"]))
+    return steps
+
+def _compensate_unknown_bracket(unified_symbol: str, side: str, client_order_ids: dict[str, str]) -> list[dict]:
+    """
+    Yanıtı alınamayan bir toplu emri, bacaklara verilen istemci emir kimlikleri (clientOrderId) üzerinden geri alır.
+    Sadece bu isteğe ait açık emirler iptal edilir; semboldeki diğer emirlere ve pozisyonlara dokunulmaz.
+    """
+    steps = []
+    try:
+        open_orders = {order.get('clientOrderId'): order for order in exchange.fetch_open_orders(unified_symbol)}
+    except Exception as e:
+        steps.append({"action": "cancel", "leg": "stop_loss,take_profit", "status": "failed", "error": str(e)})
+    else:
+        for name in ("stop_loss", "take_profit"):
+            order = open_orders.get(client_order_ids[name])
+            steps.append(_cancel_bracket_leg(unified_symbol, name, order['id']) if order else {"action": "cancel", "leg": name, "status": "not_found"})
+    steps.append(_unwind_bracket_entry(unified_symbol, side, client_order_id=client_order_ids["entry"]))
+    return steps
+
+def _escalate_bracket_compensation(unified_symbol: str, result: dict):
+    """Telafi adımlarından biri başarısız olduysa borsada korumasız veya kayıtsız pozisyon/emir kalmış olabilir; acil bildirim gönderir."""
+    failed = [step for step in result["compensation"] if step["status"] == "failed"]
+    if not failed:
+        return
+    details = "; ".join(f"{step['action']} {step['leg']}: {step.get('error', '?')}" for step in failed)
+    logging.critical(f"TOPLU EMİR ({unified_symbol}) geri alınamadı, borsada korumasız veya kayıtsız pozisyon/emir kalmış olabilir: {details}")
+    send_telegram_message(
+        f"🚨 KRİTİK: {unified_symbol} toplu emri geri alınamadı. Borsada SL/TP'siz veya botun takip etmediği "
+        f"bir pozisyon/emir kalmış olabilir, lütfen elle kontrol edin.\nBaşarısız adımlar: {details}"
+    )
+
+def place_bracket_order(unified_symbol: str, side: str, amount: float, price: float | None, stop_loss: float, take_profit: float) -> dict:
+    """
+    Giriş, SL ve TP emirlerini vadeli işlemlerin toplu emir (batchOrders) uç noktasıyla tek istekte gönderir.
+    `price` verilirse giriş limit, verilmezse piyasa emridir. Sonuç her bacağın durumunu ve, bir bacak
+    reddedildiyse, kabul edilen bacakları geri almak için yapılan telafi adımlarını içerir. Telafi
+    başarısız olursa kritik log ve Telegram bildirimi gönderilir.
+    """
+    opposite_side = 'sell' if side == 'buy' else 'buy'
+    # Yanıt alınamazsa bu isteğe ait emirleri borsada bulabilmek için her bacağa benzersiz bir kimlik verilir.
+    batch_id = uuid.uuid4().hex[:20]
+    client_order_ids = {name: f"memba{batch_id}{suffix}" for name, suffix in (("entry", "e"), ("stop_loss", "sl"), ("take_profit", "tp"))}
+    requests_by_leg = [
+        ("entry", {"symbol": unified_symbol, "type": 'limit' if price else 'market', "side": side, "amount": amount, "price": price,
+                   "params": {'clientOrderId': client_order_ids["entry"]}}),
+        ("stop_loss", {"symbol": unified_symbol, "type": 'STOP_MARKET', "side": opposite_side, "amount": amount, "price": None,
+                       "params": {'stopPrice': stop_loss, 'reduceOnly': True, 'clientOrderId': client_order_ids["stop_loss"]}}),
+        ("take_profit", {"symbol": unified_symbol, "type": 'TAKE_PROFIT_MARKET', "side": opposite_side, "amount": amount, "price": None,
+                         "params": {'stopPrice': take_profit, 'reduceOnly': True, 'clientOrderId': client_order_ids["take_profit"]}}),
+    ]
+    try:
+        orders = exchange.create_orders([request for _, request in requests_by_leg])
+    except ccxt.NetworkError as e:
+        # İsteğin borsaya ulaşıp ulaşmadığı bilinmiyor; kayıtsız ve korumasız bir pozisyon kalmaması için
+        # bu isteğe ait emirler aranıp geri alınır.
+        logging.critical(f"TOPLU EMİR ({unified_symbol}) yanıtı alınamadı, olası emirler geri alınıyor: {e}")
+        legs = [{"leg": name, "status": "unknown", "order_id": None, "error": str(e)} for name, _ in requests_by_leg]
+        result = {"status": "error", "legs": legs, "compensation": _compensate_unknown_bracket(unified_symbol, side, client_order_ids)}
+        logging.info(f"TOPLU EMİR ({unified_symbol}) telafi adımları: {result['compensation']}")
+        _escalate_bracket_compensation(unified_symbol, result)
+        return result
+    except Exception as e:
+        # Borsa isteğin tamamını reddetti; hiçbir emir oluşmadı.
+        return {"status": "error", "legs": [{"leg": name, "status": "rejected", "order_id": None, "error": str(e)} for name, _ in requests_by_leg], "compensation": []}
+
+    legs = []
+    for (name, _), order in zip(requests_by_leg, list(orders) + [None] * (len(requests_by_leg) - len(orders))):
+        rejection = _order_rejection(order)
+        legs.append({"leg": name, "status": "rejected" if rejection else "accepted", "order_id": None if rejection else order['id'], "error": rejection})
+
+    if all(leg["status"] == "accepted" for leg in legs):
+        return {"status": "success", "legs": legs, "compensation": []}
+
+    logging.error(f"TOPLU EMİR ({unified_symbol}) reddedilen bacak içeriyor, kabul edilen bacaklar geri alınıyor: {legs}")
+    result = {"status": "error", "legs": legs, "compensation": _compensate_bracket(unified_symbol, side, legs)}
+    logging.info(f"TOPLU EMİR ({unified_symbol}) telafi adımları: {result['compensation']}")
+    _escalate_bracket_compensation(unified_symbol, result)
+    return result
+
+def _format_bracket_failure(result: dict) -> str:
+    legs_text = ", ".join(f"{leg['leg']}={leg['status']}" + (f" ({leg['error']})" if leg.get('error') else "") for leg in result["legs"])
+    compensation_text = ", ".join(f"{step['action']} {step['leg']}: {step['status']}" for step in result["compensation"]) or "gerekmedi"
+    return f"HATA: Toplu emir tamamlanamadı [{legs_text}]. Telafi: {compensation_text}"
+
 @tool
 def execute_trade_order(params: dict) -> str:
     """Alım/satım emri ve ilişkili SL/TP emirlerini borsaya gönderir."""
@@ -165,11 +378,19 @@ def execute_trade_order(params: dict) -> str:
         if leverage and exchange.options.get('defaultType') == 'future': exchange.set_leverage(int(leverage), unified_symbol)
         
         order_type = config.DEFAULT_ORDER_TYPE.lower()
+        stop_loss, take_profit = params.get('stop_loss'), params.get('take_profit')
+        is_bracket = stop_loss and take_profit and exchange.options.get('defaultType') == 'future'
+        if is_bracket and config.USE_BATCH_ORDERS and getattr(exchange, 'has', {}).get('createOrders'):
+            limit_price = float(formatted_price) if order_type == 'limit' and formatted_price else None
+            result = place_bracket_order(unified_symbol, side, float(formatted_amount), limit_price, stop_loss, take_profit)
+            if result["status"] != "success":
+                return _format_bracket_failure(result)
+            return f"İşlem emri ({side} {formatted_amount} {unified_symbol}) başarıyla gönderildi."
+
         if order_type == 'limit' and formatted_price: exchange.create_limit_order(unified_symbol, side, float(formatted_amount), float(formatted_price))
         else: exchange.create_market_order(unified_symbol, side, float(formatted_amount))
         
-        stop_loss, take_profit = params.get('stop_loss'), params.get('take_profit')
-        if stop_loss and take_profit and exchange.options.get('defaultType') == 'future':
+        if is_bracket:
             opposite_side = 'sell' if side == 'buy' else 'buy'
             time.sleep(0.5)
             try: exchange.create_order(unified_symbol, 'STOP_MARKET', opposite_side, float(formatted_amount), None, {'stopPrice': stop_loss, 'reduceOnly': True})
@@ -181,14 +402,21 @@ def execute_trade_order(params: dict) -> str:
     except Exception as e: return f"HATA: İşlem sırasında beklenmedik bir hata oluştu: {e}"
 
 @tool
-@retry(wait=wait_exponential(multiplier=1, min=4, max=10), stop=stop_after_attempt(3))
+@retry(wait=wait_exponential(multiplier=1, min=4, max=10), stop=stop_after_attempt(3), before_sleep=_record_retry)
 def get_atr_value(symbol_and_timeframe: str) -> dict:
     """Belirtilen sembol ve zaman aralığı için ATR (Average True Range) değerini hesaplar."""
     if not exchange: return {"status": "error", "message": "Borsa bağlantısı başlatılmamış."}
     try:
         symbol, timeframe = _parse_symbol_timeframe_input(symbol_and_timeframe)
-        bars = exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=200)
+        bars = _fetch_ohlcv(symbol, timeframe, limit=200)
         if not bars or len(bars) < 20: raise ValueError(f"ATR için yetersiz veri ({len(bars)} mum).")
+        if config.USE_INCREMENTAL_INDICATORS:
+            values = indicator_registry.compute(symbol, timeframe, bars)
+            last_atr = values.get('atr') if values else None
+            if last_atr is None: raise ValueError("Hesaplanan ATR değeri NaN.")
+            return {"status": "success", "value": last_atr}
+        import pandas as pd
+        import pandas_ta  # noqa: F401  (df.ta erişimcisini kaydeder)
         df = pd.DataFrame(bars, columns=["timestamp", "open", "high", "low", "close", "volume"])
         for col in ['open', 'high', 'low', 'close']: df[col] = pd.to_numeric(df[col])
         atr = df.ta.atr()
@@ -201,18 +429,21 @@ def get_atr_value(symbol_and_timeframe: str) -> dict:
         raise
 
 @tool
-@retry(wait=wait_exponential(multiplier=1, min=2, max=10), stop=stop_after_attempt(3))
+@retry(wait=wait_exponential(multiplier=1, min=2, max=10), stop=stop_after_attempt(3), before_sleep=_record_retry)
 def get_funding_rate(symbol: str) -> dict:
     """Belirtilen vadeli işlem sembolü için anlık fonlama oranını yapısal formatta alır."""
     if not exchange or config.DEFAULT_MARKET_TYPE != 'future': return {"status": "error", "message": "Fonlama oranı sadece vadeli işlemlerde mevcuttur."}
     unified_symbol = _get_unified_symbol(symbol)
+    if config.FUNDING_CACHE_ENABLED:
+        cached = funding_rate_cache.get(unified_symbol, _fetch_all_funding_rates)
+        if cached is not None: return { "status": "success", "funding_rate": cached['funding_rate'] }
     try:
         rate_data = exchange.fetch_funding_rate(unified_symbol)
         return { "status": "success", "funding_rate": rate_data.get('fundingRate', 0.0) }
     except Exception as e: return {"status": "error", "message": f"HATA: {unified_symbol} için fonlama oranı alınamadı: {e}"}
 
 @tool
-@retry(wait=wait_exponential(multiplier=1, min=2, max=10), stop=stop_after_attempt(3))
+@retry(wait=wait_exponential(multiplier=1, min=2, max=10), stop=stop_after_attempt(3), before_sleep=_record_retry)
 def get_order_book_depth(symbol: str) -> dict:
     """Emir defteri derinliğini ve alış/satış hacim oranını yapısal bir formatta alır."""
     if not exchange: return {"status": "error", "message": "Borsa bağlantısı başlatılmamış."}
@@ -226,7 +457,7 @@ def get_order_book_depth(symbol: str) -> dict:
     except Exception as e: return {"status": "error", "message": f"HATA: {unified_symbol} için emir defteri alınamadı: {e}"}
 
 @tool
-@retry(wait=wait_exponential(multiplier=1, min=2, max=10), stop=stop_after_attempt(3))
+@retry(wait=wait_exponential(multiplier=1, min=2, max=10), stop=stop_after_attempt(3), before_sleep=_record_retry)
 def get_latest_news(symbol: str) -> str:
     """Belirtilen bir kripto para sembolü için CryptoPanic API'sinden en son haber başlıklarını çeker."""
     api_key = os.getenv("CRYPTOPANIC_API_KEY")
@@ -250,7 +481,7 @@ def get_latest_news(symbol: str) -> str:
     except Exception as e: return f"HATA: Haberler işlenirken beklenmedik bir hata oluştu: {e}"
 
 @tool
-@retry(wait=wait_exponential(multiplier=1, min=4, max=10), stop=stop_after_attempt(3))
+@retry(wait=wait_exponential(multiplier=1, min=4, max=10), stop=stop_after_attempt(3), before_sleep=_record_retry)
 def get_wallet_balance(quote_currency: str = "USDT") -> dict:
     """Vadeli işlem cüzdanındaki belirtilen para biriminin (varsayılan: USDT) toplam bakiyesini alır."""
     if not exchange or config.DEFAULT_MARKET_TYPE != 'future': return {"status": "error", "message": "Bu fonksiyon sadece vadeli işlem modunda çalışır."}
@@ -264,7 +495,7 @@ def get_wallet_balance(quote_currency: str = "USDT") -> dict:
         raise
 
 @tool
-@retry(wait=wait_exponential(multiplier=1, min=5, max=20), stop=stop_after_attempt(3))
+@retry(wait=wait_exponential(multiplier=1, min=5, max=20), stop=stop_after_attempt(3), before_sleep=_record_retry)
 def get_open_positions_from_exchange(tool_input: str = "") -> list:
     """Borsadaki mevcut açık vadeli işlem pozisyonlarını çeker."""
     if not exchange or config.DEFAULT_MARKET_TYPE != 'future': return []
@@ -331,7 +562,7 @@ def update_stop_loss_order(params: dict) -> str:
         return f"HATA: SL güncellenemedi. Detay: {e}"
 
 @tool
-@retry(wait=wait_exponential(multiplier=1, min=5, max=20), stop=stop_after_attempt(3))
+@retry(wait=wait_exponential(multiplier=1, min=5, max=20), stop=stop_after_attempt(3), before_sleep=_record_retry)
 def get_top_gainers_losers(top_n: int, min_volume_usdt: int) -> list:
     """24s değişime ve işlem hacmine göre en çok kazanan/kaybedenleri alır."""
     if not exchange or config.DEFAULT_MARKET_TYPE != 'future': return []
@@ -340,6 +571,7 @@ def get_top_gainers_losers(top_n: int, min_volume_usdt: int) -> list:
         if not all_tickers_data: return []
         
         processed_tickers = []
+        last_prices = {}
         for ticker in all_tickers_data:
             symbol = ticker.get('symbol')
             if not symbol or not symbol.endswith('USDT'): continue
@@ -348,6 +580,7 @@ def get_top_gainers_losers(top_n: int, min_volume_usdt: int) -> list:
                 quote_volume = float(ticker.get('quoteVolume', 0))
                 price = float(ticker.get('lastPrice', 0))
                 price_change_percent = float(ticker.get('priceChangePercent', 0))
+                if price > 0: last_prices[_get_unified_symbol(symbol)] = price
 
                 if price > 0 and quote_volume > min_volume_usdt:
                     processed_tickers.append({
@@ -358,6 +591,8 @@ def get_top_gainers_losers(top_n: int, min_volume_usdt: int) -> list:
             except (ValueError, TypeError):
                 continue
         
+        # 24s yanıtı tüm son fiyatları zaten içerdiğinden, fiyat görüntüsünü ek istek yapmadan tazeler.
+        if config.TICKER_SNAPSHOT_ENABLED and last_prices: ticker_snapshot.update(last_prices)
         if not processed_tickers: return []
         processed_tickers.sort(key=lambda item: item['percentage'], reverse=True)
         